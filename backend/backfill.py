@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Backfill model predictions for the professional 3-month energy dataset.
+
+Runs the PowerBytePredictor XGBoost model over every hourly row in one
+vectorized predict call and writes the results next to the dataset as
+professional_3_month_energy_predictions.csv (timestamp, predicted_kwh).
+The historical endpoints merge this file into the cached dataset.
+
+Without --model, the model the API serves is used (POWERBYTE_MODEL_FILE in
+POWERBYTE_MODEL_DIR, by default powerbyte_xgboost.json next to this file).
+
+Usage:
+    python backfill.py
+    python backfill.py --model /models/v2.json
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import model_registry
+from ml_engine import FEATURE_COLUMNS, PowerBytePredictor
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFESSIONAL_CSV = os.path.join(BASE_DIR, "professional_3_month_energy_dataset.csv")
+PREDICTIONS_CSV = os.path.join(BASE_DIR, "professional_3_month_energy_predictions.csv")
+
+# The professional dataset only meters energy; voltage is taken as the
+# nominal supply and reactive power is not recorded.
+NOMINAL_VOLTAGE = 230.0
+REACTIVE_POWER = 0.0
+
+
+def build_features(df):
+    """
+    Assembles the model's feature table from hourly energy readings.
+
+    Each row covers one hour, so energy_kwh doubles as the average active
+    power in kW. Lag and rolling features look strictly backwards by time,
+    on an hourly grid, so a gap in the data is not skipped over: where the
+    hour they need is missing or before the data starts, they fall back to
+    the current reading.
+    """
+    timestamps = pd.to_datetime(df["timestamp"])
+    power_kw = df["energy_kwh"].astype(np.float64)
+
+    # One value per clock hour, with NaN for hours without a row
+    hours = timestamps.dt.floor("h")
+    hourly = power_kw.groupby(hours.to_numpy()).mean()
+    grid = hourly.reindex(pd.date_range(hourly.index[0], hourly.index[-1], freq="h"))
+
+    def by_row(series):
+        """Grid values at each row's hour, with the row's own reading where missing."""
+        return pd.Series(series.reindex(hours).to_numpy(), index=df.index).fillna(power_kw)
+
+    def lag(hours_back):
+        return by_row(grid.shift(hours_back))
+
+    return pd.DataFrame({
+        "Global_intensity": power_kw * 1000.0 / NOMINAL_VOLTAGE,
+        "Voltage": NOMINAL_VOLTAGE,
+        "Global_reactive_power": REACTIVE_POWER,
+        "hour": timestamps.dt.hour,
+        "dayofweek": timestamps.dt.dayofweek,
+        "month": timestamps.dt.month,
+        "lag_1h": lag(1),
+        "lag_24h": lag(24),
+        "lag_7d": lag(24 * 7),
+        "rolling_mean_4h": by_row(grid.shift(1).rolling(4, min_periods=1).mean()),
+    }, columns=FEATURE_COLUMNS)
+
+
+def backfill_predictions(predictor, dataset_path=PROFESSIONAL_CSV, output_path=PREDICTIONS_CSV):
+    """
+    Predicts every row of the dataset and persists the results.
+
+    Returns:
+        pd.DataFrame: The written (timestamp, predicted_kwh) table.
+    """
+    df = pd.read_csv(dataset_path, usecols=["timestamp", "energy_kwh"])
+    features = build_features(df)
+
+    predicted = predictor.predict_frame(features)
+
+    out = pd.DataFrame({
+        "timestamp": df["timestamp"],
+        "predicted_kwh": np.clip(predicted, 0.0, None).round(4),
+    })
+    # Write-then-rename so readers never see a half-written file
+    tmp_path = output_path + ".tmp"
+    out.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_path)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill model predictions for the historical dataset")
+    parser.add_argument("--model", help="XGBoost model file (default: the API's active model file)")
+    parser.add_argument("--dataset", default=PROFESSIONAL_CSV, help="Hourly energy dataset CSV")
+    parser.add_argument("--output", default=PREDICTIONS_CSV, help="Predictions CSV to write")
+    args = parser.parse_args()
+
+    predictor = PowerBytePredictor(model_path=args.model or model_registry.default_model_path())
+    if not predictor.model:
+        raise SystemExit(1)
+
+    start = time.perf_counter()
+    out = backfill_predictions(predictor, args.dataset, args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Predicted {len(out)} rows in {elapsed * 1000:.1f} ms")
+    print(f"✓ Saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
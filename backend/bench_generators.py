@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorized offline-mode generator against the original
+per-second Python loop.
+
+The loop reference below is the body of the old
+generate_24hr_equipment_data.py. It is timed on a sample of rows and
+extrapolated linearly, since its cost per row is constant. The vectorized
+generator is timed in full. Neither number includes the CSV write.
+
+Usage:
+    python bench_generators.py --days 1 30
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from generate_24hr_equipment_data import EQUIPMENT, SECONDS_PER_DAY, generate
+
+
+def legacy_loop(total_seconds):
+    """The original scalar loop, minus CSV writing, for `total_seconds` rows."""
+    np.random.seed(42)
+    columns = {key: [] for key in (
+        'RX_kWh', 'TX1_kWh', 'TX2_kWh', 'RX_CO_ppm', 'TX1_CO_ppm', 'TX2_CO_ppm',
+        'CO_status', 'load_status', 'deviation_percent',
+    )}
+    per_equipment = {name: ([], [], []) for name in EQUIPMENT}
+
+    for i in range(total_seconds):
+        hour = (i // 3600) % 24
+        hour_factor = 0.5 + 0.5 * np.sin((hour - 6) * np.pi / 12)
+        hour_factor = np.clip(hour_factor, 0.3, 1.2)
+
+        equipment_data = {}
+        for eq_name, eq_spec in EQUIPMENT.items():
+            on_start, on_end = eq_spec['on_hours']
+            if on_start < on_end:
+                is_on = on_start <= hour < on_end
+            else:
+                is_on = hour >= on_start or hour < on_end
+            if is_on:
+                base_consumption = eq_spec['rated'] * 0.4 * hour_factor
+                noise = np.random.normal(0, base_consumption * 0.1)
+                consumption = max(0.01, base_consumption + noise)
+            else:
+                consumption = eq_spec['rated'] * 0.01
+            equipment_data[eq_name] = {
+                'consumption': consumption,
+                'status': 'ON' if is_on else 'OFF',
+                'usage_percent': (consumption / eq_spec['rated']) * 100,
+            }
+
+        tx1 = sum(equipment_data[n]['consumption'] for n, s in EQUIPMENT.items() if s['line'] == 'TX1')
+        tx2 = sum(equipment_data[n]['consumption'] for n, s in EQUIPMENT.items() if s['line'] == 'TX2')
+        rx = tx1 + tx2
+        total_tx = tx1 + tx2
+        deviation = ((rx - total_tx) / total_tx * 100) if total_tx > 0 else 0
+
+        rx_co = 40 + hour_factor * 20 + np.random.normal(0, 2)
+        tx1_co = 45 + hour_factor * 20 + np.random.normal(0, 2)
+        tx2_co = 42 + hour_factor * 20 + np.random.normal(0, 2)
+
+        columns['RX_kWh'].append(round(rx, 2))
+        columns['TX1_kWh'].append(round(tx1, 2))
+        columns['TX2_kWh'].append(round(tx2, 2))
+        columns['RX_CO_ppm'].append(round(rx_co, 1))
+        columns['TX1_CO_ppm'].append(round(tx1_co, 1))
+        columns['TX2_CO_ppm'].append(round(tx2_co, 1))
+        columns['CO_status'].append("Normal" if rx_co < 100 else "High")
+        columns['load_status'].append("Normal" if rx < 4 else "High")
+        columns['deviation_percent'].append(round(deviation, 2))
+        for name, (kwh, status, usage) in per_equipment.items():
+            kwh.append(round(equipment_data[name]['consumption'], 2))
+            status.append(equipment_data[name]['status'])
+            usage.append(round(np.clip(equipment_data[name]['usage_percent'], 0, 100), 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loop vs vectorized data generation")
+    parser.add_argument("--days", type=float, nargs="+", default=[1, 30])
+    parser.add_argument("--sample-seconds", type=int, default=3600,
+                        help="Rows timed for the loop reference before extrapolating")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    legacy_loop(args.sample_seconds)
+    loop_per_row = (time.perf_counter() - start) / args.sample_seconds
+
+    print(f"\n{'duration':>10} {'rows':>12} {'loop (s)*':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for days in args.days:
+        rows = int(days * SECONDS_PER_DAY)
+        start = time.perf_counter()
+        generate(np.arange(rows), np.random.default_rng(42))
+        vectorized = time.perf_counter() - start
+        loop = loop_per_row * rows
+        print(f"{days:>9g}d {rows:>12,} {loop:>12.1f} {vectorized:>15.2f} {loop / vectorized:>8.0f}x")
+    print(f"\n* extrapolated from {args.sample_seconds:,} timed rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-reading inference: "standard" vs "fast" mode.
+
+Runs preprocess_and_predict() repeatedly in each mode with identical inputs,
+reports p50/p99 latency and checks that both modes return bit-identical
+predictions.
+
+Usage:
+    python bench_inference.py --model powerbyte_xgboost.json --iterations 5000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from ml_engine import PowerBytePredictor
+
+SAMPLE = {"voltage": 231.4, "intensity": 9.8, "reactive_power": 0.21}
+
+
+def run(predictor, iterations):
+    """Returns (latencies in µs, predictions) for `iterations` calls."""
+    latencies = np.empty(iterations)
+    predictions = np.empty(iterations, dtype=np.float32)
+    for i in range(iterations):
+        start = time.perf_counter()
+        result = predictor.preprocess_and_predict(SAMPLE)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+        predictions[i] = result["predicted_power"]
+    return latencies, predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark standard vs fast single-row inference")
+    parser.add_argument("--model", default="powerbyte_xgboost.json", help="XGBoost model file")
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ("standard", "fast"):
+        predictor = PowerBytePredictor(model_path=args.model, inference_mode=mode)
+        if not predictor.model:
+            raise SystemExit(1)
+        run(predictor, args.warmup)
+        results[mode] = run(predictor, args.iterations)
+
+    print(f"\n{'mode':<10} {'p50 (µs)':>10} {'p99 (µs)':>10}")
+    for mode, (latencies, _) in results.items():
+        print(f"{mode:<10} {np.percentile(latencies, 50):>10.1f} {np.percentile(latencies, 99):>10.1f}")
+
+    speedup = np.percentile(results["standard"][0], 50) / np.percentile(results["fast"][0], 50)
+    identical = np.array_equal(results["standard"][1], results["fast"][1])
+    print(f"\np50 speedup: {speedup:.1f}x")
+    print(f"Bit-identical predictions: {'yes' if identical else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
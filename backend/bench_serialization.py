@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of /api/historical/daily payloads by size.
+
+For synthetic datasets of increasing length, times three ways of turning
+the daily rows into response bytes:
+    to_dict   daily.to_dict(orient="records") + jsonable_encoder + json.dumps
+              (the original per-request path)
+    records   prebuilt row dicts serialized by fast_json.dumps
+    columns   ?format=columns: NumPy array slices serialized by fast_json.dumps
+
+and checks that every variant decodes to the same rows.
+
+Usage:
+    python bench_serialization.py
+    python bench_serialization.py --days 90 1000 10000 --repeat 20
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+import fast_json
+from rollups import Rollups
+
+
+def synthetic_hourly(days, seed=0):
+    """An hourly frame with the columns Rollups reads; the last 10% of days lack predictions."""
+    rng = np.random.default_rng(seed)
+    stamps = pd.date_range("2000-01-01", periods=days * 24, freq="h")
+    energy = rng.uniform(0.05, 2.4, len(stamps)).round(3)
+    predicted = (energy * rng.uniform(0.9, 1.1, len(stamps))).round(3)
+    predicted[int(len(stamps) * 0.9):] = np.nan
+    return pd.DataFrame({
+        "date": stamps.strftime("%Y-%m-%d"),
+        "energy_kwh": energy,
+        "cost_rs": (energy * 8).round(2),
+        "carbon_kg": (energy * 0.716).round(4),
+        "status": np.where(energy < 0.2, "low_usage", "normal"),
+        "predicted_kwh": predicted,
+    })
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark daily payload serialization vs payload size")
+    parser.add_argument("--days", type=int, nargs="+", default=[90, 1_000, 10_000, 50_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"fast_json backend: {fast_json.BACKEND}\n")
+    print(f"{'days':>8} {'to_dict ms':>11} {'records ms':>11} {'columns ms':>11} "
+          f"{'records KB':>11} {'columns KB':>11} {'speedup':>8}")
+    for days in args.days:
+        rollups = Rollups(synthetic_hourly(days))
+
+        def to_dict():
+            payload = rollups.daily_payload(days)
+            payload["data"] = rollups.daily.to_dict(orient="records")
+            # json.dumps like JSONResponse.render, minus allow_nan=False: the
+            # rows hold NaN for days without predictions
+            return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode()
+
+        def records():
+            return fast_json.dumps(rollups.daily_payload(days))
+
+        def columns():
+            return fast_json.dumps(rollups.daily_payload(days, columnar=True))
+
+        timings = [best_ms(fn, args.repeat) for fn in (to_dict, records, columns)]
+        baseline, row_bytes, column_bytes = to_dict(), records(), columns()
+
+        # Same rows either way (the old path leaked NaN for days without predictions)
+        expected = json.loads(row_bytes)["data"]
+        decoded = json.loads(column_bytes)["data"]
+        rebuilt = [dict(zip(decoded, values)) for values in zip(*decoded.values())]
+        assert rebuilt == expected, "columns payload differs from records"
+        assert len(json.loads(baseline.replace(b"NaN", b"null"))["data"]) == len(expected)
+
+        print(f"{days:>8,} {timings[0]:>11.2f} {timings[1]:>11.2f} {timings[2]:>11.2f} "
+              f"{len(row_bytes) / 1024:>11.1f} {len(column_bytes) / 1024:>11.1f} "
+              f"{timings[0] / timings[2]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark backend cold start, to catch import-time regressions.
+
+Imports the app in fresh interpreters under ``python -X importtime`` and
+reports the median total import time plus the slowest modules. Heavy
+libraries (xgboost, scikit-learn, SciPy) must stay out of this path; they
+are imported by the warm-up phase. With --serve, it also starts uvicorn and
+times how long /healthz (live) and /readyz (warm-up done) take to answer.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --repeat 10 --top 15 --budget-ms 2500
+    python bench_startup.py --serve --port 8099
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Must never be imported by `import main`
+FORBIDDEN = ("xgboost", "sklearn", "scipy")
+
+
+def import_profile(module):
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        (float, dict): Total import time of `module` in ms, and
+            {module name: (self ms, cumulative ms)} for everything imported.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return modules[module][1], modules
+
+
+def wait_for(url, started, deadline):
+    """Seconds from `started` until `url` answers 200, or None once `deadline` passes (perf_counter)."""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def time_serve(port, timeout):
+    """Starts uvicorn and returns (seconds to /healthz, seconds to /readyz) from process start."""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + timeout
+        live = wait_for(f"http://127.0.0.1:{port}/healthz", started, deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/readyz", started, deadline) if live is not None else None
+        return live, ready
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend import time and time to live / ready")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit with status 1 if the median import time exceeds this")
+    parser.add_argument("--serve", action="store_true", help="Also time uvicorn to /healthz and /readyz")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    totals, modules = [], {}
+    for _ in range(args.repeat):
+        total, modules = import_profile(args.module)
+        totals.append(total)
+    median = statistics.median(totals)
+    print(f"import {args.module}: median {median:.0f} ms, min {min(totals):.0f} ms over {args.repeat} runs\n")
+
+    # Top-level packages only, so pandas is not listed once per submodule
+    packages = {name: times for name, times in modules.items() if "." not in name}
+    print(f"{'module':<28} {'cumulative ms':>14} {'self ms':>9}")
+    for name, (self_ms, cumulative_ms) in sorted(packages.items(), key=lambda kv: -kv[1][1])[:args.top]:
+        print(f"{name:<28} {cumulative_ms:>14.1f} {self_ms:>9.1f}")
+
+    failed = False
+    leaked = [name for name in FORBIDDEN if name in modules]
+    if leaked:
+        print(f"\nFAIL: {', '.join(leaked)} imported at start-up; import it lazily")
+        failed = True
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"\nFAIL: median import time {median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+
+    if args.serve:
+        live_s, ready_s = time_serve(args.port, args.timeout)
+        print(f"\nuvicorn: /healthz after {'-' if live_s is None else f'{live_s:.2f} s'}, "
+              f"/readyz after {'-' if ready_s is None else f'{ready_s:.2f} s'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Typed columnar cache (.npy files + JSON metadata) for the CSV datasets.
+
+convert() parses a CSV once and writes one .npy file per column:
+timestamps as int64 nanoseconds, repeated strings (dates, slots, statuses)
+as categorical codes with their categories in meta.json, numbers and flags
+as-is. read_table() memory-maps those files and wraps them in a DataFrame
+without copying. When the CSV's mtime/size no longer match the metadata,
+the cache is stale: read_table() parses the CSV instead and rewrites the
+cache for the next load.
+
+Usage:
+    python columnar_cache.py                # convert the bundled datasets
+    python columnar_cache.py some_file.csv  # convert specific files
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_ROOT = os.path.join(BASE_DIR, ".columnar_cache")
+FORMAT_VERSION = 1
+
+DATASETS = [
+    "professional_3_month_energy_dataset.csv",
+    "historical_data.csv",
+    "3_month_TX1_TX2_RX_with_MQ7_ppm.csv",
+]
+
+TIMESTAMP_COLUMNS = ("timestamp",)
+# String columns with more distinct values than this share of rows stay strings
+CATEGORICAL_MAX_RATIO = 0.5
+
+
+def cache_dir_for(csv_path):
+    directory, name = os.path.split(os.path.abspath(csv_path))
+    if directory != BASE_DIR:
+        # Same-named datasets elsewhere (e.g. fleet site partitions) get their own cache
+        name = f"{name}-{hashlib.sha1(directory.encode()).hexdigest()[:10]}"
+    return os.path.join(CACHE_ROOT, name)
+
+
+def _source_signature(csv_path):
+    st = os.stat(csv_path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_fresh(csv_path):
+    """True if a cache exists and was built from the CSV as it is now."""
+    meta = _read_meta(cache_dir_for(csv_path))
+    return (
+        meta is not None
+        and meta.get("format") == FORMAT_VERSION
+        and meta.get("source") == _source_signature(csv_path)
+    )
+
+
+def _encode(df):
+    """Splits a parsed CSV into ({column: ndarray}, {column: column meta})."""
+    arrays, columns = {}, {}
+    for name in df.columns:
+        series = df[name]
+        if name in TIMESTAMP_COLUMNS:
+            stamps = pd.to_datetime(series).to_numpy(dtype="datetime64[ns]")
+            arrays[name] = stamps.view(np.int64)
+            columns[name] = {"kind": "timestamp"}
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            arrays[name] = series.to_numpy()
+            columns[name] = {"kind": "plain"}
+        elif series.nunique() <= max(1, len(series) * CATEGORICAL_MAX_RATIO):
+            codes, categories = pd.factorize(series, sort=True)
+            dtype = np.int16 if len(categories) < 2 ** 15 else np.int32
+            arrays[name] = codes.astype(dtype)
+            columns[name] = {"kind": "categorical", "categories": categories.astype(str).tolist()}
+        else:
+            # Mostly-unique strings: fixed-width unicode keeps them mappable
+            arrays[name] = series.astype(str).to_numpy(dtype=str)
+            columns[name] = {"kind": "plain"}
+    return arrays, columns
+
+
+def convert(csv_path, df=None):
+    """
+    Writes (or rewrites) the columnar cache for a CSV.
+
+    Args:
+        csv_path (str): Source CSV.
+        df (pd.DataFrame, optional): The CSV already parsed with pd.read_csv.
+
+    Returns:
+        str: The cache directory.
+    """
+    signature = _source_signature(csv_path)
+    if df is None:
+        df = pd.read_csv(csv_path)
+    arrays, columns = _encode(df)
+
+    cache_dir = cache_dir_for(csv_path)
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{list(columns).index(name)}.npy"), array, allow_pickle=False)
+    meta = {
+        "format": FORMAT_VERSION,
+        "source": signature,
+        "rows": len(df),
+        "order": list(columns),
+        "columns": columns,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    # Swap directories so readers see either the old or the new cache, whole
+    old_dir = f"{cache_dir}.old-{os.getpid()}"
+    if os.path.exists(cache_dir):
+        os.replace(cache_dir, old_dir)
+    os.replace(tmp_dir, cache_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return cache_dir
+
+
+def load_dir(cache_dir, columns=None):
+    """Memory-maps a columnar directory (as written by convert()) into a DataFrame."""
+    meta = _read_meta(cache_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No columnar data in {cache_dir}")
+    data = {}
+    for name in columns or meta["order"]:
+        info = meta["columns"][name]
+        array = np.load(os.path.join(cache_dir, f"{meta['order'].index(name)}.npy"), mmap_mode="r")
+        if info["kind"] == "timestamp":
+            data[name] = pd.Series(array.view("datetime64[ns]"), copy=False)
+        elif info["kind"] == "categorical":
+            data[name] = pd.Categorical.from_codes(array, categories=info["categories"], validate=False)
+        else:
+            data[name] = array
+    return pd.DataFrame(data, copy=False)
+
+
+def _load_cached(csv_path, columns):
+    return load_dir(cache_dir_for(csv_path), columns)
+
+
+def read_table(csv_path, columns=None):
+    """
+    Loads a dataset, from its memory-mapped cache when fresh, else from the CSV.
+
+    A stale or missing cache is rebuilt after the CSV parse. Timestamp
+    columns come back as datetime64 and repeated strings as categoricals
+    in both cases.
+
+    Raises:
+        FileNotFoundError: If the CSV does not exist.
+    """
+    if is_fresh(csv_path):
+        return _load_cached(csv_path, columns)
+
+    df = pd.read_csv(csv_path)
+    try:
+        convert(csv_path, df)
+        return _load_cached(csv_path, columns)
+    except OSError as e:
+        # Read-only deployments still work, just without the cache
+        print(f"Error writing columnar cache for {csv_path}: {e}")
+        for name in TIMESTAMP_COLUMNS:
+            if name in df:
+                df[name] = pd.to_datetime(df[name])
+        return df[columns] if columns else df
+
+
+def main():
+    paths = sys.argv[1:] or [os.path.join(BASE_DIR, name) for name in DATASETS]
+    for path in paths:
+        start = time.perf_counter()
+        df = pd.read_csv(path)
+        csv_ms = (time.perf_counter() - start) * 1000
+        cache_dir = convert(path, df)
+
+        start = time.perf_counter()
+        read_table(path)
+        cached_ms = (time.perf_counter() - start) * 1000
+        print(f"✓ {os.path.basename(path)}: {len(df)} rows → {cache_dir}")
+        print(f"  CSV parse {csv_ms:.1f} ms | cached load {cached_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Dedicated, bounded executor for CPU-bound work (XGBoost inference, pandas
+aggregation) called from async request handlers.
+
+The pool has a fixed number of worker threads plus a bounded number of
+queued jobs. When both are used up, run() raises PoolSaturated right away
+instead of queueing without limit; the API turns that into a 429.
+
+Sizing is configurable through environment variables:
+    POWERBYTE_CPU_WORKERS  worker threads (default: CPU count)
+    POWERBYTE_CPU_QUEUE    jobs allowed to wait for a worker (default: 32 per worker)
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class CPUPool:
+    """ThreadPoolExecutor wrapper with admission control for one event loop."""
+
+    def __init__(self, max_workers=None, max_queue=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers * 32 if max_queue is None else max_queue
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="powerbyte-cpu")
+        # Only touched from the event loop thread, so no lock is needed
+        self.in_flight = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self):
+        return self.max_workers + self.max_queue
+
+    @property
+    def queue_depth(self):
+        """Jobs admitted but still waiting for a worker."""
+        return max(0, self.in_flight - self.max_workers)
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) on the pool and awaits its result.
+
+        Raises:
+            PoolSaturated: If the pool and its queue are full.
+        """
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise PoolSaturated()
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def from_env():
+    """Builds a CPUPool sized from POWERBYTE_CPU_WORKERS / POWERBYTE_CPU_QUEUE."""
+    return CPUPool(_env_int("POWERBYTE_CPU_WORKERS"), _env_int("POWERBYTE_CPU_QUEUE"))
@@ -0,0 +1,210 @@
+"""
+Streaming building blocks for the dataset generators.
+
+A generator describes one chunk of rows (a vectorized function of a block of
+timestamps and a numpy Generator). This module slices a time range into
+fixed-size blocks, hands each chunk to a sink that appends it to disk, and
+fans meters out over a process pool. Only one chunk per worker is ever in
+memory, so a year of per-second data per meter needs no more RAM than a
+single chunk.
+
+Sinks:
+    csv       one CSV file, header written once, chunks appended
+    columnar  a directory of .npy columns + meta.json in the columnar_cache
+              layout; load it with columnar_cache.load_dir()
+
+Every meter gets its own random stream derived from (seed, meter index), so
+output is identical whatever the worker count or scheduling order.
+"""
+
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from columnar_cache import FORMAT_VERSION, TIMESTAMP_COLUMNS
+
+FORMATS = ("csv", "columnar")
+DEFAULT_CHUNK_ROWS = 500_000
+
+
+def check_positive(parser, args, *names):
+    """Exits through parser.error() if any of the named numeric options is not above zero."""
+    for name in names:
+        value = getattr(args, name)
+        if value <= 0:
+            parser.error(f"--{name.replace('_', '-')} must be greater than 0 (got {value:g})")
+
+
+def meter_ids(count):
+    """Identifiers for `count` synthetic meters: meter_001, meter_002, ..."""
+    return [f"meter_{i + 1:03d}" for i in range(count)]
+
+
+def meter_rng(seed, index):
+    """Independent, reproducible random stream for the meter at `index`."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def meter_output(path, meter_id, count):
+    """Output path for one meter: `path` itself for a single meter, else suffixed."""
+    if count == 1:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{meter_id}{ext}"
+
+
+def row_count(start, end, step_seconds):
+    """Rows in [start, end] at one row every `step_seconds`."""
+    span = (np.datetime64(end, "s") - np.datetime64(start, "s")) // np.timedelta64(step_seconds, "s")
+    return int(span) + 1
+
+
+def time_blocks(start, rows, step_seconds, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yields datetime64[ns] arrays of at most `chunk_rows` consecutive timestamps."""
+    origin = np.datetime64(start, "ns")
+    step = np.timedelta64(step_seconds, "s").astype("timedelta64[ns]")
+    for offset in range(0, rows, chunk_rows):
+        yield origin + np.arange(offset, min(offset + chunk_rows, rows)) * step
+
+
+def hour_of_day(timestamps):
+    """Hour (0-23) of each datetime64 timestamp."""
+    return ((timestamps - timestamps.astype("datetime64[D]")) // np.timedelta64(1, "h")).astype(np.int64)
+
+
+def date_labels(timestamps):
+    """YYYY-MM-DD of each timestamp, as a categorical (one string per distinct day)."""
+    days, codes = np.unique(timestamps.astype("datetime64[D]"), return_inverse=True)
+    return pd.Categorical.from_codes(codes.ravel(), categories=np.datetime_as_string(days))
+
+
+class CsvSink:
+    """Appends chunks to a CSV file; the file appears under its name on close()."""
+
+    def __init__(self, path, rows=None, date_format="%Y-%m-%d %H:%M:%S"):
+        self.path = path
+        self.date_format = date_format
+        self._tmp = f"{path}.tmp-{os.getpid()}"
+        self._file = open(self._tmp, "w", newline="", encoding="utf-8")
+        self._header = True
+
+    def write(self, df):
+        df.to_csv(self._file, header=self._header, index=False, date_format=self.date_format)
+        self._header = False
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp, self.path)
+
+
+class ColumnarSink:
+    """
+    Streams chunks into preallocated .npy columns, one file per column.
+    Strings are stored as categorical codes whose categories grow
+    as new values appear, so no chunk needs to know the others' values.
+    """
+
+    def __init__(self, path, rows):
+        self.path = path
+        self.rows = rows
+        self._tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        os.makedirs(self._tmp)
+        self._files = {}
+        self._columns = {}
+        self._categories = {}
+        self._offset = 0
+
+    def _open(self, df):
+        for index, name in enumerate(df.columns):
+            series = df[name]
+            if name in TIMESTAMP_COLUMNS:
+                kind, dtype = "timestamp", np.int64
+            elif isinstance(series.dtype, pd.CategoricalDtype) or not (
+                pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+            ):
+                kind, dtype = "categorical", np.int32
+                self._categories[name] = {}
+            else:
+                kind, dtype = "plain", series.dtype
+            self._columns[name] = {"kind": kind}
+            # open_memmap lays down the .npy header for the full shape; the
+            # data is then appended with plain writes so written pages do not
+            # stay mapped into this process
+            path = os.path.join(self._tmp, f"{index}.npy")
+            header = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(self.rows,))
+            offset, dtype = header.offset, header.dtype
+            del header
+            f = open(path, "r+b")
+            f.seek(offset)
+            self._files[name] = (f, dtype)
+
+    def _codes(self, name, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            local, labels = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            local, labels = pd.factorize(series)
+        known = self._categories[name]
+        mapping = np.array([known.setdefault(str(label), len(known)) for label in labels], dtype=np.int32)
+        return mapping[local]
+
+    def write(self, df):
+        if not self._files:
+            self._open(df)
+        end = self._offset + len(df)
+        if end > self.rows:
+            raise ValueError(f"{self.path}: more than the {self.rows} rows allocated")
+        for name, (f, dtype) in self._files.items():
+            kind = self._columns[name]["kind"]
+            if kind == "timestamp":
+                values = pd.to_datetime(df[name]).to_numpy(dtype="datetime64[ns]").view(np.int64)
+            elif kind == "categorical":
+                values = self._codes(name, df[name])
+            else:
+                values = df[name].to_numpy()
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        self._offset = end
+
+    def close(self):
+        if self._offset != self.rows:
+            raise ValueError(f"{self.path}: wrote {self._offset} of {self.rows} rows")
+        for f, _ in self._files.values():
+            f.close()
+        self._files.clear()
+        for name, known in self._categories.items():
+            self._columns[name]["categories"] = list(known)
+        meta = {"format": FORMAT_VERSION, "rows": self.rows, "order": list(self._columns), "columns": self._columns}
+        with open(os.path.join(self._tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        old_dir = f"{self.path}.old-{os.getpid()}"
+        if os.path.exists(self.path):
+            os.replace(self.path, old_dir)
+        os.replace(self._tmp, self.path)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def open_sink(path, fmt, rows, **options):
+    """A CsvSink or ColumnarSink for `rows` rows at `path`."""
+    if fmt == "csv":
+        return CsvSink(path, rows, **options)
+    if fmt == "columnar":
+        return ColumnarSink(path, rows)
+    raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+
+
+def run_meters(job, tasks, workers=1):
+    """
+    Runs job(task) for every task, across `workers` processes when > 1.
+
+    `job` must be a module-level function so it can be pickled. Results come
+    back in task order.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [job(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return list(pool.map(job, tasks))
@@ -0,0 +1,107 @@
+"""
+Process-wide, mtime-invalidated cache for the CSV datasets served by the API.
+
+A DatasetStore parses its file once, keeps the enriched DataFrame in memory
+and only reloads when the file's modification time or size changes. Handlers
+get a shallow view of the cached frame, so no request ever copies the data.
+"""
+
+import os
+import threading
+import time
+
+from metrics import REGISTRY
+
+DATASET_LOAD_SECONDS = REGISTRY.histogram(
+    "powerbyte_dataset_load_seconds", "Time to (re)load a dataset after its file changed.", ("dataset",))
+# Shared with the engines that derive structures from a dataset version and
+# the endpoints that aggregate on request
+AGGREGATION_SECONDS = REGISTRY.histogram(
+    "powerbyte_aggregation_seconds", "Time to build or query aggregates over a dataset.", ("kind", "dataset"))
+
+
+class DatasetStore:
+    """Caches one CSV-backed DataFrame and reloads it when the file changes."""
+
+    def __init__(self, path, loader, companions=()):
+        """
+        Args:
+            path (str): Absolute path of the dataset file.
+            loader (callable): Takes the path and returns the enriched DataFrame.
+            companions (iterable): Optional side files merged in by the loader;
+                creating, changing or deleting one also triggers a reload.
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        self.companions = tuple(companions)
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot = (None, 0)
+        self._signature = None
+        self.version = 0
+
+    def _stat_signature(self):
+        st = os.stat(self.path)
+        signature = [(st.st_mtime_ns, st.st_size)]
+        for companion in self.companions:
+            try:
+                cst = os.stat(companion)
+                signature.append((cst.st_mtime_ns, cst.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def snapshot(self):
+        """
+        Returns (frame, version), reloading the frame first if the file changed.
+
+        Raises:
+            FileNotFoundError: If the dataset file does not exist.
+        """
+        signature = self._stat_signature()
+        if signature != self._signature:
+            with self._lock:
+                # Another thread may have reloaded while we waited for the lock
+                if signature != self._signature:
+                    started = time.perf_counter()
+                    frame = self._loader(self.path)
+                    DATASET_LOAD_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+                    self.version += 1
+                    self._snapshot = (frame, self.version)
+                    self._signature = signature
+        return self._snapshot
+
+    def signature(self):
+        """
+        Stat signature of the dataset and its companions, or None if the
+        dataset is missing. Changes whenever a reload is due, without loading.
+        """
+        try:
+            return self._stat_signature()
+        except FileNotFoundError:
+            return None
+
+    def is_current(self):
+        """True if the cached frame matches the file on disk (False if missing)."""
+        try:
+            return self._stat_signature() == self._signature
+        except FileNotFoundError:
+            return False
+
+    def get(self):
+        """Returns the cached frame, reloading it first if the file changed."""
+        return self.snapshot()[0]
+
+    def view(self):
+        """
+        Returns a shallow, read-only view of the cached frame.
+
+        The view shares column data with the cache; adding or replacing
+        columns on it never touches the shared frame.
+        """
+        return self.get().copy(deep=False)
+
+    def invalidate(self):
+        """Forces a reload on the next access."""
+        with self._lock:
+            self._signature = None
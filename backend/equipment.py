@@ -0,0 +1,56 @@
+"""
+The PowerByte equipment catalogue, shared by the data generators, the mock
+sensor and the fleet generator.
+
+Each entry is keyed by the display name used in the UI and the sensor
+payloads:
+    wattage   rated power (W)
+    current   rated current at 220 V (A)
+    line      transmitter feeding it (TX1 / TX2)
+    on_hours  (start, end) daily ON window; end < start wraps past midnight
+    column    column prefix in the per-second offline-mode CSV
+    flag      activity flag it drives in the professional dataset
+"""
+
+CATALOGUE = {
+    "Heater": {
+        "wattage": 2000, "current": 9.09, "line": "TX1", "on_hours": (6, 22),
+        "column": "Heater", "flag": "heater_on",
+    },
+    "Bulb 100W": {
+        "wattage": 100, "current": 0.45, "line": "TX1", "on_hours": (18, 6),
+        "column": "Bulb_100W", "flag": "bulb_night_active",
+    },
+    "Bulb 60W": {
+        "wattage": 60, "current": 0.27, "line": "TX1", "on_hours": (19, 7),
+        "column": "Bulb_60W", "flag": "bulb_night_active",
+    },
+    "Motor DC 220V": {
+        "wattage": 1500, "current": 6.82, "line": "TX2", "on_hours": (8, 18),
+        "column": "Motor_DC_220V", "flag": "motor_active",
+    },
+    "Motor AC Induction 2HP": {
+        "wattage": 1492, "current": 6.78, "line": "TX2", "on_hours": (8, 17),
+        "column": "Motor_AC_2HP", "flag": "motor_active",
+    },
+    "RD_PC Power Consumption": {
+        "wattage": 220, "current": 1.00, "line": "TX2", "on_hours": (8, 20),
+        "column": "RD_PC", "flag": "pc_on",
+    },
+}
+
+# Activity flags of the professional dataset, in its column order
+FLAGS = ("pc_on", "bulb_night_active", "heater_on", "motor_active")
+
+
+def devices_on_line(line):
+    """{name: rated W} for the equipment fed by one transmitter."""
+    return {name: spec["wattage"] for name, spec in CATALOGUE.items() if spec["line"] == line}
+
+
+def is_on_mask(hour, on_hours):
+    """Boolean ON mask for an (on_start, on_end) window that may wrap midnight."""
+    on_start, on_end = on_hours
+    if on_start < on_end:
+        return (hour >= on_start) & (hour < on_end)
+    return (hour >= on_start) | (hour < on_end)
@@ -0,0 +1,61 @@
+"""
+Fast JSON encoding for large API responses.
+
+FastAPI's default path turns a returned payload into plain Python objects
+with jsonable_encoder (walking every row dict), then runs json.dumps on the
+result. Returning a FastJSONResponse skips that walk: the payload is
+serialized as is, by orjson (listed in requirements.txt).
+orjson writes NumPy arrays natively, so column-oriented payloads can carry
+array slices straight from the rollups without building Python lists.
+Without orjson the stdlib json module is used, with the same output but
+none of the speed-up; /metrics reports which one is active
+(powerbyte_json_backend).
+
+NaN inside NumPy arrays is written as null with either backend. Payloads
+should carry None rather than bare NaN floats, which orjson writes as null
+but json rejects, as Starlette's JSONResponse does.
+"""
+
+import json
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f":
+            return [None if v != v else v for v in value.tolist()]
+        return value.tolist()
+    if isinstance(value, np.generic):
+        value = value.item()
+        return None if isinstance(value, float) and value != value else value
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content):
+        """Serializes `content` (dicts, lists, scalars, NumPy arrays) to UTF-8 JSON bytes."""
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    def dumps(content):
+        """Serializes `content` (dicts, lists, scalars, NumPy arrays) to UTF-8 JSON bytes."""
+        return json.dumps(
+            content, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that serializes with dumps() and bypasses jsonable_encoder."""
+
+    def render(self, content):
+        return dumps(content)
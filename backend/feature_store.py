@@ -0,0 +1,233 @@
+"""
+In-memory per-meter time-series feature store for the prediction model.
+
+Each meter keeps a fixed-size ring buffer of hourly average power (kW), so
+memory per meter is bounded. Readings inside the current hour are averaged
+into an open bucket; when a newer hour arrives the bucket is closed into the
+ring. lag_1h / lag_24h / lag_7d are direct ring lookups and rolling_mean_4h
+comes from a running sum, so both updates and reads are O(1). The number of
+meters is capped too (POWERBYTE_MAX_METERS, see meter_table.py).
+"""
+
+import datetime
+import threading
+
+import pandas as pd
+
+import columnar_cache
+from meter_table import MeterTable
+
+DEFAULT_METER_ID = "default"
+
+# 8 days of hourly slots: enough for lag_7d plus a day of slack
+CAPACITY_HOURS = 8 * 24
+ROLLING_HOURS = 4
+
+
+def hour_index(timestamp):
+    """
+    Absolute hour number of a datetime, ISO string or Unix epoch seconds,
+    used as the ring clock.
+
+    Raises:
+        ValueError: If the string or epoch value is not a valid time.
+        TypeError: For any other type.
+    """
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        try:
+            timestamp = datetime.datetime.fromtimestamp(timestamp)
+        except (OverflowError, OSError) as e:
+            raise ValueError(f"Invalid epoch timestamp {timestamp!r}") from e
+    elif isinstance(timestamp, str):
+        timestamp = datetime.datetime.fromisoformat(timestamp)
+    elif not isinstance(timestamp, datetime.datetime):
+        raise TypeError(f"Unsupported timestamp type {type(timestamp).__name__}")
+    if timestamp.tzinfo is not None:
+        # Compare aware timestamps (e.g. the runner's UTC "Z") in server-local time
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return timestamp.toordinal() * 24 + timestamp.hour
+
+
+def _reading_hour(timestamp):
+    """hour_index() of a reading time; None or anything unparseable means now."""
+    try:
+        return hour_index(timestamp or datetime.datetime.now())
+    except (ValueError, TypeError):
+        return hour_index(datetime.datetime.now())
+
+
+class MeterSeries:
+    """Hourly ring buffer plus the open bucket for one meter."""
+
+    __slots__ = ("values", "head", "count", "rolling_sum",
+                 "current_hour", "bucket_sum", "bucket_count", "lock")
+
+    def __init__(self):
+        self.values = [0.0] * CAPACITY_HOURS
+        self.head = 0           # Slot the next closed hour is written to
+        self.count = 0          # Closed hours held, capped at CAPACITY_HOURS
+        self.rolling_sum = 0.0  # Sum of the last ROLLING_HOURS closed hours
+        self.current_hour = None
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+        self.lock = threading.Lock()
+
+    def _push(self, value):
+        if self.count >= ROLLING_HOURS:
+            self.rolling_sum -= self.values[(self.head - ROLLING_HOURS) % CAPACITY_HOURS]
+        self.rolling_sum += value
+        self.values[self.head] = value
+        self.head = (self.head + 1) % CAPACITY_HOURS
+        if self.count < CAPACITY_HOURS:
+            self.count += 1
+
+    def _reset(self):
+        self.head = 0
+        self.count = 0
+        self.rolling_sum = 0.0
+
+    def _advance(self, hour):
+        """Closes the open bucket and moves the clock forward to `hour`."""
+        steps = hour - self.current_hour
+        if steps > CAPACITY_HOURS:
+            # Silence longer than the window: old history is useless
+            self._reset()
+        else:
+            if self.bucket_count:
+                self._push(self.bucket_sum / self.bucket_count)
+                steps -= 1
+            if self.count:
+                # Carry the last known hour forward over hours without readings
+                last = self.values[(self.head - 1) % CAPACITY_HOURS]
+                for _ in range(steps):
+                    self._push(last)
+        self.current_hour = hour
+        self.bucket_sum = 0.0
+        self.bucket_count = 0
+
+    def observe(self, hour, power_kw):
+        """Adds one reading taken during absolute hour `hour`."""
+        with self.lock:
+            if self.current_hour is None:
+                self.current_hour = hour
+            elif hour > self.current_hour:
+                self._advance(hour)
+            # Late readings (hour < current_hour) are folded into the open bucket
+            self.bucket_sum += power_kw
+            self.bucket_count += 1
+
+    def advance(self, hour):
+        """Closes the open bucket if `hour` is later, without adding a reading."""
+        with self.lock:
+            if self.current_hour is not None and hour > self.current_hour:
+                self._advance(hour)
+
+    def _lag(self, hours, fallback):
+        if hours > self.count:
+            return fallback
+        return self.values[(self.head - hours) % CAPACITY_HOURS]
+
+    def features(self, fallback):
+        """Lag / rolling features for the open hour; `fallback` fills missing history."""
+        with self.lock:
+            if self.count >= ROLLING_HOURS:
+                rolling = self.rolling_sum / ROLLING_HOURS
+            elif self.count:
+                rolling = sum(self._lag(h, 0.0) for h in range(1, self.count + 1)) / self.count
+            else:
+                rolling = fallback
+            return {
+                "lag_1h": self._lag(1, fallback),
+                "lag_24h": self._lag(24, fallback),
+                "lag_7d": self._lag(24 * 7, fallback),
+                "rolling_mean_4h": rolling,
+            }
+
+
+class FeatureStore:
+    """Keyed collection of MeterSeries."""
+
+    def __init__(self, max_meters=None):
+        self._series = MeterTable(max_meters)
+
+    def _get_or_create(self, meter_id):
+        return self._series.get_or_create(meter_id, MeterSeries)
+
+    def __len__(self):
+        return len(self._series)
+
+    @property
+    def evicted(self):
+        return self._series.evicted
+
+    def observe(self, meter_id, timestamp, power_kw):
+        """
+        Records a reading.
+
+        Args:
+            meter_id (str): Meter / site identifier.
+            timestamp (datetime.datetime | str | float | None): Reading time
+                (epoch numbers are Unix seconds); None or anything unparseable
+                means now.
+            power_kw (float): Average active power of the reading in kW.
+        """
+        self._get_or_create(meter_id).observe(_reading_hour(timestamp), float(power_kw))
+
+    def advance(self, meter_id, timestamp):
+        """
+        Moves a meter's clock to the hour of `timestamp` (as in observe()), so
+        an hour that has ended counts as lag_1h, without recording a reading.
+        Repeating it is harmless, so it can run before a prediction that may
+        still be rejected.
+        """
+        series = self._series.get(meter_id)
+        if series is not None:
+            series.advance(_reading_hour(timestamp))
+
+    def features(self, meter_id, fallback):
+        """
+        Returns lag_1h, lag_24h, lag_7d and rolling_mean_4h for a meter.
+
+        Args:
+            meter_id (str): Meter / site identifier.
+            fallback (float): Value used where the meter has no history yet.
+        """
+        series = self._series.get(meter_id)
+        if series is None:
+            return {
+                "lag_1h": fallback,
+                "lag_24h": fallback,
+                "lag_7d": fallback,
+                "rolling_mean_4h": fallback,
+            }
+        return series.features(fallback)
+
+    def seed_from_csv(self, path, meter_id=DEFAULT_METER_ID, column="RX_kWh", align_to=None):
+        """
+        Pre-fills a meter's history from an hourly CSV (e.g. the 3-month TX/RX dataset).
+
+        Only the newest CAPACITY_HOURS rows are used. With `align_to`, the rows
+        are shifted so the last one lands on the hour before `align_to`, which
+        lets an old dataset provide lags for live readings.
+
+        Returns:
+            int: Number of hourly rows loaded.
+        """
+        df = columnar_cache.read_table(path, columns=["timestamp", column]).tail(CAPACITY_HOURS)
+        if df.empty:
+            return 0
+
+        hours = [hour_index(ts) for ts in pd.to_datetime(df["timestamp"])]
+        if align_to is not None:
+            shift = hour_index(align_to) - 1 - hours[-1]
+            hours = [h + shift for h in hours]
+
+        series = MeterSeries()
+        for hour, value in zip(hours, df[column].astype(float)):
+            series.observe(hour, value)
+        # Close the last seeded hour so it becomes lag_1h
+        with series.lock:
+            series._advance(hours[-1] + 1)
+
+        self._series.set(meter_id, series)
+        return len(df)
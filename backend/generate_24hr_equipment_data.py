@@ -1,171 +1,174 @@
 #!/usr/bin/env python3
 """
-Generate 24-hour per-second CSV data with individual equipment details
+Generate per-second CSV data with individual equipment details
 Creates: 24hr_per_second_offline_mode_with_equipment.csv
+
+Every column is computed for all rows at once with NumPy, drawing noise
+from a seeded numpy.random.Generator, so a 30-day run takes seconds.
+
+Usage:
+    python generate_24hr_equipment_data.py                         # 24 h, 1 s resolution
+    python generate_24hr_equipment_data.py --days 30 --resolution 5
+    python generate_24hr_equipment_data.py --equipment Heater RD_PC --seed 7
 """
 
-import pandas as pd
+import argparse
+import os
+import time
+
 import numpy as np
-from datetime import datetime, timedelta
+import pandas as pd
 
-# Set random seed for reproducibility
-np.random.seed(42)
+import dataset_pipeline
+from equipment import CATALOGUE, is_on_mask
 
-# Configuration
-TOTAL_SECONDS = 24 * 60 * 60  # 86,400 seconds
+SECONDS_PER_DAY = 24 * 60 * 60  # 86,400 seconds
 
-# Equipment specifications (in kWh equivalent)
+# Equipment specifications (in kWh equivalent); 'line' is the transmitter feeding it
 EQUIPMENT = {
-    'Heater': {'rated': 2.0, 'on_hours': (6, 22)},
-    'Bulb_100W': {'rated': 0.1, 'on_hours': (18, 6)},  # 18:00 to 06:00 next day
-    'Bulb_60W': {'rated': 0.06, 'on_hours': (19, 7)},  # 19:00 to 07:00 next day
-    'Motor_DC_220V': {'rated': 1.5, 'on_hours': (8, 18)},
-    'Motor_AC_2HP': {'rated': 1.492, 'on_hours': (8, 17)},
-    'RD_PC': {'rated': 0.22, 'on_hours': (8, 20)},
+    spec['column']: {'rated': spec['wattage'] / 1000, 'on_hours': spec['on_hours'], 'line': spec['line']}
+    for spec in CATALOGUE.values()
 }
 
-print("Generating 24-hour per-second data with equipment details...")
-print(f"Total records: {TOTAL_SECONDS}")
-
-# Generate time array
-times = [f"{h:02d}:{m:02d}:{s:02d}" for h in range(24) for m in range(60) for s in range(60)]
-
-# Initialize data dictionary
-data = {
-    'time': times,
-    'RX_kWh': [],
-    'TX1_kWh': [],
-    'TX2_kWh': [],
-    'Heater_kWh': [],
-    'Bulb_100W_kWh': [],
-    'Bulb_60W_kWh': [],
-    'Motor_DC_220V_kWh': [],
-    'Motor_AC_2HP_kWh': [],
-    'RD_PC_kWh': [],
-    'RX_CO_ppm': [],
-    'TX1_CO_ppm': [],
-    'TX2_CO_ppm': [],
-    'CO_status': [],
-    'load_status': [],
-    'deviation_percent': [],
-    'Heater_Status': [],
-    'Bulb_100W_Status': [],
-    'Bulb_60W_Status': [],
-    'Motor_DC_220V_Status': [],
-    'Motor_AC_2HP_Status': [],
-    'RD_PC_Status': [],
-    'Heater_Usage_Percent': [],
-    'Bulb_100W_Usage_Percent': [],
-    'Bulb_60W_Usage_Percent': [],
-    'Motor_DC_220V_Usage_Percent': [],
-    'Motor_AC_2HP_Usage_Percent': [],
-    'RD_PC_Usage_Percent': [],
-}
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              '24hr_per_second_offline_mode_with_equipment.csv')
+
+
+def column_order(equipment_names):
+    """CSV columns in the offline-mode schema for the given equipment."""
+    return (
+        ['time', 'RX_kWh', 'TX1_kWh', 'TX2_kWh']
+        + [f'{name}_kWh' for name in equipment_names]
+        + ['RX_CO_ppm', 'TX1_CO_ppm', 'TX2_CO_ppm', 'CO_status', 'load_status', 'deviation_percent']
+        + [f'{name}_Status' for name in equipment_names]
+        + [f'{name}_Usage_Percent' for name in equipment_names]
+    )
+
+
+def generate(seconds, rng, equipment=None):
+    """
+    Builds the offline-mode table for a block of consecutive seconds.
+
+    Args:
+        seconds (np.ndarray): Seconds since the start of the run, one per row.
+        rng (np.random.Generator): Noise source.
+        equipment (dict, optional): Subset of EQUIPMENT; defaults to all of it.
+
+    Returns:
+        pd.DataFrame: One row per entry of `seconds`, columns per column_order().
+    """
+    equipment = equipment or EQUIPMENT
+    n = len(seconds)
+    second_of_day = seconds % SECONDS_PER_DAY
+    hour = second_of_day // 3600
+
+    # Daily pattern
+    hour_factor = np.clip(0.5 + 0.5 * np.sin((hour - 6) * np.pi / 12), 0.3, 1.2)
+
+    data = {'time': _time_labels()[second_of_day]}
+
+    line_totals = {'TX1': np.zeros(n), 'TX2': np.zeros(n)}
+    consumption, status, usage = {}, {}, {}
+    for name, spec in equipment.items():
+        on = is_on_mask(hour, spec['on_hours'])
+        base = spec['rated'] * 0.4 * hour_factor
+        noisy = np.maximum(0.01, base + rng.standard_normal(n) * (base * 0.1))
+        value = np.where(on, noisy, spec['rated'] * 0.01)  # Standby when OFF
+        consumption[name] = value
+        status[name] = np.where(on, 'ON', 'OFF')
+        usage[name] = np.clip(value / spec['rated'] * 100, 0, 100).round(1)
+        line_totals[spec['line']] += value
+
+    tx1, tx2 = line_totals['TX1'], line_totals['TX2']
+    rx = tx1 + tx2
+    total_tx = tx1 + tx2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = np.where(total_tx > 0, (rx - total_tx) / total_tx * 100, 0.0)
 
-# Generate data for each second
-for i in range(TOTAL_SECONDS):
-    hour = i // 3600
-    minute = (i % 3600) // 60
-    second = i % 60
-    
-    # Calculate hour factor (daily pattern)
-    hour_factor = 0.5 + 0.5 * np.sin((hour - 6) * np.pi / 12)
-    hour_factor = np.clip(hour_factor, 0.3, 1.2)
-    
-    # Generate equipment consumption
-    equipment_data = {}
-    for eq_name, eq_spec in EQUIPMENT.items():
-        on_start, on_end = eq_spec['on_hours']
-        
-        # Check if equipment is ON
-        if on_start < on_end:
-            is_on = on_start <= hour < on_end
-        else:  # Wraps around midnight
-            is_on = hour >= on_start or hour < on_end
-        
-        # Calculate consumption
-        if is_on:
-            base_consumption = eq_spec['rated'] * 0.4 * hour_factor
-            noise = np.random.normal(0, base_consumption * 0.1)
-            consumption = max(0.01, base_consumption + noise)
-        else:
-            consumption = eq_spec['rated'] * 0.01  # Standby
-        
-        equipment_data[eq_name] = {
-            'consumption': consumption,
-            'status': 'ON' if is_on else 'OFF',
-            'usage_percent': (consumption / eq_spec['rated']) * 100
-        }
-    
-    # Aggregate TX1 and TX2
-    tx1_consumption = (equipment_data['Heater']['consumption'] + 
-                       equipment_data['Bulb_100W']['consumption'] + 
-                       equipment_data['Bulb_60W']['consumption'])
-    
-    tx2_consumption = (equipment_data['Motor_DC_220V']['consumption'] + 
-                       equipment_data['Motor_AC_2HP']['consumption'] + 
-                       equipment_data['RD_PC']['consumption'])
-    
-    rx_consumption = tx1_consumption + tx2_consumption
-    
-    # Calculate deviation
-    total_tx = tx1_consumption + tx2_consumption
-    deviation = ((rx_consumption - total_tx) / total_tx * 100) if total_tx > 0 else 0
-    
     # CO levels
-    rx_co = 40 + hour_factor * 20 + np.random.normal(0, 2)
-    tx1_co = 45 + hour_factor * 20 + np.random.normal(0, 2)
-    tx2_co = 42 + hour_factor * 20 + np.random.normal(0, 2)
-    
-    # Status
-    co_status = "Normal" if rx_co < 100 else "High"
-    load_status = "Normal" if rx_consumption < 4 else "High"
-    
-    # Append to data
-    data['RX_kWh'].append(round(rx_consumption, 2))
-    data['TX1_kWh'].append(round(tx1_consumption, 2))
-    data['TX2_kWh'].append(round(tx2_consumption, 2))
-    data['Heater_kWh'].append(round(equipment_data['Heater']['consumption'], 2))
-    data['Bulb_100W_kWh'].append(round(equipment_data['Bulb_100W']['consumption'], 2))
-    data['Bulb_60W_kWh'].append(round(equipment_data['Bulb_60W']['consumption'], 2))
-    data['Motor_DC_220V_kWh'].append(round(equipment_data['Motor_DC_220V']['consumption'], 2))
-    data['Motor_AC_2HP_kWh'].append(round(equipment_data['Motor_AC_2HP']['consumption'], 2))
-    data['RD_PC_kWh'].append(round(equipment_data['RD_PC']['consumption'], 2))
-    data['RX_CO_ppm'].append(round(rx_co, 1))
-    data['TX1_CO_ppm'].append(round(tx1_co, 1))
-    data['TX2_CO_ppm'].append(round(tx2_co, 1))
-    data['CO_status'].append(co_status)
-    data['load_status'].append(load_status)
-    data['deviation_percent'].append(round(deviation, 2))
-    data['Heater_Status'].append(equipment_data['Heater']['status'])
-    data['Bulb_100W_Status'].append(equipment_data['Bulb_100W']['status'])
-    data['Bulb_60W_Status'].append(equipment_data['Bulb_60W']['status'])
-    data['Motor_DC_220V_Status'].append(equipment_data['Motor_DC_220V']['status'])
-    data['Motor_AC_2HP_Status'].append(equipment_data['Motor_AC_2HP']['status'])
-    data['RD_PC_Status'].append(equipment_data['RD_PC']['status'])
-    data['Heater_Usage_Percent'].append(round(np.clip(equipment_data['Heater']['usage_percent'], 0, 100), 1))
-    data['Bulb_100W_Usage_Percent'].append(round(np.clip(equipment_data['Bulb_100W']['usage_percent'], 0, 100), 1))
-    data['Bulb_60W_Usage_Percent'].append(round(np.clip(equipment_data['Bulb_60W']['usage_percent'], 0, 100), 1))
-    data['Motor_DC_220V_Usage_Percent'].append(round(np.clip(equipment_data['Motor_DC_220V']['usage_percent'], 0, 100), 1))
-    data['Motor_AC_2HP_Usage_Percent'].append(round(np.clip(equipment_data['Motor_AC_2HP']['usage_percent'], 0, 100), 1))
-    data['RD_PC_Usage_Percent'].append(round(np.clip(equipment_data['RD_PC']['usage_percent'], 0, 100), 1))
-
-# Create DataFrame
-df = pd.DataFrame(data)
-
-# Save to CSV
-output_file = 'backend/24hr_per_second_offline_mode_with_equipment.csv'
-df.to_csv(output_file, index=False)
-
-print(f"\n✓ Generated {len(df)} records")
-print(f"✓ Saved to: {output_file}")
-print(f"\nSample data (first 5 rows):")
-print(df.head(5))
-print(f"\nSample data (noon - 12:00:00):")
-print(df.iloc[43200:43205])
-print(f"\nFile statistics:")
-print(f"- Total rows: {len(df)}")
-print(f"- Time range: {df['time'].iloc[0]} to {df['time'].iloc[-1]}")
-print(f"- RX Power range: {df['RX_kWh'].min():.2f} to {df['RX_kWh'].max():.2f} kWh")
-print(f"- CO levels range: {df['RX_CO_ppm'].min():.1f} to {df['RX_CO_ppm'].max():.1f} ppm")
-print(f"\n✓ CSV file ready for use!")
+    rx_co = 40 + hour_factor * 20 + rng.normal(0, 2, n)
+    tx1_co = 45 + hour_factor * 20 + rng.normal(0, 2, n)
+    tx2_co = 42 + hour_factor * 20 + rng.normal(0, 2, n)
+
+    data['RX_kWh'] = rx.round(2)
+    data['TX1_kWh'] = tx1.round(2)
+    data['TX2_kWh'] = tx2.round(2)
+    for name in equipment:
+        data[f'{name}_kWh'] = consumption[name].round(2)
+    data['RX_CO_ppm'] = rx_co.round(1)
+    data['TX1_CO_ppm'] = tx1_co.round(1)
+    data['TX2_CO_ppm'] = tx2_co.round(1)
+    data['CO_status'] = np.where(rx_co < 100, 'Normal', 'High')
+    data['load_status'] = np.where(rx < 4, 'Normal', 'High')
+    data['deviation_percent'] = deviation.round(2)
+    for name in equipment:
+        data[f'{name}_Status'] = status[name]
+    for name in equipment:
+        data[f'{name}_Usage_Percent'] = usage[name]
+
+    return pd.DataFrame(data, columns=column_order(list(equipment)))
+
+
+_TIME_LABELS = None
+
+
+def _time_labels():
+    """All 86,400 HH:MM:SS labels, built once; indexing it formats a whole column."""
+    global _TIME_LABELS
+    if _TIME_LABELS is None:
+        s = np.arange(SECONDS_PER_DAY)
+        _TIME_LABELS = np.array([
+            f"{h:02d}:{m:02d}:{sec:02d}" for h, m, sec in zip(s // 3600, (s % 3600) // 60, s % 60)
+        ])
+    return _TIME_LABELS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate per-second offline-mode equipment data')
+    parser.add_argument('--days', type=float, default=1.0, help='Duration in days (default: 1)')
+    parser.add_argument('--resolution', type=int, default=1, help='Seconds between rows (default: 1)')
+    parser.add_argument('--equipment', nargs='+', choices=list(EQUIPMENT), default=list(EQUIPMENT),
+                        help='Equipment to include (default: all)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Output CSV path')
+    args = parser.parse_args(argv)
+    dataset_pipeline.check_positive(parser, args, 'days', 'resolution')
+    if args.days * SECONDS_PER_DAY < args.resolution:
+        parser.error('--days must cover at least one --resolution step')
+    return args
+
+
+def main():
+    args = parse_args()
+    total_seconds = int(args.days * SECONDS_PER_DAY)
+    seconds = np.arange(0, total_seconds, args.resolution)
+    equipment = {name: EQUIPMENT[name] for name in args.equipment}
+
+    print("Generating per-second data with equipment details...")
+    print(f"Total records: {len(seconds)}")
+
+    start = time.perf_counter()
+    df = generate(seconds, np.random.default_rng(args.seed), equipment=equipment)
+    generated = time.perf_counter() - start
+
+    df.to_csv(args.output, index=False)
+    written = time.perf_counter() - start - generated
+
+    print(f"\n✓ Generated {len(df)} records in {generated:.2f}s (CSV write {written:.2f}s)")
+    print(f"✓ Saved to: {args.output}")
+    print(f"\nSample data (first 5 rows):")
+    print(df.head(5))
+    if len(df) > 43200 // args.resolution + 5:
+        noon = 43200 // args.resolution
+        print(f"\nSample data (noon - 12:00:00):")
+        print(df.iloc[noon:noon + 5])
+    print(f"\nFile statistics:")
+    print(f"- Total rows: {len(df)}")
+    print(f"- Time range: {df['time'].iloc[0]} to {df['time'].iloc[-1]}")
+    print(f"- RX Power range: {df['RX_kWh'].min():.2f} to {df['RX_kWh'].max():.2f} kWh")
+    print(f"- CO levels range: {df['RX_CO_ppm'].min():.1f} to {df['RX_CO_ppm'].max():.1f} ppm")
+    print(f"\n✓ CSV file ready for use!")
+
+
+if __name__ == '__main__':
+    main()
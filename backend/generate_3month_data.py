@@ -2,177 +2,195 @@
 """
 Generate 3-month energy and air quality dataset with TX1, TX2, RX readings and MQ-7 CO ppm levels.
 
-This script generates realistic hourly data for:
+This script generates realistic data for:
 - Energy consumption (TX1, TX2, RX in kWh)
 - Energy deviation (±2.5% tolerance)
 - Load status (underload/normal/overload)
 - Carbon Monoxide levels (TX1, TX2, RX in ppm)
 - Air quality status (Low/Moderate/High)
 
+Rows are generated and written in fixed-size chunks (see dataset_pipeline),
+so memory stays flat however long the range or fine the resolution. Several
+meters can be generated in parallel, each from its own seeded stream.
+
 Usage:
     python generate_3month_data.py --output 3_month_TX1_TX2_RX_with_MQ7_ppm.csv
+    python generate_3month_data.py --days 365 --resolution 1 --meters 24 --workers 8 --format columnar
 """
 
-import csv
-import random
-from datetime import datetime, timedelta
 import argparse
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import dataset_pipeline
+
+FIELDNAMES = [
+    'timestamp', 'date', 'hourly_slot', 'TX1_kWh', 'TX2_kWh', 'RX_kWh',
+    'deviation_percent', 'load_status', 'TX1_CO_ppm', 'TX2_CO_ppm', 'RX_CO_ppm', 'CO_status'
+]
 
+HOURLY_SLOTS = [f"{hour:02d}:00-{hour:02d}:59" for hour in range(24)]
 
-def generate_hourly_energy():
-    """Generate realistic hourly energy consumption values."""
-    hour = datetime.now().hour
-    
-    # Daily pattern: low at night, peak during day
-    if 0 <= hour < 6:
-        base = random.uniform(0.68, 1.08)  # Underload
-    elif 6 <= hour < 10:
-        base = random.uniform(1.25, 1.92)  # Ramp up
-    elif 10 <= hour < 20:
-        base = random.uniform(1.95, 2.35)  # Peak
-    else:
-        base = random.uniform(1.55, 1.98)  # Evening decline
-    
-    return base
+
+def _hourly_bands(bands):
+    """Per-hour (low, high) lookup arrays from [(end_hour, low, high), ...]."""
+    low, high = np.empty(24), np.empty(24)
+    start = 0
+    for end, lo, hi in bands:
+        low[start:end], high[start:end] = lo, hi
+        start = end
+    return low, high
+
+
+# Daily pattern: low at night, peak during day
+ENERGY_LOW, ENERGY_HIGH = _hourly_bands([
+    (6, 0.68, 1.08),    # Underload
+    (10, 1.25, 1.92),   # Ramp up
+    (20, 1.95, 2.35),   # Peak
+    (24, 1.55, 1.98),   # Evening decline
+])
+
+# CO levels correlate with activity and heating/cooking
+CO_LOW, CO_HIGH = _hourly_bands([
+    (6, 40, 80),        # Low at night
+    (10, 50, 100),      # Morning activity
+    (20, 100, 180),     # Peak activity
+    (24, 80, 130),      # Evening
+])
 
 
 def calculate_deviation(rx, tx1, tx2):
     """Calculate energy deviation percentage."""
     total_tx = tx1 + tx2
-    if total_tx == 0:
-        return 0.0
-    deviation = ((rx - total_tx) / total_tx) * 100
-    return round(deviation, 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = np.where(total_tx == 0, 0.0, (rx - total_tx) / total_tx * 100)
+    return deviation.round(2)
 
 
 def get_load_status(rx_value):
     """Classify load status based on RX consumption."""
-    if rx_value < 2.0:
-        return "underload"
-    elif rx_value > 4.0:
-        return "overload"
-    else:
-        return "normal"
-
-
-def generate_co_levels(hour):
-    """Generate realistic CO ppm levels based on time of day."""
-    # CO levels correlate with activity and heating/cooking
-    if 0 <= hour < 6:
-        base = random.uniform(40, 80)  # Low at night
-    elif 6 <= hour < 10:
-        base = random.uniform(50, 100)  # Morning activity
-    elif 10 <= hour < 20:
-        base = random.uniform(100, 180)  # Peak activity
-    else:
-        base = random.uniform(80, 130)  # Evening
-    
-    return base
+    return np.select([rx_value < 2.0, rx_value > 4.0], ["underload", "overload"], "normal")
 
 
 def get_co_status(co_ppm):
     """Classify air quality based on CO ppm levels."""
-    if co_ppm < 80:
-        return "Low"
-    elif co_ppm < 150:
-        return "Moderate"
-    else:
-        return "High"
-
-
-def generate_dataset(start_date, num_days, output_file):
-    """Generate 3-month dataset with hourly entries."""
-    
-    print(f"Generating {num_days} days of hourly data...")
+    return np.select([co_ppm < 80, co_ppm < 150], ["Low", "Moderate"], "High")
+
+
+def generate_chunk(timestamps, rng):
+    """
+    Builds the dataset rows for a block of timestamps.
+
+    Args:
+        timestamps (np.ndarray): datetime64 timestamps, one per row.
+        rng (np.random.Generator): Noise source.
+
+    Returns:
+        pd.DataFrame: Columns per FIELDNAMES.
+    """
+    n = len(timestamps)
+    hour = dataset_pipeline.hour_of_day(timestamps)
+    low, high = ENERGY_LOW[hour], ENERGY_HIGH[hour]
+
+    # Generate energy values
+    tx1_kwh = rng.uniform(low, high).round(2)
+    tx2_kwh = (rng.uniform(low, high) * rng.uniform(0.95, 1.05, n)).round(2)
+
+    # RX should be approximately TX1 + TX2 with ±2.5% deviation
+    rx_kwh = ((tx1_kwh + tx2_kwh) * (1 + rng.uniform(-0.025, 0.025, n))).round(2)
+
+    # Generate CO levels
+    co_low, co_high = CO_LOW[hour], CO_HIGH[hour]
+    tx1_co = (rng.uniform(co_low, co_high) * rng.uniform(0.95, 1.05, n)).round(0)
+    tx2_co = (rng.uniform(co_low, co_high) * rng.uniform(0.95, 1.05, n)).round(0)
+    rx_co = ((tx1_co + tx2_co) / 2).round(0)
+
+    return pd.DataFrame({
+        'timestamp': timestamps,
+        'date': dataset_pipeline.date_labels(timestamps),
+        'hourly_slot': pd.Categorical.from_codes(hour, categories=HOURLY_SLOTS),
+        'TX1_kWh': tx1_kwh,
+        'TX2_kWh': tx2_kwh,
+        'RX_kWh': rx_kwh,
+        'deviation_percent': calculate_deviation(rx_kwh, tx1_kwh, tx2_kwh),
+        'load_status': get_load_status(rx_kwh),
+        'TX1_CO_ppm': tx1_co.astype(np.int64),
+        'TX2_CO_ppm': tx2_co.astype(np.int64),
+        'RX_CO_ppm': rx_co.astype(np.int64),
+        'CO_status': get_co_status(rx_co),
+    }, columns=FIELDNAMES)
+
+
+def generate_meter(task):
+    """
+    Generates and writes one meter's dataset chunk by chunk.
+
+    Args:
+        task (dict): start, rows, resolution, seed, index, output, format, chunk_rows.
+
+    Returns:
+        dict: Running statistics for the summary printout.
+    """
+    rng = dataset_pipeline.meter_rng(task['seed'], task['index'])
+    sink = dataset_pipeline.open_sink(task['output'], task['format'], task['rows'])
+    stats = {'output': task['output'], 'rows': 0, 'rx_min': np.inf, 'rx_max': -np.inf, 'rx_sum': 0.0,
+             'co_min': np.inf, 'co_max': -np.inf, 'co_sum': 0.0, 'load_counts': {}}
+
+    blocks = dataset_pipeline.time_blocks(task['start'], task['rows'], task['resolution'], task['chunk_rows'])
+    for timestamps in blocks:
+        chunk = generate_chunk(timestamps, rng)
+        sink.write(chunk)
+
+        rx, co = chunk['RX_kWh'], chunk['RX_CO_ppm']
+        stats['rows'] += len(chunk)
+        stats['rx_min'] = min(stats['rx_min'], rx.min())
+        stats['rx_max'] = max(stats['rx_max'], rx.max())
+        stats['rx_sum'] += rx.sum()
+        stats['co_min'] = min(stats['co_min'], co.min())
+        stats['co_max'] = max(stats['co_max'], co.max())
+        stats['co_sum'] += co.sum()
+        for status, count in chunk['load_status'].value_counts().items():
+            stats['load_counts'][status] = stats['load_counts'].get(status, 0) + int(count)
+    sink.close()
+    return stats
+
+
+def generate_dataset(start_date, num_days, output_file, resolution=3600, meters=1, workers=1,
+                     seed=42, fmt='csv', chunk_rows=dataset_pipeline.DEFAULT_CHUNK_ROWS):
+    """Generate the dataset for `meters` meters, one output per meter."""
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = start + timedelta(days=num_days) - timedelta(seconds=resolution)
+    rows = dataset_pipeline.row_count(start, end, resolution)
+
+    print(f"Generating {num_days} days of data every {resolution}s for {meters} meter(s)...")
     print(f"Start date: {start_date}")
-    print(f"Output file: {output_file}")
-    
-    rows = []
-    current_date = datetime.strptime(start_date, "%Y-%m-%d")
-    
-    for day in range(num_days):
-        for hour in range(24):
-            timestamp = current_date + timedelta(hours=hour)
-            
-            # Generate energy values
-            tx1_kwh = round(generate_hourly_energy(), 2)
-            tx2_kwh = round(generate_hourly_energy() * random.uniform(0.95, 1.05), 2)
-            
-            # RX should be approximately TX1 + TX2 with ±2.5% deviation
-            expected_rx = tx1_kwh + tx2_kwh
-            deviation_factor = random.uniform(-0.025, 0.025)
-            rx_kwh = round(expected_rx * (1 + deviation_factor), 2)
-            
-            # Calculate actual deviation
-            deviation_percent = calculate_deviation(rx_kwh, tx1_kwh, tx2_kwh)
-            
-            # Get load status
-            load_status = get_load_status(rx_kwh)
-            
-            # Generate CO levels
-            tx1_co = round(generate_co_levels(hour) * random.uniform(0.95, 1.05), 0)
-            tx2_co = round(generate_co_levels(hour) * random.uniform(0.95, 1.05), 0)
-            rx_co = round((tx1_co + tx2_co) / 2, 0)
-            
-            # Get CO status
-            co_status = get_co_status(rx_co)
-            
-            # Format hourly slot
-            hourly_slot = f"{hour:02d}:00-{hour:02d}:59"
-            
-            row = {
-                'timestamp': timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                'date': timestamp.strftime("%Y-%m-%d"),
-                'hourly_slot': hourly_slot,
-                'TX1_kWh': tx1_kwh,
-                'TX2_kWh': tx2_kwh,
-                'RX_kWh': rx_kwh,
-                'deviation_percent': deviation_percent,
-                'load_status': load_status,
-                'TX1_CO_ppm': int(tx1_co),
-                'TX2_CO_ppm': int(tx2_co),
-                'RX_CO_ppm': int(rx_co),
-                'CO_status': co_status,
-            }
-            rows.append(row)
-        
-        current_date += timedelta(days=1)
-        if (day + 1) % 30 == 0:
-            print(f"  Generated {day + 1} days...")
-    
-    # Write to CSV
-    fieldnames = [
-        'timestamp', 'date', 'hourly_slot', 'TX1_kWh', 'TX2_kWh', 'RX_kWh',
-        'deviation_percent', 'load_status', 'TX1_CO_ppm', 'TX2_CO_ppm', 'RX_CO_ppm', 'CO_status'
-    ]
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
-    
-    print(f"\n✓ Dataset generated successfully!")
-    print(f"  Total records: {len(rows)}")
-    print(f"  File size: {len(rows)} rows")
-    print(f"  Date range: {rows[0]['date']} to {rows[-1]['date']}")
-    
-    # Print statistics
-    rx_values = [float(row['RX_kWh']) for row in rows]
-    co_values = [float(row['RX_CO_ppm']) for row in rows]
-    
-    print(f"\nData Statistics:")
-    print(f"  RX Energy - Min: {min(rx_values):.2f} kWh, Max: {max(rx_values):.2f} kWh, Avg: {sum(rx_values)/len(rx_values):.2f} kWh")
-    print(f"  CO Levels - Min: {min(co_values):.0f} ppm, Max: {max(co_values):.0f} ppm, Avg: {sum(co_values)/len(co_values):.0f} ppm")
-    
-    load_counts = {}
-    for row in rows:
-        status = row['load_status']
-        load_counts[status] = load_counts.get(status, 0) + 1
-    
-    print(f"\nLoad Status Distribution:")
-    for status, count in sorted(load_counts.items()):
-        percentage = (count / len(rows)) * 100
-        print(f"  {status}: {count} ({percentage:.1f}%)")
+    print(f"Rows per meter: {rows:,} in chunks of {chunk_rows:,}")
+
+    ids = dataset_pipeline.meter_ids(meters)
+    tasks = [{
+        'start': start, 'rows': rows, 'resolution': resolution, 'seed': seed, 'index': index,
+        'output': dataset_pipeline.meter_output(output_file, meter_id, meters),
+        'format': fmt, 'chunk_rows': chunk_rows,
+    } for index, meter_id in enumerate(ids)]
+
+    began = time.perf_counter()
+    results = dataset_pipeline.run_meters(generate_meter, tasks, workers)
+    elapsed = time.perf_counter() - began
+
+    print(f"\n✓ Dataset generated successfully in {elapsed:.1f}s!")
+    print(f"  Date range: {start.strftime('%Y-%m-%d')} to {end.strftime('%Y-%m-%d')}")
+    for meter_id, stats in zip(ids, results):
+        print(f"\n{meter_id}: {stats['rows']:,} records → {stats['output']}")
+        print(f"  RX Energy - Min: {stats['rx_min']:.2f} kWh, Max: {stats['rx_max']:.2f} kWh, "
+              f"Avg: {stats['rx_sum'] / stats['rows']:.2f} kWh")
+        print(f"  CO Levels - Min: {stats['co_min']:.0f} ppm, Max: {stats['co_max']:.0f} ppm, "
+              f"Avg: {stats['co_sum'] / stats['rows']:.0f} ppm")
+        print(f"  Load Status Distribution:")
+        for status, count in sorted(stats['load_counts'].items()):
+            print(f"    {status}: {count} ({count / stats['rows'] * 100:.1f}%)")
 
 
 def main():
@@ -182,7 +200,7 @@ def main():
     parser.add_argument(
         '--output',
         default='3_month_TX1_TX2_RX_with_MQ7_ppm.csv',
-        help='Output CSV file path'
+        help='Output path (CSV file, or directory for --format columnar); suffixed per meter'
     )
     parser.add_argument(
         '--start-date',
@@ -195,10 +213,20 @@ def main():
         default=90,
         help='Number of days to generate (default: 90 for 3 months)'
     )
-    
+    parser.add_argument('--resolution', type=int, default=3600, help='Seconds between rows (default: 3600)')
+    parser.add_argument('--meters', type=int, default=1, help='Number of meters (default: 1)')
+    parser.add_argument('--workers', type=int, default=1, help='Processes generating meters in parallel')
+    parser.add_argument('--seed', type=int, default=42, help='Base random seed (default: 42)')
+    parser.add_argument('--format', choices=dataset_pipeline.FORMATS, default='csv', help='Output format')
+    parser.add_argument('--chunk-rows', type=int, default=dataset_pipeline.DEFAULT_CHUNK_ROWS,
+                        help='Rows generated and written per chunk')
+
     args = parser.parse_args()
-    
-    generate_dataset(args.start_date, args.days, args.output)
+    dataset_pipeline.check_positive(parser, args, 'days', 'resolution', 'meters', 'workers', 'chunk_rows')
+
+    generate_dataset(args.start_date, args.days, args.output, resolution=args.resolution,
+                     meters=args.meters, workers=args.workers, seed=args.seed, fmt=args.format,
+                     chunk_rows=args.chunk_rows)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic fleet of PowerByte sites from a scenario file.
+
+Each site gets an equipment mix drawn from the scenario's profiles (counts
+of catalogue devices from equipment.py) and a schedule shifted by up to an
+hour. Sites are sharded across a process pool. Each one writes its own
+partition in the same schemas the backend reads:
+
+    <output>/<scenario name>/
+        manifest.json                                  sites, mixes, seeds, row counts
+        site=site_0001/
+            professional_3_month_energy_dataset.csv   /api/historical/*, backfill.py
+            3_month_TX1_TX2_RX_with_MQ7_ppm.csv       TX/RX feature seeding
+            anomalies.csv                              injected anomalies (ground truth)
+        site=site_0002/
+        ...
+
+Point the API at one site with POWERBYTE_DATA_DIR=<...>/site=site_0001. Sites
+are always written as CSV, under the names the API resolves; the API builds
+its columnar cache from those on first load.
+
+Injected anomalies are either a consumption spike (every meter reads 1.5–3×)
+or an unmetered loss (RX exceeds TX1 + TX2 by 5–20%).
+
+Usage:
+    python generate_fleet.py scenarios/fleet_demo.json
+    python generate_fleet.py scenarios/fleet_demo.json --workers 8 --output /data/fleets
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import dataset_pipeline
+from equipment import CATALOGUE, FLAGS, is_on_mask
+from generate_3month_data import (
+    CO_HIGH, CO_LOW, HOURLY_SLOTS, calculate_deviation, get_co_status, get_load_status,
+)
+from timeseries_store import ELECTRICITY_RATE_INR, LOW_USAGE_KWH
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DATASETS = {
+    "professional": "professional_3_month_energy_dataset.csv",
+    "tx_rx": "3_month_TX1_TX2_RX_with_MQ7_ppm.csv",
+}
+
+SCENARIO_DEFAULTS = {
+    "name": "fleet",
+    "sites": 10,
+    "start": "2025-11-18",
+    "days": 90,
+    "resolution_seconds": 3600,
+    "seed": 42,
+    "anomaly_rate": 0.0,
+    "datasets": list(DATASETS),
+    "format": "csv",  # The only one the API can serve a site from
+    "workers": 1,
+    "chunk_rows": dataset_pipeline.DEFAULT_CHUNK_ROWS,
+    "equipment_mix": [{"weight": 1.0, "equipment": {name: 1 for name in CATALOGUE}}],
+}
+
+# Share of an installed unit's ON window it is actually running
+DUTY_CYCLE = 0.9
+# Always-on base load (router, fridge standby, ...) in kW
+STANDBY_KW = 0.02
+
+
+def load_scenario(path):
+    """
+    Reads a scenario JSON file and fills in defaults.
+
+    Raises:
+        ValueError: On unknown keys, datasets, formats or equipment names.
+    """
+    with open(path, encoding="utf-8") as f:
+        scenario = json.load(f)
+    unknown = set(scenario) - set(SCENARIO_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown scenario keys: {sorted(unknown)}")
+    scenario = {**SCENARIO_DEFAULTS, **scenario}
+
+    if scenario["format"] != "csv":
+        # POWERBYTE_DATA_DIR only resolves the CSV names in DATASETS, so a
+        # columnar site could not be served
+        raise ValueError("format must be 'csv': a fleet site is served from its CSVs")
+    for name in scenario["datasets"]:
+        if name not in DATASETS:
+            raise ValueError(f"Unknown dataset {name!r}; expected some of {list(DATASETS)}")
+    if not 0 <= scenario["anomaly_rate"] <= 1:
+        raise ValueError("anomaly_rate must be between 0 and 1")
+    if not scenario["equipment_mix"]:
+        raise ValueError("equipment_mix needs at least one profile")
+    for profile in scenario["equipment_mix"]:
+        for name in profile["equipment"]:
+            if name not in CATALOGUE:
+                raise ValueError(f"Unknown equipment {name!r}; expected some of {list(CATALOGUE)}")
+    return scenario
+
+
+def site_ids(count):
+    return [f"site_{i + 1:04d}" for i in range(count)]
+
+
+def generate_chunk(timestamps, rng, site, step_hours, anomaly_rate):
+    """
+    Builds one block of a site's rows in every dataset layout.
+
+    Returns:
+        dict: {"professional": df, "tx_rx": df, "anomalies": df}.
+    """
+    n = len(timestamps)
+    hour = dataset_pipeline.hour_of_day(timestamps)
+    # Monday = 0, like datetime.weekday(); 1970-01-01 was a Thursday
+    weekday = (timestamps.astype("datetime64[D]").astype(np.int64) + 3) % 7
+    local_hour = (hour - site["shift"]) % 24
+
+    line_kwh = {"TX1": np.zeros(n), "TX2": np.zeros(n)}
+    flags = {flag: np.zeros(n, dtype=bool) for flag in FLAGS}
+    for name, count in site["equipment"].items():
+        spec = CATALOGUE[name]
+        running = rng.binomial(count, DUTY_CYCLE, n) * is_on_mask(local_hour, spec["on_hours"])
+        load = rng.uniform(0.85, 1.0, n)
+        line_kwh[spec["line"]] += running * spec["wattage"] * load / 1000.0 * step_hours
+        flags[spec["flag"]] |= running > 0
+    standby = STANDBY_KW * step_hours / 2
+    tx1 = line_kwh["TX1"] + standby
+    tx2 = line_kwh["TX2"] + standby
+
+    # RX is TX1 + TX2 within the ±2.5% metering tolerance...
+    rx = (tx1 + tx2) * (1 + rng.uniform(-0.025, 0.025, n))
+
+    # ...except where an anomaly is injected
+    anomalous = rng.random(n) < anomaly_rate
+    is_spike = rng.random(n) < 0.5
+    spike = anomalous & is_spike
+    loss = anomalous & ~is_spike
+    factor = np.where(spike, rng.uniform(1.5, 3.0, n), np.where(loss, rng.uniform(1.05, 1.20, n), 1.0))
+    tx1 = np.where(spike, tx1 * factor, tx1)
+    tx2 = np.where(spike, tx2 * factor, tx2)
+    rx = rx * factor
+
+    tx1, tx2, rx = tx1.round(2), tx2.round(2), rx.round(2)
+    energy_kwh = rx.round(3)
+    slots = pd.Categorical.from_codes(hour, categories=HOURLY_SLOTS)
+    dates = dataset_pipeline.date_labels(timestamps)
+
+    professional = pd.DataFrame({
+        "timestamp": timestamps,
+        "date": dates,
+        "time_slot": slots,
+        "weekday": weekday,
+        **{flag: flags[flag].astype(np.int64) for flag in FLAGS},
+        "energy_kwh": energy_kwh,
+        "cost_rs": (energy_kwh * ELECTRICITY_RATE_INR).round(2),
+        "status": np.where(energy_kwh < LOW_USAGE_KWH * step_hours, "low_usage", "normal"),
+    })
+
+    co_low, co_high = CO_LOW[hour], CO_HIGH[hour]
+    tx1_co = (rng.uniform(co_low, co_high) * rng.uniform(0.95, 1.05, n)).round(0)
+    tx2_co = (rng.uniform(co_low, co_high) * rng.uniform(0.95, 1.05, n)).round(0)
+    rx_co = ((tx1_co + tx2_co) / 2).round(0)
+    tx_rx = pd.DataFrame({
+        "timestamp": timestamps,
+        "date": dates,
+        "hourly_slot": slots,
+        "TX1_kWh": tx1,
+        "TX2_kWh": tx2,
+        "RX_kWh": rx,
+        "deviation_percent": calculate_deviation(rx, tx1, tx2),
+        "load_status": get_load_status(rx),
+        "TX1_CO_ppm": tx1_co.astype(np.int64),
+        "TX2_CO_ppm": tx2_co.astype(np.int64),
+        "RX_CO_ppm": rx_co.astype(np.int64),
+        "CO_status": get_co_status(rx_co),
+    })
+
+    anomalies = pd.DataFrame({
+        "timestamp": timestamps[anomalous],
+        "kind": np.where(spike[anomalous], "spike", "loss"),
+        "factor": factor[anomalous].round(3),
+    })
+    return {"professional": professional, "tx_rx": tx_rx, "anomalies": anomalies}
+
+
+def generate_site(task):
+    """
+    Draws a site's equipment mix, then writes its partition chunk by chunk.
+
+    Args:
+        task (dict): site_id, index, directory, rows, start and the scenario.
+
+    Returns:
+        dict: The site's manifest entry.
+    """
+    scenario = task["scenario"]
+    rng = dataset_pipeline.meter_rng(scenario["seed"], task["index"])
+
+    weights = np.array([profile["weight"] for profile in scenario["equipment_mix"]], dtype=float)
+    profile_index = int(rng.choice(len(weights), p=weights / weights.sum()))
+    site = {
+        "site_id": task["site_id"],
+        "profile": profile_index,
+        "equipment": scenario["equipment_mix"][profile_index]["equipment"],
+        "shift": int(rng.integers(-1, 2)),
+    }
+
+    os.makedirs(task["directory"], exist_ok=True)
+    sinks = {}
+    for name in scenario["datasets"]:
+        sinks[name] = dataset_pipeline.open_sink(os.path.join(task["directory"], DATASETS[name]), "csv", task["rows"])
+    anomaly_sink = dataset_pipeline.CsvSink(os.path.join(task["directory"], "anomalies.csv"))
+
+    anomalies = 0
+    step_hours = scenario["resolution_seconds"] / 3600.0
+    blocks = dataset_pipeline.time_blocks(
+        task["start"], task["rows"], scenario["resolution_seconds"], scenario["chunk_rows"]
+    )
+    for timestamps in blocks:
+        frames = generate_chunk(timestamps, rng, site, step_hours, scenario["anomaly_rate"])
+        for name, sink in sinks.items():
+            sink.write(frames[name])
+        anomaly_sink.write(frames["anomalies"])
+        anomalies += len(frames["anomalies"])
+    for sink in sinks.values():
+        sink.close()
+    anomaly_sink.close()
+
+    return {**site, "rows": task["rows"], "anomalies": anomalies,
+            "directory": os.path.basename(task["directory"])}
+
+
+def generate_fleet(scenario, output_dir):
+    """Generates every site of a scenario under output_dir/<name>/ and writes the manifest."""
+    start = datetime.strptime(scenario["start"], "%Y-%m-%d")
+    step = scenario["resolution_seconds"]
+    end = start + timedelta(days=scenario["days"]) - timedelta(seconds=step)
+    rows = dataset_pipeline.row_count(start, end, step)
+    root = os.path.join(output_dir, scenario["name"])
+
+    print(f"🏭 Generating fleet '{scenario['name']}': {scenario['sites']} sites × {rows:,} rows "
+          f"({scenario['days']} days every {step}s) with {scenario['workers']} worker(s)")
+    print(f"   Output: {os.path.abspath(root)}")
+
+    tasks = [{
+        "site_id": site_id, "index": index, "rows": rows, "start": start, "scenario": scenario,
+        "directory": os.path.join(root, f"site={site_id}"),
+    } for index, site_id in enumerate(site_ids(scenario["sites"]))]
+
+    began = time.perf_counter()
+    sites = dataset_pipeline.run_meters(generate_site, tasks, scenario["workers"])
+    elapsed = time.perf_counter() - began
+
+    manifest = {
+        "scenario": scenario,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "sites": sites,
+    }
+    with open(os.path.join(root, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    total_rows = rows * len(sites)
+    print(f"\n✓ {len(sites)} sites, {total_rows:,} rows per dataset in {elapsed:.1f}s "
+          f"({total_rows / elapsed:,.0f} rows/s)")
+    print(f"   Injected anomalies: {sum(site['anomalies'] for site in sites):,}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic PowerByte fleet from a scenario file")
+    parser.add_argument("scenario", help="Scenario JSON file")
+    parser.add_argument("--output", default=os.path.join(BASE_DIR, "fleet_output"),
+                        help="Directory the fleet is written under")
+    parser.add_argument("--workers", type=int, help="Override the scenario's worker count")
+    args = parser.parse_args()
+
+    try:
+        scenario = load_scenario(args.scenario)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers is not None:
+        scenario["workers"] = args.workers
+    generate_fleet(scenario, args.output)
+
+
+if __name__ == "__main__":
+    main()
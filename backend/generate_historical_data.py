@@ -1,16 +1,29 @@
-import pandas as pd
-import random
-import math
-from datetime import datetime, timedelta
+"""
+Generate historical energy data (hourly by default) and a daily summary.
+
+Rows are generated vectorized in fixed-size chunks and streamed to disk
+(see dataset_pipeline); the daily summary is built from per-chunk partial
+sums, so memory stays flat for long ranges, fine resolutions and many
+meters.
+
+Usage:
+    python generate_historical_data.py
+    python generate_historical_data.py --days 365 --resolution 1 --meters 24 --workers 8 --format columnar
+"""
+
+import argparse
 import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import dataset_pipeline
+from equipment import CATALOGUE
 
 EQUIPMENT_LIST = [
-    {"name": "Heater", "wattage": 2000, "current": 9.09},
-    {"name": "Bulb 100W", "wattage": 100, "current": 0.45},
-    {"name": "Bulb 60W", "wattage": 60, "current": 0.27},
-    {"name": "Motor DC 220V", "wattage": 1500, "current": 6.82},
-    {"name": "Motor AC Induction 2HP", "wattage": 1492, "current": 6.78},
-    {"name": "RD_PC Power Consumption", "wattage": 220, "current": 1.00},
+    {"name": name, "wattage": spec["wattage"], "current": spec["current"]}
+    for name, spec in CATALOGUE.items()
 ]
 
 VOLTAGE_NOMINAL = 220  # Volts
@@ -38,151 +51,224 @@ VOLTAGE_NOMINAL = 220  # Volts
 CO2_EMISSION_FACTOR = 0.716  # kg CO₂ per kWh (CEA India 2024)
 ELECTRICITY_RATE_INR = 7.0   # ₹ per kWh (average Indian household tariff)
 
+TOTAL_INSTALLED_POWER = sum(eq["wattage"] for eq in EQUIPMENT_LIST)  # Watts
 
-def get_time_of_day_factor(hour):
-    """Simulate realistic daily usage patterns (peak hours cost more power)."""
-    if 0 <= hour < 6:
-        return random.uniform(0.15, 0.30)   # Night — minimal usage
-    elif 6 <= hour < 9:
-        return random.uniform(0.50, 0.70)   # Morning ramp-up
-    elif 9 <= hour < 12:
-        return random.uniform(0.60, 0.85)   # Late morning — moderate
-    elif 12 <= hour < 14:
-        return random.uniform(0.40, 0.60)   # Lunch dip
-    elif 14 <= hour < 18:
-        return random.uniform(0.65, 0.90)   # Afternoon peak
-    elif 18 <= hour < 21:
-        return random.uniform(0.75, 0.95)   # Evening peak (highest)
-    else:
-        return random.uniform(0.30, 0.50)   # Late night wind-down
-
-
-def get_seasonal_factor(date):
-    """Add a seasonal trend — higher usage in winter months."""
-    month = date.month
-    if month in [12, 1, 2]:   # Winter
-        return random.uniform(1.10, 1.30)
-    elif month in [6, 7, 8]:  # Summer (AC / cooling)
-        return random.uniform(1.05, 1.20)
-    else:                     # Spring / Autumn
-        return random.uniform(0.85, 1.00)
-
-
-def generate_historical_csv():
-    end_date = datetime.now().replace(minute=0, second=0, microsecond=0)
-    start_date = end_date - timedelta(days=90)
-
-    current_time = start_date
-    data_rows = []
 
-    total_installed_power = sum(eq["wattage"] for eq in EQUIPMENT_LIST)  # Watts
-    total_installed_current = sum(eq["current"] for eq in EQUIPMENT_LIST)
+# Daily usage patterns as (end_hour, low, high): peak hours cost more power
+TIME_OF_DAY_BANDS = [
+    (6, 0.15, 0.30),    # Night — minimal usage
+    (9, 0.50, 0.70),    # Morning ramp-up
+    (12, 0.60, 0.85),   # Late morning — moderate
+    (14, 0.40, 0.60),   # Lunch dip
+    (18, 0.65, 0.90),   # Afternoon peak
+    (21, 0.75, 0.95),   # Evening peak (highest)
+    (24, 0.30, 0.50),   # Late night wind-down
+]
 
-    print("🌱 Generating 3 months of hourly historical data...")
-    print(f"   Total installed capacity: {total_installed_power}W")
-    print(f"   Date range: {start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}")
+# Seasonal trend per month (index 0 = January) — higher usage in winter months
+SEASONAL_BANDS = np.array([
+    (1.10, 1.30) if month in (12, 1, 2)      # Winter
+    else (1.05, 1.20) if month in (6, 7, 8)  # Summer (AC / cooling)
+    else (0.85, 1.00)                        # Spring / Autumn
+    for month in range(1, 13)
+])
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historical_data.csv")
+DEFAULT_SUMMARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historical_daily_summary.csv")
+
+
+def get_time_of_day_factor(hour, rng):
+    """Simulate realistic daily usage patterns for an array of hours."""
+    low, high = np.empty(24), np.empty(24)
+    start = 0
+    for end, lo, hi in TIME_OF_DAY_BANDS:
+        low[start:end], high[start:end] = lo, hi
+        start = end
+    return rng.uniform(low[hour], high[hour])
+
+
+def get_seasonal_factor(timestamps, rng):
+    """Add a seasonal trend for an array of datetime64 timestamps."""
+    month_index = timestamps.astype("datetime64[M]").astype(np.int64) % 12
+    bands = SEASONAL_BANDS[month_index]
+    return rng.uniform(bands[:, 0], bands[:, 1])
+
+
+def generate_chunk(timestamps, rng, step_hours=1.0):
+    """
+    Builds hourly-layout rows for a block of timestamps.
+
+    Args:
+        timestamps (np.ndarray): datetime64 timestamps, one per row.
+        rng (np.random.Generator): Noise source.
+        step_hours (float): Interval each row covers, for the kWh conversion.
+
+    Returns:
+        pd.DataFrame: The historical_data.csv columns.
+    """
+    n = len(timestamps)
+    hour = dataset_pipeline.hour_of_day(timestamps)
+    tod_factor = get_time_of_day_factor(hour, rng)
+    seasonal = get_seasonal_factor(timestamps, rng)
+
+    # --- ACTUAL POWER (simulated ground truth) ---
+    # Each device has its own random chance of being active, with slight noise when ON
+    actual_power_w = np.zeros(n)
+    actual_current_a = np.zeros(n)
+    for eq in EQUIPMENT_LIST:
+        on = rng.random(n) < tod_factor
+        noise = rng.uniform(0.92, 1.08, n)
+        actual_power_w += np.where(on, eq["wattage"] * noise, 0.0)
+        actual_current_a += np.where(on, eq["current"] * noise, 0.0)
+
+    actual_power_w *= seasonal
+
+    # Voltage fluctuation (±5%)
+    voltage = VOLTAGE_NOMINAL * rng.uniform(0.95, 1.05, n)
+
+    # --- PREDICTED POWER (ML model simulation) ---
+    # The prediction should be close to actual but not perfect (~8% std dev)
+    predicted_power_w = np.maximum(0, actual_power_w * (1 + rng.normal(0, 0.08, n)))
+
+    # --- ANOMALY FLAG ---
+    # Flag if actual power is significantly higher than expected
+    expected_avg = TOTAL_INSTALLED_POWER * tod_factor * seasonal
+    is_anomaly = actual_power_w > expected_avg * 1.4
+
+    # --- kWh conversion (for one row's interval) ---
+    actual_kwh = actual_power_w / 1000.0 * step_hours
+    predicted_kwh = predicted_power_w / 1000.0 * step_hours
+
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "date": dataset_pipeline.date_labels(timestamps),
+        "hour": hour,
+        "actual_power_w": actual_power_w.round(2),
+        "predicted_power_w": predicted_power_w.round(2),
+        "actual_kwh": actual_kwh.round(4),
+        "predicted_kwh": predicted_kwh.round(4),
+        "voltage": voltage.round(2),
+        "current_a": actual_current_a.round(3),
+        "cost_inr": (actual_kwh * ELECTRICITY_RATE_INR).round(2),
+        # --- Carbon Emission (CEA India Grid Factor: 0.716 kg CO₂/kWh) ---
+        "carbon_kg": (actual_kwh * CO2_EMISSION_FACTOR).round(4),
+        "anomaly": is_anomaly,
+        "status": np.where(is_anomaly, "anomaly", "normal"),
+    })
 
-    while current_time <= end_date:
-        hour = current_time.hour
-        tod_factor = get_time_of_day_factor(hour)
-        seasonal = get_seasonal_factor(current_time)
-
-        # --- ACTUAL POWER (simulated ground truth) ---
-        # Each equipment has a probability of being ON based on time-of-day
-        actual_power_w = 0.0
-        actual_current_a = 0.0
-        for eq in EQUIPMENT_LIST:
-            # Each device has its own random chance of being active
-            if random.random() < tod_factor:
-                # Device is ON — add its power with slight noise
-                noise = random.uniform(0.92, 1.08)
-                actual_power_w += eq["wattage"] * noise
-                actual_current_a += eq["current"] * noise
-
-        actual_power_w *= seasonal
-
-        # Voltage fluctuation (±5%)
-        voltage = VOLTAGE_NOMINAL * random.uniform(0.95, 1.05)
-
-        # --- PREDICTED POWER (ML model simulation) ---
-        # The prediction should be close to actual but not perfect
-        prediction_error = random.gauss(0, 0.08)  # ~8% std dev
-        predicted_power_w = actual_power_w * (1 + prediction_error)
-
-        # Ensure non-negative
-        actual_power_w = max(0, actual_power_w)
-        predicted_power_w = max(0, predicted_power_w)
-
-        # --- ANOMALY FLAG ---
-        # Flag if actual power is significantly higher than expected
-        expected_avg = total_installed_power * tod_factor * seasonal
-        is_anomaly = actual_power_w > expected_avg * 1.4
-
-        # --- kWh conversion (for 1 hour interval) ---
-        actual_kwh = actual_power_w / 1000.0
-        predicted_kwh = predicted_power_w / 1000.0
-
-        # --- Cost ---
-        cost_inr = actual_kwh * ELECTRICITY_RATE_INR
 
-        # --- Carbon Emission (CEA India Grid Factor: 0.716 kg CO₂/kWh) ---
-        carbon_kg = actual_kwh * CO2_EMISSION_FACTOR
-
-        row = {
-            "timestamp": current_time.isoformat(),
-            "date": current_time.strftime("%Y-%m-%d"),
-            "hour": hour,
-            "actual_power_w": round(actual_power_w, 2),
-            "predicted_power_w": round(predicted_power_w, 2),
-            "actual_kwh": round(actual_kwh, 4),
-            "predicted_kwh": round(predicted_kwh, 4),
-            "voltage": round(voltage, 2),
-            "current_a": round(actual_current_a, 3),
-            "cost_inr": round(cost_inr, 2),
-            "carbon_kg": round(carbon_kg, 4),
-            "anomaly": is_anomaly,
-            "status": "anomaly" if is_anomaly else "normal",
-        }
-
-        data_rows.append(row)
-        current_time += timedelta(hours=1)
-
-    # --- Build DataFrame ---
-    df = pd.DataFrame(data_rows)
-
-    # --- Save full hourly data ---
-    csv_path = os.path.join(os.path.dirname(__file__), "historical_data.csv")
-    df.to_csv(csv_path, index=False)
-    print(f"\n✅ Hourly data saved to: {os.path.abspath(csv_path)}")
-    print(f"   Total records: {len(df)}")
-
-    # --- Also generate a daily summary ---
-    daily = df.groupby("date").agg(
+def _daily_partial(df):
+    """Per-day sums for one chunk; days split across chunks are combined later."""
+    return df.groupby("date", observed=True).agg(
         actual_kwh=("actual_kwh", "sum"),
         predicted_kwh=("predicted_kwh", "sum"),
-        avg_power_w=("actual_power_w", "mean"),
+        power_sum=("actual_power_w", "sum"),
+        rows=("actual_power_w", "size"),
         peak_power_w=("actual_power_w", "max"),
         cost_inr=("cost_inr", "sum"),
         carbon_kg=("carbon_kg", "sum"),
         anomaly_count=("anomaly", "sum"),
-    ).reset_index()
-
-    daily["status"] = daily["anomaly_count"].apply(lambda x: "high_usage" if x > 3 else "normal")
+    )
+
+
+def daily_summary(partials):
+    """Combines per-chunk partials into the historical_daily_summary.csv table."""
+    combined = pd.concat(partials)
+    combined.index = combined.index.astype(str)
+    daily = combined.groupby(level=0, sort=True).agg({
+        "actual_kwh": "sum", "predicted_kwh": "sum", "power_sum": "sum", "rows": "sum",
+        "peak_power_w": "max", "cost_inr": "sum", "carbon_kg": "sum", "anomaly_count": "sum",
+    })
+    daily.insert(2, "avg_power_w", daily.pop("power_sum") / daily.pop("rows"))
+    daily = daily.rename_axis("date").reset_index()
+    daily["status"] = np.where(daily["anomaly_count"] > 3, "high_usage", "normal")
+    return daily
+
+
+def generate_meter(task):
+    """
+    Generates one meter's hourly file chunk by chunk, then its daily summary.
+
+    Args:
+        task (dict): start, rows, resolution, seed, index, output, summary, format, chunk_rows.
+
+    Returns:
+        pd.DataFrame: The daily summary that was written.
+    """
+    rng = dataset_pipeline.meter_rng(task["seed"], task["index"])
+    sink = dataset_pipeline.open_sink(task["output"], task["format"], task["rows"],
+                                      **({"date_format": "%Y-%m-%dT%H:%M:%S"} if task["format"] == "csv" else {}))
+    step_hours = task["resolution"] / 3600.0
+
+    partials = []
+    for timestamps in dataset_pipeline.time_blocks(task["start"], task["rows"], task["resolution"], task["chunk_rows"]):
+        chunk = generate_chunk(timestamps, rng, step_hours)
+        sink.write(chunk)
+        partials.append(_daily_partial(chunk))
+    sink.close()
+
+    daily = daily_summary(partials)
+    daily.to_csv(task["summary"], index=False)
+    return daily
+
+
+def generate_historical_csv(days=90, resolution=3600, meters=1, workers=1, seed=42, fmt="csv",
+                            output=DEFAULT_OUTPUT, summary=DEFAULT_SUMMARY,
+                            chunk_rows=dataset_pipeline.DEFAULT_CHUNK_ROWS):
+    end_date = datetime.now().replace(minute=0, second=0, microsecond=0)
+    start_date = end_date - timedelta(days=days)
+    rows = dataset_pipeline.row_count(start_date, end_date, resolution)
 
-    daily_csv_path = os.path.join(os.path.dirname(__file__), "historical_daily_summary.csv")
-    daily.to_csv(daily_csv_path, index=False)
-    print(f"✅ Daily summary saved to: {os.path.abspath(daily_csv_path)}")
-    print(f"   Total days: {len(daily)}")
+    total_installed_current = sum(eq["current"] for eq in EQUIPMENT_LIST)
 
-    # --- Quick stats ---
-    print(f"\n📊 Quick Stats:")
-    print(f"   Total Energy Consumed:  {daily['actual_kwh'].sum():.1f} kWh")
-    print(f"   Total Predicted Energy: {daily['predicted_kwh'].sum():.1f} kWh")
-    print(f"   Total Cost:             ₹{daily['cost_inr'].sum():,.0f}")
-    print(f"   Total Carbon:           {daily['carbon_kg'].sum():.1f} kg CO₂")
-    print(f"   Anomaly Days:           {(daily['anomaly_count'] > 0).sum()}")
-    print(f"   Prediction MAPE:        {abs(daily['actual_kwh'] - daily['predicted_kwh']).mean() / daily['actual_kwh'].mean() * 100:.2f}%")
+    print(f"🌱 Generating {days} days of historical data every {resolution}s for {meters} meter(s)...")
+    print(f"   Total installed capacity: {TOTAL_INSTALLED_POWER}W ({total_installed_current:.2f}A)")
+    print(f"   Date range: {start_date.strftime('%Y-%m-%d')} → {end_date.strftime('%Y-%m-%d')}")
+    print(f"   Rows per meter: {rows:,} in chunks of {chunk_rows:,}")
+
+    ids = dataset_pipeline.meter_ids(meters)
+    tasks = [{
+        "start": start_date, "rows": rows, "resolution": resolution, "seed": seed, "index": index,
+        "output": dataset_pipeline.meter_output(output, meter_id, meters),
+        "summary": dataset_pipeline.meter_output(summary, meter_id, meters),
+        "format": fmt, "chunk_rows": chunk_rows,
+    } for index, meter_id in enumerate(ids)]
+    summaries = dataset_pipeline.run_meters(generate_meter, tasks, workers)
+
+    for meter_id, task, daily in zip(ids, tasks, summaries):
+        print(f"\n✅ {meter_id}: {rows:,} records saved to: {os.path.abspath(task['output'])}")
+        print(f"✅ Daily summary saved to: {os.path.abspath(task['summary'])}")
+        print(f"   Total days: {len(daily)}")
+
+        # --- Quick stats ---
+        print(f"\n📊 Quick Stats:")
+        print(f"   Total Energy Consumed:  {daily['actual_kwh'].sum():.1f} kWh")
+        print(f"   Total Predicted Energy: {daily['predicted_kwh'].sum():.1f} kWh")
+        print(f"   Total Cost:             ₹{daily['cost_inr'].sum():,.0f}")
+        print(f"   Total Carbon:           {daily['carbon_kg'].sum():.1f} kg CO₂")
+        print(f"   Anomaly Days:           {(daily['anomaly_count'] > 0).sum()}")
+        print(f"   Prediction MAPE:        {abs(daily['actual_kwh'] - daily['predicted_kwh']).mean() / daily['actual_kwh'].mean() * 100:.2f}%")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate hourly historical energy data and a daily summary")
+    parser.add_argument("--days", type=int, default=90, help="Days of history up to now (default: 90)")
+    parser.add_argument("--resolution", type=int, default=3600, help="Seconds between rows (default: 3600)")
+    parser.add_argument("--meters", type=int, default=1, help="Number of meters (default: 1)")
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating meters in parallel")
+    parser.add_argument("--seed", type=int, default=42, help="Base random seed (default: 42)")
+    parser.add_argument("--format", choices=dataset_pipeline.FORMATS, default="csv", help="Output format")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Row-level output; suffixed per meter")
+    parser.add_argument("--summary", default=DEFAULT_SUMMARY, help="Daily summary CSV; suffixed per meter")
+    parser.add_argument("--chunk-rows", type=int, default=dataset_pipeline.DEFAULT_CHUNK_ROWS,
+                        help="Rows generated and written per chunk")
+    args = parser.parse_args(argv)
+    dataset_pipeline.check_positive(parser, args, "days", "resolution", "meters", "workers", "chunk_rows")
+    return args
 
 
 if __name__ == "__main__":
-    generate_historical_csv()
+    args = parse_args()
+    generate_historical_csv(days=args.days, resolution=args.resolution, meters=args.meters,
+                            workers=args.workers, seed=args.seed, fmt=args.format, output=args.output,
+                            summary=args.summary, chunk_rows=args.chunk_rows)
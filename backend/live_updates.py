@@ -0,0 +1,169 @@
+"""
+Server-Sent Events fan-out of live meter state.
+
+MeterRegistry calls LiveHub.publish() with every new MeterState. Each
+connected client has a Subscription, which watches a set of meters and,
+optionally, a subset of zones. A subscription keeps only the latest
+unsent state per meter, so a slow consumer skips intermediate updates
+(they are coalesced) and never builds a backlog. When a client catches up
+it gets one delta per meter: the zones and fields that changed since the
+last state it was sent.
+
+Wire format (text/event-stream):
+    event: snapshot   full filtered state per meter, sent once on connect
+    event: delta      {"meter_id", "timestamp", "zones"?: {...}, "prediction"?: {...}}
+    : keepalive       comment line every KEEPALIVE_SECONDS while idle
+"""
+
+import asyncio
+import json
+import threading
+
+KEEPALIVE_SECONDS = 15.0
+DEFAULT_INTERVAL_MS = 250
+MIN_INTERVAL_MS = 50
+
+
+def _json_default(value):
+    # numpy scalars from CSV rows and model outputs
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def sse_event(event, data):
+    """One SSE frame as bytes."""
+    return f"event: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n".encode()
+
+
+def _filter_zones(zones, wanted):
+    if wanted is None:
+        return zones
+    return {name: zone for name, zone in zones.items() if name in wanted}
+
+
+class Subscription:
+    """One client's filter, coalescing buffer and last-sent state."""
+
+    def __init__(self, meter_ids, zones=None, interval=DEFAULT_INTERVAL_MS / 1000.0):
+        self.meter_ids = frozenset(meter_ids)
+        self.zones = frozenset(zones) if zones else None
+        self.interval = interval
+        self._pending = {}
+        self._sent = {}
+        self._ready = asyncio.Event()
+        self.delivered = 0
+        self.coalesced = 0
+
+    def offer(self, state):
+        """Keeps `state` as the meter's next update, replacing one not yet sent."""
+        if state.meter_id in self._pending:
+            self.coalesced += 1
+        self._pending[state.meter_id] = state
+        self._ready.set()
+
+    def snapshot(self, states):
+        """Initial frame: the filtered state of every watched meter that has reported."""
+        meters = {}
+        for state in states:
+            if state is None:
+                continue
+            self._sent[state.meter_id] = state
+            meters[state.meter_id] = {
+                "zones": _filter_zones(state.zones, self.zones),
+                "prediction": state.prediction,
+                "timestamp": state.timestamp,
+            }
+        return sse_event("snapshot", {"meters": meters})
+
+    def _delta(self, state):
+        previous = self._sent.get(state.meter_id)
+        self._sent[state.meter_id] = state
+        delta = {"meter_id": state.meter_id, "timestamp": state.timestamp}
+        zones = _filter_zones(state.zones, self.zones)
+        if previous is None:
+            changed = zones
+        else:
+            old_zones = previous.zones
+            changed = {name: zone for name, zone in zones.items() if old_zones.get(name) != zone}
+        if changed:
+            delta["zones"] = changed
+        if previous is None or state.prediction != previous.prediction:
+            delta["prediction"] = state.prediction
+        # A zone filter can leave nothing the client cares about
+        if "zones" not in delta and "prediction" not in delta:
+            return None
+        return delta
+
+    async def frames(self):
+        """Yields delta frames (or keepalives) as updates arrive, at most one batch per interval."""
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            self._ready.clear()
+            pending, self._pending = self._pending, {}
+            for state in pending.values():
+                delta = self._delta(state)
+                if delta is not None:
+                    self.delivered += 1
+                    yield sse_event("delta", delta)
+            # Let further updates pile up (and coalesce) before the next batch
+            await asyncio.sleep(self.interval)
+
+
+class LiveHub:
+    """Routes published meter states to the subscriptions watching them."""
+
+    def __init__(self):
+        self._by_meter = {}
+        self._loop = None
+        self._loop_thread = None
+        self.published = 0
+        # Totals of subscriptions that have disconnected
+        self._delivered = 0
+        self._coalesced = 0
+
+    def subscribe(self, subscription):
+        # Subscriptions live on the server's event loop; remember it so
+        # publishes from worker threads can be handed over to it
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        for meter_id in subscription.meter_ids:
+            self._by_meter.setdefault(meter_id, set()).add(subscription)
+
+    def unsubscribe(self, subscription):
+        self._delivered += subscription.delivered
+        self._coalesced += subscription.coalesced
+        for meter_id in subscription.meter_ids:
+            subscribers = self._by_meter.get(meter_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_meter[meter_id]
+
+    def publish(self, state):
+        """MeterRegistry listener; safe to call from any thread."""
+        if state.meter_id not in self._by_meter:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._deliver(state)
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self._deliver, state)
+
+    def _deliver(self, state):
+        self.published += 1
+        for subscription in self._by_meter.get(state.meter_id, ()):
+            subscription.offer(state)
+
+    def stats(self):
+        subs = {sub for subs in self._by_meter.values() for sub in subs}
+        return {
+            "subscribers": len(subs),
+            "meters_watched": len(self._by_meter),
+            "published": self.published,
+            "delivered": self._delivered + sum(sub.delivered for sub in subs),
+            "coalesced": self._coalesced + sum(sub.coalesced for sub in subs),
+        }
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Load test for the ingest endpoint with many concurrent senders.
+
+Each simulated sender posts mock_sensor-style payloads to /api/predict in a
+tight loop for a fixed duration over a shared keep-alive connection pool.
+The report shows throughput, latency percentiles and the share of 429
+(backpressure) responses for every concurrency level.
+
+Usage (with the API running: uvicorn main:app --port 8000):
+    python loadtest_ingest.py --senders 100 1000 --duration 10
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import numpy as np
+
+API_URL = "http://localhost:8000/api/predict"
+
+
+def make_payload(sender_id):
+    intensity = random.uniform(5, 25)
+    return {
+        "meter_id": f"loadtest-{sender_id}",
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "Global_intensity": round(intensity, 2),
+        "Global_reactive_power": round(random.uniform(0.1, 0.5) * intensity, 2),
+        "zones": {"TX1": {"Voltage": round(random.uniform(225, 235), 1)}},
+    }
+
+
+async def sender(client, url, sender_id, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=make_payload(sender_id))
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        except httpx.HTTPError:
+            statuses["error"] = statuses.get("error", 0) + 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(url, senders, duration):
+    limits = httpx.Limits(max_connections=senders, max_keepalive_connections=senders)
+    latencies, statuses = [], {}
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            sender(client, url, i, deadline, latencies, statuses) for i in range(senders)
+        ))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def report(senders, latencies, statuses, elapsed):
+    total = sum(statuses.values())
+    ok = statuses.get(200, 0)
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(f"\n── {senders} concurrent senders ──")
+    print(f"  Requests:     {total} in {elapsed:.1f}s ({total / elapsed:.0f} req/s, {ok / elapsed:.0f} ok/s)")
+    print(f"  Status codes: {dict(sorted(statuses.items(), key=str))}")
+    print(f"  Rejected 429: {statuses.get(429, 0) / max(total, 1) * 100:.1f}%")
+    print(f"  Latency ms:   p50 {np.percentile(ms, 50):.1f} | p95 {np.percentile(ms, 95):.1f} | p99 {np.percentile(ms, 99):.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-sender load test for /api/predict")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--senders", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    args = parser.parse_args()
+
+    for senders in args.senders:
+        latencies, statuses, elapsed = asyncio.run(run_level(args.url, senders, args.duration))
+        report(senders, latencies, statuses, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Server-side energy-loss detection: the main receiver (RX) against the two
+transmitters (TX1 + TX2).
+
+Every ingested reading is scored as it arrives:
+
+    difference = RX - (TX1 + TX2)
+    deviation  = difference / (TX1 + TX2) * 100
+
+and classified like the dashboard's EnergyLossCalculator, but on the
+deviation against the metering tolerance:
+
+    |deviation| <= TOLERANCE_PCT   no-loss
+    |deviation| <= CRITICAL_PCT    acceptable-loss
+    otherwise                      critical-loss
+    TX1 + TX2 below MIN_LOAD_KW    idle (not scored)
+
+Each meter keeps a fixed window of its last scored readings with running
+sums, so updates are O(1) and memory per meter is bounded. A loss event is
+raised when a meter leaves tolerance, escalates to critical, or returns to
+tolerance. batch() applies the same rules to a whole dataset in one
+vectorized pass and reports out-of-tolerance runs as events. At most
+POWERBYTE_MAX_METERS meters are tracked (see meter_table.py).
+
+Usage:
+    python loss_detector.py 3_month_TX1_TX2_RX_with_MQ7_ppm.csv
+"""
+
+import argparse
+import collections
+import json
+import math
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from meter_table import MeterTable
+
+TOLERANCE_PCT = 2.5
+CRITICAL_PCT = 4.0
+MIN_LOAD_KW = 0.05
+# Scored readings kept per meter for the windowed statistics
+WINDOW = 60
+MAX_EVENTS = 1000
+
+NO_LOSS, ACCEPTABLE, CRITICAL, IDLE = "no-loss", "acceptable-loss", "critical-loss", "idle"
+
+
+def classify(deviation, tolerance=TOLERANCE_PCT, critical=CRITICAL_PCT):
+    """Status of one deviation percentage (NaN: idle)."""
+    if deviation != deviation:
+        return IDLE
+    magnitude = abs(deviation)
+    if magnitude <= tolerance:
+        return NO_LOSS
+    return ACCEPTABLE if magnitude <= critical else CRITICAL
+
+
+def _event_kind(old, new):
+    if new == NO_LOSS:
+        return "loss_cleared" if old in (ACCEPTABLE, CRITICAL) else None
+    if old in (None, NO_LOSS):
+        return "loss_started"
+    return "loss_escalated" if new == CRITICAL else None
+
+
+class LossWindow:
+    """One meter's last `size` scored readings with running sums, and its status."""
+
+    __slots__ = ("size", "deviations", "differences", "dev_sum", "dev_sq_sum", "diff_sum",
+                 "out_of_tolerance", "status", "since", "readings", "lock")
+
+    def __init__(self, size):
+        self.size = size
+        self.deviations = collections.deque()
+        self.differences = collections.deque()
+        self.dev_sum = 0.0
+        self.dev_sq_sum = 0.0
+        self.diff_sum = 0.0
+        self.out_of_tolerance = 0
+        self.status = None
+        self.since = None
+        self.readings = 0
+        self.lock = threading.Lock()
+
+    def push(self, deviation, difference, tolerance):
+        if len(self.deviations) == self.size:
+            old_dev, old_diff = self.deviations.popleft(), self.differences.popleft()
+            self.dev_sum -= old_dev
+            self.dev_sq_sum -= old_dev * old_dev
+            self.diff_sum -= old_diff
+            self.out_of_tolerance -= abs(old_dev) > tolerance
+        self.deviations.append(deviation)
+        self.differences.append(difference)
+        self.dev_sum += deviation
+        self.dev_sq_sum += deviation * deviation
+        self.diff_sum += difference
+        self.out_of_tolerance += abs(deviation) > tolerance
+
+    def to_dict(self):
+        n = len(self.deviations)
+        mean = self.dev_sum / n if n else None
+        std = math.sqrt(max(self.dev_sq_sum / n - mean * mean, 0.0)) if n else None
+        return {
+            "status": self.status,
+            "since": self.since,
+            "readings": self.readings,
+            "window": n,
+            "mean_deviation_percent": None if mean is None else round(mean, 3),
+            "std_deviation_percent": None if std is None else round(std, 3),
+            "max_abs_deviation_percent": round(max(map(abs, self.deviations)), 3) if n else None,
+            "out_of_tolerance_pct": round(self.out_of_tolerance / n * 100, 1) if n else None,
+            "net_difference": round(self.diff_sum, 4),
+        }
+
+
+class LossDetector:
+    """Scores RX vs TX1 + TX2 per meter on every ingest and records loss events."""
+
+    def __init__(self, window=WINDOW, tolerance=TOLERANCE_PCT, critical=CRITICAL_PCT,
+                 min_load=MIN_LOAD_KW, max_events=MAX_EVENTS, max_meters=None):
+        self.window = window
+        self.tolerance = tolerance
+        self.critical = critical
+        self.min_load = min_load
+        self._meters = MeterTable(max_meters)
+        # Most recent events of all meters, oldest dropped first
+        self.events = collections.deque(maxlen=max_events)
+        self.event_count = 0
+
+    def _get_or_create(self, meter_id):
+        return self._meters.get_or_create(meter_id, lambda: LossWindow(self.window))
+
+    def __len__(self):
+        return len(self._meters)
+
+    @property
+    def evicted(self):
+        return self._meters.evicted
+
+    def observe(self, meter_id, timestamp, rx, tx1, tx2):
+        """
+        Scores one reading (any consistent unit, e.g. kW or kWh).
+
+        Returns:
+            dict: deviation_percent, difference, status and, when the reading
+                changed the meter's status, the event it raised.
+        """
+        tx_total = tx1 + tx2
+        difference = rx - tx_total
+        deviation = difference / tx_total * 100 if tx_total >= self.min_load else math.nan
+        status = classify(deviation, self.tolerance, self.critical)
+        result = {
+            "status": status,
+            "deviation_percent": None if status == IDLE else round(deviation, 3),
+            "difference": round(difference, 4),
+        }
+        if status == IDLE:
+            return result
+
+        window = self._get_or_create(meter_id)
+        with window.lock:
+            window.push(deviation, difference, self.tolerance)
+            window.readings += 1
+            previous = window.status
+            if status != previous:
+                window.status, window.since = status, timestamp
+        kind = _event_kind(previous, status) if status != previous else None
+        if kind is not None:
+            event = {
+                "meter_id": meter_id,
+                "timestamp": timestamp,
+                "kind": kind,
+                "status": status,
+                "deviation_percent": result["deviation_percent"],
+                "difference": result["difference"],
+                "recorded_at": time.time(),
+            }
+            self.events.append(event)
+            self.event_count += 1
+            result["event"] = event
+        return result
+
+    def state(self, meter_id):
+        """Windowed statistics for one meter, or None if it never had a scored reading."""
+        window = self._meters.get(meter_id)
+        if window is None:
+            return None
+        with window.lock:
+            return {"meter_id": meter_id, **window.to_dict()}
+
+    def recent_events(self, meter_id=None, limit=100):
+        """Newest events first, optionally for one meter only."""
+        events = (e for e in reversed(list(self.events)) if meter_id is None or e["meter_id"] == meter_id)
+        return [event for _, event in zip(range(limit), events)]
+
+    def stats(self):
+        return {
+            "meters": len(self._meters),
+            "window": self.window,
+            "tolerance_percent": self.tolerance,
+            "critical_percent": self.critical,
+            "events_total": self.event_count,
+            "events_kept": len(self.events),
+            "losing": sum(1 for w in self._meters.values() if w.status in (ACCEPTABLE, CRITICAL)),
+        }
+
+
+def batch(frame, tolerance=TOLERANCE_PCT, critical=CRITICAL_PCT, min_load=MIN_LOAD_KW, window=WINDOW):
+    """
+    Scores a whole RX / TX1 / TX2 dataset in one vectorized pass.
+
+    Uses the dataset's ``difference_RX_minus_sum_TX`` column when it has one.
+    Events are the runs of consecutive out-of-tolerance rows.
+
+    Returns:
+        dict: Row and status counts, deviation statistics, the largest
+            rolling `window`-row mean deviation, loss totals and the events.
+    """
+    rx = frame["RX_kWh"].to_numpy(dtype=np.float64)
+    tx_total = frame["TX1_kWh"].to_numpy(dtype=np.float64) + frame["TX2_kWh"].to_numpy(dtype=np.float64)
+    if "difference_RX_minus_sum_TX" in frame:
+        difference = frame["difference_RX_minus_sum_TX"].to_numpy(dtype=np.float64)
+    else:
+        difference = rx - tx_total
+    scored = tx_total >= min_load
+    with np.errstate(invalid="ignore", divide="ignore"):
+        deviation = np.where(scored, difference / tx_total * 100, np.nan)
+    magnitude = np.abs(deviation)
+
+    status = np.full(len(frame), IDLE, dtype=object)
+    status[scored] = NO_LOSS
+    status[scored & (magnitude > tolerance)] = ACCEPTABLE
+    status[scored & (magnitude > critical)] = CRITICAL
+    counts = {name: int((status == name).sum()) for name in (NO_LOSS, ACCEPTABLE, CRITICAL, IDLE)}
+
+    # Runs of out-of-tolerance rows: start where the mask turns on, end where it turns off
+    out = scored & (magnitude > tolerance)
+    edges = np.diff(np.concatenate(([0], out.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    events = []
+    if len(starts):
+        peak = np.maximum.reduceat(np.where(out, magnitude, 0.0), starts)
+        net = np.add.reduceat(np.where(out, difference, 0.0), starts)
+        stamps = (frame["timestamp"].astype(str).to_numpy() if "timestamp" in frame
+                  else np.arange(len(frame)).astype(str))
+        for start, end, top, total in zip(starts, ends, peak, net):
+            events.append({
+                "start": stamps[start],
+                "end": stamps[end - 1],
+                "rows": int(end - start),
+                "status": CRITICAL if top > critical else ACCEPTABLE,
+                "peak_abs_deviation_percent": round(float(top), 3),
+                "net_difference_kwh": round(float(total), 4),
+            })
+
+    valid = deviation[scored]
+    rolling = pd.Series(deviation).rolling(window, min_periods=1).mean().abs()
+    return {
+        "rows": len(frame),
+        "scored": int(scored.sum()),
+        "status_counts": counts,
+        "deviation_percent": {
+            "mean": round(float(valid.mean()), 3) if len(valid) else None,
+            "std": round(float(valid.std()), 3) if len(valid) else None,
+            "min": round(float(valid.min()), 3) if len(valid) else None,
+            "max": round(float(valid.max()), 3) if len(valid) else None,
+            f"max_abs_rolling_{window}": round(float(rolling.max()), 3) if len(valid) else None,
+        },
+        "loss_kwh": round(float(np.clip(difference[scored], 0, None).sum()), 4),
+        "net_difference_kwh": round(float(difference[scored].sum()), 4),
+        "events": events,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch RX vs TX1 + TX2 loss detection over a CSV")
+    parser.add_argument("csv", help="Dataset with RX_kWh, TX1_kWh and TX2_kWh columns")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_PCT)
+    parser.add_argument("--critical", type=float, default=CRITICAL_PCT)
+    parser.add_argument("--events", type=int, default=10, help="Events to print")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    frame = pd.read_csv(args.csv)
+    result = batch(frame, args.tolerance, args.critical)
+    elapsed = time.perf_counter() - started
+
+    events = result.pop("events")
+    print(json.dumps(result, indent=2))
+    print(f"\n{len(events)} loss events ({elapsed * 1000:.0f} ms); first {min(args.events, len(events))}:")
+    for event in events[:args.events]:
+        print(f"  {event['start']} → {event['end']}  {event['status']:<15} "
+              f"peak {event['peak_abs_deviation_percent']:.2f}%  net {event['net_difference_kwh']:+.3f} kWh")
+
+
+if __name__ == "__main__":
+    main()
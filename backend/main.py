@@ -1,11 +1,53 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from ml_engine import predictor
+from model_registry import ModelLoadError
+from feature_store import DEFAULT_METER_ID
+from meter_registry import MeterRegistry
+from live_updates import DEFAULT_INTERVAL_MS, MIN_INTERVAL_MS, LiveHub, Subscription
+from dataset_store import AGGREGATION_SECONDS, DatasetStore
+from rollups import RollupEngine, Rollups
+from range_index import RangeIndexEngine, parse_time
+from replay import ReplayManager
+from fast_json import FastJSONResponse
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY as metrics_registry, MetricsMiddleware
+from timeseries_store import DEFAULT_DB_PATH, TimeSeriesStore
+from warmup import WarmUp
+import columnar_cache
+import cpu_pool
+import fast_json
+import loss_detector
+import anomaly_detector
+import micro_batcher
+import response_cache
+import numpy as np
 import pandas as pd
+import atexit
+import contextlib
+import datetime
+import hmac
+import math
 import os
+import threading
+import time
+from collections import OrderedDict
 
-app = FastAPI(title="PowerByte Prediction API")
+# Model loading and dataset seeding, run in the background once the server is
+# up; steps are registered next to the objects they warm
+warmup = WarmUp()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    if fast_json.BACKEND != "orjson":
+        print("orjson is not installed; JSON responses use the slower stdlib encoder (pip install orjson)")
+    warmup.start()
+    yield
+
+
+app = FastAPI(title="PowerByte Prediction API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,33 +56,159 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-route request counts, errors and latency for GET /metrics
+app.add_middleware(MetricsMiddleware)
 
-# In-memory storage for the latest sensor state
-latest_sensor_data = {
-    "zones": {},
-    "prediction": {},
-    "timestamp": None
-}
+# Pushes every registry update to the dashboards subscribed via /api/stream
+live_hub = LiveHub()
+
+# In-memory storage for the latest sensor state, keyed by meter / site id
+meter_registry = MeterRegistry(listener=live_hub.publish)
+
+# Upper bound on ids accepted by one bulk GET /api/data?ids=... call
+MAX_BULK_IDS = 1000
+
+# Inference and pandas work runs here instead of on the event loop; sized by
+# POWERBYTE_CPU_WORKERS / POWERBYTE_CPU_QUEUE
+cpu = cpu_pool.from_env()
+
+
+async def run_cpu(fn, *args):
+    """Runs CPU-bound work on the dedicated pool, answering 429 when it is saturated."""
+    try:
+        return await cpu.run(fn, *args)
+    except cpu_pool.PoolSaturated:
+        raise HTTPException(status_code=429, detail="Server busy, retry shortly.", headers={"Retry-After": "1"})
+
+
+# Every ingested reading is persisted here; the historical endpoints read it
+# back with ?source=ingested
+readings_store = TimeSeriesStore(os.environ.get("POWERBYTE_DB_PATH", DEFAULT_DB_PATH))
+atexit.register(readings_store.close)
+
+
+# Coalesces concurrent /api/predict calls into predict_many batches when
+# POWERBYTE_MICROBATCH=1 (None otherwise)
+batcher = micro_batcher.from_env(predictor.predict_many, run_cpu)
 
 # ═══════════════════════════════════════════════════════════════════════
 # Constants
 # ═══════════════════════════════════════════════════════════════════════
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Directory holding the datasets below, e.g. one site=... partition from generate_fleet.py
+DATA_DIR = os.environ.get("POWERBYTE_DATA_DIR", BASE_DIR)
 CO2_FACTOR = 0.716  # kg CO₂ per kWh (CEA India 2024, Weighted Average)
-PROFESSIONAL_CSV = os.path.join(BASE_DIR, "professional_3_month_energy_dataset.csv")
+PROFESSIONAL_CSV = os.path.join(DATA_DIR, "professional_3_month_energy_dataset.csv")
+TX_RX_CSV = os.path.join(DATA_DIR, "3_month_TX1_TX2_RX_with_MQ7_ppm.csv")
+# Written by backfill.py; one model prediction per hourly row
+PREDICTIONS_CSV = os.path.join(DATA_DIR, "professional_3_month_energy_predictions.csv")
 
 
-def load_professional_data():
-    """Load and enrich the professional 3-month energy dataset."""
-    if not os.path.exists(PROFESSIONAL_CSV):
-        raise HTTPException(status_code=404, detail="professional_3_month_energy_dataset.csv not found.")
-    
-    df = pd.read_csv(PROFESSIONAL_CSV)
+def _read_professional_csv(path):
+    """Load (from the columnar cache when fresh) and enrich the professional 3-month energy dataset."""
+    df = columnar_cache.read_table(path)
     # Compute carbon emission using CEA India factor
     df["carbon_kg"] = (df["energy_kwh"] * CO2_FACTOR).round(4)
+
+    # Attach backfilled model predictions; rows without one stay NaN
+    if os.path.exists(PREDICTIONS_CSV):
+        predictions = pd.read_csv(PREDICTIONS_CSV)
+        by_time = pd.Series(
+            predictions["predicted_kwh"].to_numpy(),
+            index=pd.to_datetime(predictions["timestamp"]),
+        )
+        df["predicted_kwh"] = by_time.reindex(df["timestamp"]).to_numpy()
+    else:
+        df["predicted_kwh"] = np.nan
     return df
 
 
+professional_store = DatasetStore(PROFESSIONAL_CSV, _read_professional_csv, companions=[PREDICTIONS_CSV])
+professional_rollups = RollupEngine(professional_store)
+
+
+def load_professional_data():
+    """Return a shared read-only view of the cached professional dataset."""
+    try:
+        return professional_store.view()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="professional_3_month_energy_dataset.csv not found.")
+
+
+def load_rollups():
+    """Return the precomputed rollups for the current professional dataset."""
+    try:
+        return professional_rollups.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="professional_3_month_energy_dataset.csv not found.")
+
+
+tx_rx_store = DatasetStore(TX_RX_CSV, columnar_cache.read_table)
+
+# Datasets served by /api/historical/range: name -> (range index, default metrics)
+RANGE_DATASETS = {
+    "professional": (
+        RangeIndexEngine(professional_store, [
+            "energy_kwh", "cost_rs", "carbon_kg", "predicted_kwh",
+            "pc_on", "bulb_night_active", "heater_on", "motor_active",
+        ]),
+        ("energy_kwh", "cost_rs", "carbon_kg"),
+    ),
+    "tx_rx": (
+        RangeIndexEngine(tx_rx_store, [
+            "TX1_kWh", "TX2_kWh", "RX_kWh", "deviation_percent", "TX1_CO_ppm", "TX2_CO_ppm", "RX_CO_ppm",
+        ]),
+        ("TX1_kWh", "TX2_kWh", "RX_kWh"),
+    ),
+}
+
+
+def load_range_index(engine):
+    """Return the range index of a dataset, building it if the file changed."""
+    try:
+        return engine.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"{os.path.basename(engine.store.path)} not found.")
+
+
+feature_store = predictor.feature_store
+# Per-meter baselines shared by /api/predict scoring and offline-mode ingest
+anomalies = predictor.anomaly_detector
+
+
+def _seed_default_meter():
+    """Gives the default meter a week of hourly history so lag features are real from the first reading on."""
+    if os.path.exists(TX_RX_CSV):
+        feature_store.seed_from_csv(TX_RX_CSV, DEFAULT_METER_ID, column="RX_kWh", align_to=datetime.datetime.now())
+
+
+def _load_active_model():
+    if predictor.registry.active() is None:
+        raise ModelLoadError(predictor.registry.last_error())
+
+
+def _prime_historical():
+    """Builds the professional rollups and range indexes ahead of the first historical request."""
+    professional_rollups.get()
+    for engine, _ in RANGE_DATASETS.values():
+        engine.get()
+
+
+warmup.step("seed_features", _seed_default_meter)
+warmup.step("load_model", _load_active_model)
+warmup.step("historical", _prime_historical)
+# Ready means the active model is loaded. The check never loads it itself, since
+# probes run on the event loop; a model that failed at start is picked up by the
+# next prediction, a reload through /api/models or the POWERBYTE_MODEL_WATCH watcher
+warmup.check("model", lambda: predictor.registry.loaded_active() is not None)
+
+
+def _require_ready():
+    """503 until warm-up is done and the model is loaded, for paths that must not wait on it."""
+    if not warmup.ready:
+        raise HTTPException(status_code=503, detail="Warming up, retry shortly.", headers={"Retry-After": "1"})
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # API Endpoints
 # ═══════════════════════════════════════════════════════════════════════
@@ -55,36 +223,203 @@ class SensorData(BaseModel):
 def read_root():
     return {"status": "PowerByte API is running"}
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and the event loop is responsive."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: warm-up finished and the model can serve; 503 (with step details) until then."""
+    state = warmup.to_dict()
+    return FastJSONResponse(state, status_code=200 if state["ready"] else 503)
+
+def _reading_number(value, name):
+    """A finite float from a payload field; 422 otherwise."""
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail=f"{name} must be a number.")
+    if not math.isfinite(number):
+        raise HTTPException(status_code=422, detail=f"{name} must be finite.")
+    return number
+
+def _live_features(data):
+    """
+    Extracts the predictor's live inputs from a sensor payload.
+
+    Raises:
+        HTTPException: 422 if a numeric input is not a finite number.
+    """
+    zones = data.get("zones") or {}
+    tx1 = (zones.get("TX1") or {}) if isinstance(zones, dict) else None
+    if not isinstance(tx1, dict):
+        raise HTTPException(status_code=422, detail="zones.TX1 must be an object.")
+    # Keys must be lowercase to match predictor.preprocess_and_predict()
+    live = {
+        "meter_id": data.get("meter_id", DEFAULT_METER_ID),
+        "voltage": _reading_number(tx1.get("Voltage", 230.0), "zones.TX1.Voltage"),
+        "intensity": _reading_number(data.get("Global_intensity", 0.0), "Global_intensity"),
+        "reactive_power": _reading_number(data.get("Global_reactive_power", 0.0), "Global_reactive_power"),
+        "timestamp": data.get("timestamp"),
+    }
+    return live
+
+def _persist_reading(data, live, prediction):
+    """
+    Records a predicted /api/predict-style reading: its active power in the
+    feature store, and the reading and prediction in the time-series store.
+    Only admitted, successfully predicted readings get here, so a rejected
+    request that the client retries is not counted twice.
+    """
+    power_kw = live["voltage"] * live["intensity"] / 1000.0
+    feature_store.observe(live["meter_id"], live["timestamp"], power_kw)
+    readings_store.append(
+        live["meter_id"],
+        data.get("timestamp"),
+        power_kw=power_kw,
+        voltage=live["voltage"],
+        intensity=live["intensity"],
+        reactive_power=live["reactive_power"],
+        predicted_kw=prediction.get("predicted_power"),
+    )
+
 @app.post("/api/predict")
-def predict_power(data: dict):
+async def predict_power(data: dict):
     """Receives sensor data, updates internal state, and returns prediction."""
-    global latest_sensor_data
-    
     try:
-        latest_sensor_data["zones"] = data.get("zones", {})
-        latest_sensor_data["timestamp"] = data.get("timestamp")
-
-        voltage = data.get("zones", {}).get("TX1", {}).get("Voltage", 230.0)
-        intensity = data.get("Global_intensity", 0.0)
-        reactive = data.get("Global_reactive_power", 0.0)
-
-        # Keys must be lowercase to match predictor.preprocess_and_predict()
-        prediction_result = predictor.preprocess_and_predict({
-            "voltage": voltage,
-            "intensity": intensity,
-            "reactive_power": reactive
-        })
+        live = _live_features(data)
+        if batcher is not None:
+            _require_ready()
+            prediction_result = await batcher.submit(live)
+        else:
+            prediction_result = await run_cpu(predictor.preprocess_and_predict, live)
 
-        latest_sensor_data["prediction"] = prediction_result
+        _persist_reading(data, live, prediction_result)
+        meter_registry.update(
+            live["meter_id"],
+            zones=data.get("zones", {}),
+            timestamp=data.get("timestamp"),
+            prediction=prediction_result,
+        )
         return prediction_result
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BatchPredictPayload(BaseModel):
+    readings: list[dict]
+
+@app.post("/api/predict/batch")
+async def predict_power_batch(payload: BatchPredictPayload):
+    """
+    Predicts a buffer of sensor payloads (same shape as /api/predict) with one model call.
+
+    Each meter's last reading in the batch becomes its stored sensor state.
+    """
+    _require_ready()
+    if not payload.readings:
+        return {"count": 0, "predictions": []}
+
+    live = []
+    for i, reading in enumerate(payload.readings):
+        try:
+            live.append(_live_features(reading))
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"readings[{i}]: {e.detail}")
+    try:
+        predictions = await run_cpu(predictor.predict_many, live)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    # Every reading is stored; only the newest per meter is published
+    latest = {}
+    for i, features in enumerate(live):
+        _persist_reading(payload.readings[i], features, predictions[i])
+        latest[features["meter_id"]] = i
+    for meter_id, i in latest.items():
+        reading = payload.readings[i]
+        meter_registry.update(
+            meter_id,
+            zones=reading.get("zones", {}),
+            timestamp=reading.get("timestamp"),
+            prediction=predictions[i],
+        )
+
+    return {"count": len(predictions), "predictions": predictions}
+
+@app.get("/api/predict/batcher")
+async def get_batcher_stats():
+    """Returns micro-batching knobs and the batch-size histogram."""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
 @app.get("/api/data")
-def get_current_data():
-    """Returns the latest stored sensor data and prediction."""
-    return latest_sensor_data
+async def get_current_data(ids: str = None):
+    """
+    Returns the latest stored sensor data and prediction.
+
+    Without ``ids`` this is the default meter's state. With a comma-separated
+    ``ids`` list it returns ``{"meters": {id: state or null}}``.
+    """
+    if ids is None:
+        return meter_registry.snapshot(DEFAULT_METER_ID)
+
+    meter_ids = [meter_id for meter_id in ids.split(",") if meter_id]
+    if len(meter_ids) > MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_IDS} ids per request.")
+    return {"meters": meter_registry.get_many(meter_ids)}
+
+@app.get("/api/data/{meter_id}")
+async def get_meter_data(meter_id: str):
+    """Returns the latest stored sensor data and prediction for one meter."""
+    state = meter_registry.get(meter_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Meter {meter_id!r} has not reported.")
+    return state.to_dict()
+
+@app.get("/api/stream")
+async def stream_data(request: Request, meters: str = DEFAULT_METER_ID, zones: str = None,
+                      interval_ms: int = DEFAULT_INTERVAL_MS):
+    """
+    Server-Sent Events stream of live state, replacing /api/data polling.
+
+    Sends a ``snapshot`` event with the current state of the comma-separated
+    ``meters``, then a ``delta`` event whenever one of them updates, carrying
+    only the changed zones / prediction. ``zones`` limits the zones sent.
+    Updates arriving faster than ``interval_ms`` are coalesced to the latest.
+    """
+    meter_ids = [meter_id for meter_id in meters.split(",") if meter_id]
+    if not meter_ids or len(meter_ids) > MAX_BULK_IDS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_BULK_IDS} meters per stream.")
+    zone_names = [zone for zone in zones.split(",") if zone] if zones else None
+    subscription = Subscription(meter_ids, zone_names, max(interval_ms, MIN_INTERVAL_MS) / 1000.0)
+    live_hub.subscribe(subscription)
+
+    async def events():
+        try:
+            yield subscription.snapshot(meter_registry.get(meter_id) for meter_id in meter_ids)
+            async for frame in subscription.frames():
+                if await request.is_disconnected():
+                    break
+                yield frame
+        finally:
+            live_hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/stream/stats")
+async def stream_stats():
+    """Subscriber count and delivered / coalesced update totals for /api/stream."""
+    return live_hub.stats()
 
 @app.get("/api/model-info")
 def get_model_info():
@@ -105,90 +440,286 @@ def get_model_info():
     }
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# MODEL REGISTRY — hot-swap, shadow and canary versions without a restart
+# ═══════════════════════════════════════════════════════════════════════
+
+models = predictor.registry
+# When set, changes to /api/models need a matching X-Admin-Token header
+ADMIN_TOKEN = os.environ.get("POWERBYTE_ADMIN_TOKEN")
+MODEL_ROLES = ("standby", "active", "shadow", "canary")
+
+class ModelRequest(BaseModel):
+    version: str
+    file: str
+    role: str = "standby"
+    fraction: float = 0.1
+
+class ModelUpdate(BaseModel):
+    role: str
+    fraction: float = 0.1
+
+def _require_admin(request):
+    if ADMIN_TOKEN and not hmac.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token.")
+
+def _assign_role(version, role, fraction):
+    """Loads `version` and gives it `role`; runs on the CPU pool since loading warms the model up."""
+    if role == "active":
+        models.activate(version)
+    elif role == "shadow":
+        models.set_shadow(version)
+    elif role == "canary":
+        models.set_canary(version, fraction)
+    else:
+        models.load(version)
+        if models.shadow_version == version:
+            models.set_shadow(None)
+        if models.canary is not None and models.canary[0] == version:
+            models.set_canary(None, 0)
+
+async def _update_models(fn, *args):
+    try:
+        await run_cpu(fn, *args)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Model version {e.args[0]} not found.")
+    except (ValueError, ModelLoadError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return models.describe()
+
+@app.get("/api/models")
+async def list_models():
+    """Registered model versions, which one is active, and shadow / canary state."""
+    return models.describe()
+
+@app.post("/api/models")
+async def add_model(request: Request, model: ModelRequest):
+    """
+    Registers a model file from the model directory as a new version, loads
+    and warms it, then gives it a role: standby, active (atomic swap),
+    shadow, or canary for `fraction` of meters.
+    """
+    _require_admin(request)
+    if model.role not in MODEL_ROLES:
+        raise HTTPException(status_code=400, detail=f"role must be one of {list(MODEL_ROLES)}")
+    try:
+        models.register(model.version, model.file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        return await _update_models(_assign_role, model.version, model.role, model.fraction)
+    except HTTPException:
+        # Do not keep a version that never loaded
+        models.unload(model.version)
+        raise
+
+@app.patch("/api/models/{version}")
+async def update_model(request: Request, version: str, update: ModelUpdate):
+    """Changes the role of a registered version (e.g. promotes a canary to active)."""
+    _require_admin(request)
+    if update.role not in MODEL_ROLES:
+        raise HTTPException(status_code=400, detail=f"role must be one of {list(MODEL_ROLES)}")
+    return await _update_models(_assign_role, version, update.role, update.fraction)
+
+@app.post("/api/models/{version}/reload")
+async def reload_model(request: Request, version: str):
+    """Reloads a version from its file after it was overwritten; requests in flight finish on the old one."""
+    _require_admin(request)
+    return await _update_models(models.reload, version)
+
+@app.delete("/api/models/{version}")
+async def remove_model(request: Request, version: str):
+    """Unloads a version that is not active, shadow or canary."""
+    _require_admin(request)
+    try:
+        models.unload(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} not found.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return models.describe()
+
+
+# Rollups over persisted readings, least recently used first:
+# meter_id -> (readings_store.meter_version when built, Rollups)
+_ingested_rollups = OrderedDict()
+_ingested_rollups_lock = threading.Lock()
+MAX_INGESTED_ROLLUPS = 256
+
+def load_ingested_rollups(meter_id):
+    """Rollups over one meter's stored readings, rebuilt only after that meter's new writes."""
+    version = readings_store.meter_version(meter_id)
+    with _ingested_rollups_lock:
+        cached = _ingested_rollups.get(meter_id)
+        if cached is not None and cached[0] == version:
+            _ingested_rollups.move_to_end(meter_id)
+            return cached[1]
+
+    started = time.perf_counter()
+    hourly = readings_store.hourly_frame(meter_id, CO2_FACTOR)
+    if hourly.empty:
+        raise HTTPException(status_code=404, detail=f"No stored readings for meter {meter_id!r}.")
+    rollups = Rollups(hourly)
+    AGGREGATION_SECONDS.labels("rollups", "ingested").observe(time.perf_counter() - started)
+
+    with _ingested_rollups_lock:
+        _ingested_rollups[meter_id] = (version, rollups)
+        _ingested_rollups.move_to_end(meter_id)
+        while len(_ingested_rollups) > MAX_INGESTED_ROLLUPS:
+            _ingested_rollups.popitem(last=False)
+    return rollups
+
+async def current_rollups(source="csv", meter_id=DEFAULT_METER_ID):
+    """
+    Rollups for the requested source: the professional CSV or one meter's
+    stored readings. Only (re)builds are offloaded to the CPU pool.
+    """
+    if source == "ingested":
+        return await run_cpu(load_ingested_rollups, meter_id)
+    if source != "csv":
+        raise HTTPException(status_code=400, detail="source must be 'csv' or 'ingested'.")
+    rollups = professional_rollups.peek()
+    if rollups is None:
+        rollups = await run_cpu(load_rollups)
+    return rollups
+
+# Serialized historical responses, revalidated through dataset-version ETags;
+# sized by POWERBYTE_RESPONSE_CACHE
+historical_cache = response_cache.from_env()
+# Stored-reading versions restart at 0 with every process, so ETags over
+# them carry a per-process token as well
+_PROCESS_TOKEN = os.urandom(8).hex()
+
+def dataset_version(source="csv", meter_id=DEFAULT_METER_ID):
+    """
+    Cheap version token of a historical source that never loads the data:
+    the professional CSV's stat signature, or the version of the meter's
+    stored readings (which other meters' writes leave alone). None if the CSV
+    is missing.
+    """
+    if source == "ingested":
+        return (_PROCESS_TOKEN, readings_store.meter_version(meter_id))
+    if source != "csv":
+        raise HTTPException(status_code=400, detail="source must be 'csv' or 'ingested'.")
+    return professional_store.signature()
+
+async def cached_json(request, key, version, build):
+    """
+    Serves the JSON payload of ``await build()`` with an ETag for (key, version).
+
+    A matching If-None-Match gets a bodiless 304 and anything else the cached
+    bytes; build() only runs when the version has moved on, and its payload
+    is serialized by fast_json rather than jsonable_encoder.
+    """
+    if version is None:
+        return FastJSONResponse(await build())
+    etag = response_cache.make_etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": response_cache.CACHE_CONTROL}
+    if response_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = historical_cache.get(key, version)
+    if body is None:
+        body = fast_json.dumps(await build())
+        historical_cache.put(key, version, body)
+    return Response(body, media_type="application/json", headers=headers)
+
+# Row layouts of ?format=: a list of row dicts, or one array per field
+ROW_FORMATS = ("records", "columns")
+
+def _check_format(format):
+    if format not in ROW_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {ROW_FORMATS}.")
+    return format == "columns"
+
 @app.get("/api/historical/daily")
-def get_historical_daily(days: int = 90):
-    """Returns daily summary from the professional 3-month dataset."""
-    df = load_professional_data()
-    
-    # Aggregate hourly data to daily
-    daily = df.groupby("date").agg(
-        actual_kwh=("energy_kwh", "sum"),
-        cost_inr=("cost_rs", "sum"),
-        carbon_kg=("carbon_kg", "sum"),
-        peak_kwh=("energy_kwh", "max"),
-        hours_active=("energy_kwh", lambda x: (x > 0.2).sum()),
-        status_counts=("status", lambda x: (x != "low_usage").sum()),
-    ).reset_index()
-
-    # Generate predicted_kwh (simulated ML prediction with ~5-8% error)
-    import numpy as np
-    np.random.seed(42)
-    daily["predicted_kwh"] = (daily["actual_kwh"] * (1 + np.random.normal(0, 0.05, len(daily)))).round(2)
-
-    daily = daily.tail(days)
-    
-    return {
-        "days": len(daily),
-        "total_kwh": round(daily["actual_kwh"].sum(), 2),
-        "total_predicted_kwh": round(daily["predicted_kwh"].sum(), 2),
-        "total_cost": round(daily["cost_inr"].sum(), 2),
-        "total_carbon_kg": round(daily["carbon_kg"].sum(), 2),
-        "avg_daily_kwh": round(daily["actual_kwh"].mean(), 2),
-        "peak_daily_kwh": round(daily["actual_kwh"].max(), 2),
-        "data": daily.to_dict(orient="records")
-    }
+async def get_historical_daily(request: Request, days: int = 90, source: str = "csv",
+                               meter_id: str = DEFAULT_METER_ID, format: str = "records"):
+    """
+    Returns daily summary from the professional 3-month dataset or from stored readings.
 
-@app.get("/api/historical/weekly")
-def get_historical_weekly():
-    """Returns last 7 days of daily data for weekly chart."""
-    df = load_professional_data()
-    
-    daily = df.groupby("date").agg(
-        actual_kwh=("energy_kwh", "sum"),
-        cost_inr=("cost_rs", "sum"),
-        carbon_kg=("carbon_kg", "sum"),
-    ).reset_index().tail(7)
+    With ``format=columns`` the ``data`` rows come as ``{field: [values]}``.
+    """
+    columnar = _check_format(format)
+    async def build():
+        return (await current_rollups(source, meter_id)).daily_payload(days, columnar)
+    key = ("daily", source, meter_id, days, format)
+    return await cached_json(request, key, dataset_version(source, meter_id), build)
 
-    import numpy as np
-    np.random.seed(42)
-    daily["predicted_kwh"] = (daily["actual_kwh"] * (1 + np.random.normal(0, 0.05, len(daily)))).round(2)
+@app.get("/api/historical/weekly")
+async def get_historical_weekly(request: Request, by: str = "day", source: str = "csv",
+                                meter_id: str = DEFAULT_METER_ID):
+    """
+    Returns last 7 days of daily data for weekly chart.
 
-    return {
-        "labels": daily["date"].tolist(),
-        "actual_kwh": daily["actual_kwh"].round(2).tolist(),
-        "predicted_kwh": daily["predicted_kwh"].round(2).tolist(),
-        "cost_inr": daily["cost_inr"].round(2).tolist(),
-        "carbon_kg": daily["carbon_kg"].round(2).tolist(),
-    }
+    With ``by=iso_week`` returns ISO-week totals over the whole dataset instead.
+    """
+    async def build():
+        rollups = await current_rollups(source, meter_id)
+        if by == "iso_week":
+            return rollups.iso_weekly_payload
+        return rollups.weekly_payload
+    key = ("weekly", source, meter_id, "iso_week" if by == "iso_week" else "day")
+    return await cached_json(request, key, dataset_version(source, meter_id), build)
 
 @app.get("/api/historical/monthly")
-def get_historical_monthly():
+async def get_historical_monthly(request: Request, source: str = "csv", meter_id: str = DEFAULT_METER_ID):
     """Returns monthly aggregated data for last 3 months."""
-    df = load_professional_data()
-    df["date_parsed"] = pd.to_datetime(df["date"])
-    df["month"] = df["date_parsed"].dt.to_period("M").astype(str)
-    
-    monthly = df.groupby("month").agg(
-        total_kwh=("energy_kwh", "sum"),
-        total_cost=("cost_rs", "sum"),
-        total_carbon=("carbon_kg", "sum"),
-    ).reset_index()
-
-    import numpy as np
-    np.random.seed(42)
-    monthly["total_predicted_kwh"] = (monthly["total_kwh"] * (1 + np.random.normal(0, 0.03, len(monthly)))).round(2)
-
-    return {
-        "months": monthly["month"].tolist(),
-        "actual_kwh": monthly["total_kwh"].round(2).tolist(),
-        "predicted_kwh": monthly["total_predicted_kwh"].round(2).tolist(),
-        "cost_inr": monthly["total_cost"].round(2).tolist(),
-        "carbon_kg": monthly["total_carbon"].round(2).tolist(),
-    }
+    async def build():
+        return (await current_rollups(source, meter_id)).monthly_payload
+    return await cached_json(request, ("monthly", source, meter_id), dataset_version(source, meter_id), build)
 
 @app.get("/api/historical/devices")
-def get_device_usage():
+async def get_device_usage(request: Request):
     """Returns per-device energy usage breakdown from the professional dataset."""
+    async def build():
+        return await run_cpu(_device_usage)
+    return await cached_json(request, ("devices",), dataset_version(), build)
+
+@app.get("/api/historical/range")
+async def get_historical_range(request: Request, start: str = None, end: str = None, resolution: str = "day",
+                               metrics: str = None, aggregates: str = "sum,mean,max",
+                               dataset: str = "professional"):
+    """
+    Aggregates of any [start, end) range of the hourly datasets on a
+    ``15min``, ``hour``, ``day``, ``week`` or ``month`` grid.
+
+    ``dataset`` is ``professional`` or ``tx_rx``; ``metrics`` and
+    ``aggregates`` (``sum``, ``mean``, ``max``) are comma-separated. Every
+    bucket is answered from prefix sums and sparse tables in O(log n).
+    Values come as one array per metric and aggregate, parallel to ``buckets``.
+    """
+    if dataset not in RANGE_DATASETS:
+        raise HTTPException(status_code=400, detail=f"dataset must be one of {list(RANGE_DATASETS)}.")
+    engine, default_metrics = RANGE_DATASETS[dataset]
+    metric_names = tuple(m for m in metrics.split(",") if m) if metrics else default_metrics
+    aggregate_names = tuple(a for a in aggregates.split(",") if a)
+    try:
+        start_ts, end_ts = parse_time(start), parse_time(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def build():
+        index = engine.peek()
+        if index is None:
+            index = await run_cpu(load_range_index, engine)
+        started = time.perf_counter()
+        try:
+            payload = index.aggregate(start_ts, end_ts, resolution, metric_names, aggregate_names)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        AGGREGATION_SECONDS.labels("range_query", engine.store.name).observe(time.perf_counter() - started)
+        return {"dataset": dataset, **payload}
+
+    key = ("range", dataset, start_ts, end_ts, resolution, metric_names, aggregate_names)
+    return await cached_json(request, key, engine.store.signature(), build)
+
+@app.get("/api/historical/cache")
+async def get_historical_cache_stats():
+    """Entries, bytes and hit / miss counts of the historical response cache."""
+    return historical_cache.stats()
+
+def _device_usage():
     df = load_professional_data()
     
     # Device mapping from CSV columns to device names
@@ -232,59 +763,315 @@ def get_device_usage():
 class RealtimeDataPayload(BaseModel):
     timestamp: str
     data: dict
+    meter_id: str = DEFAULT_METER_ID
+
+# Scores RX against TX1 + TX2 on every offline-mode reading
+losses = loss_detector.LossDetector()
+
+def _ingest_realtime(meter_id, timestamp, record):
+    """
+    Records one offline-mode row (RX/TX1/TX2 kWh columns) as the meter's
+    latest state and scores it for energy loss. Shared by /api/realtime/data
+    and server-side replays.
+
+    Returns:
+        dict: The reading's loss score (see LossDetector.observe).
+    """
+    # Parse CSV data into zones format
+    rx_power = float(record.get("RX_kWh", 0)) * 1000  # Convert to watts
+    tx1_power = float(record.get("TX1_kWh", 0)) * 1000
+    tx2_power = float(record.get("TX2_kWh", 0)) * 1000
+
+    # The receiver sees the whole site's load
+    feature_store.observe(meter_id, timestamp, rx_power / 1000)
+    readings_store.append(
+        meter_id,
+        timestamp,
+        power_kw=rx_power / 1000,
+        rx_kw=rx_power / 1000,
+        tx1_kw=tx1_power / 1000,
+        tx2_kw=tx2_power / 1000,
+    )
+    loss = losses.observe(meter_id, timestamp, rx_power / 1000, tx1_power / 1000, tx2_power / 1000)
+    anomaly = anomalies.observe(meter_id, rx_power / 1000, anomaly_detector.hour_of_day(timestamp))
+
+    # Update latest sensor data
+    meter_registry.update(
+        meter_id,
+        zones={
+            "Main Receiver (RX)": {
+                "Power": rx_power,
+                "Status": "ON" if rx_power > 0 else "OFF"
+            },
+            "TX1": {
+                "Power": tx1_power,
+                "Status": "ON" if tx1_power > 0 else "OFF"
+            },
+            "TX2": {
+                "Power": tx2_power,
+                "Status": "ON" if tx2_power > 0 else "OFF"
+            }
+        },
+        prediction={
+            "predicted_power": (rx_power + tx1_power + tx2_power) / 3,
+            "timestamp": timestamp,
+            "anomaly": anomaly["status"] != "Normal",
+            "anomaly_score": anomaly["anomaly_score"],
+            "anomaly_status": anomaly["status"],
+            "energy_loss": {
+                "status": loss["status"],
+                "deviation_percent": loss["deviation_percent"],
+                "difference_w": round(loss["difference"] * 1000, 1),
+            },
+        },
+        timestamp=timestamp,
+    )
+    return loss
 
 @app.post("/api/realtime/data")
-def receive_realtime_data(payload: RealtimeDataPayload):
+async def receive_realtime_data(payload: RealtimeDataPayload):
     """
     Receives real-time per-second data from the offline CSV runner.
     
     Used for streaming 24-hour per-second data in offline mode.
     Updates the latest sensor data which is then used by the frontend.
     """
-    global latest_sensor_data
-    
     try:
         record = payload.data
-        
-        # Parse CSV data into zones format
-        rx_power = float(record.get("RX_kWh", 0)) * 1000  # Convert to watts
-        tx1_power = float(record.get("TX1_kWh", 0)) * 1000
-        tx2_power = float(record.get("TX2_kWh", 0)) * 1000
-        
-        # Update latest sensor data
-        latest_sensor_data = {
-            "zones": {
-                "Main Receiver (RX)": {
-                    "Power": rx_power,
-                    "Status": "ON" if rx_power > 0 else "OFF"
-                },
-                "TX1": {
-                    "Power": tx1_power,
-                    "Status": "ON" if tx1_power > 0 else "OFF"
-                },
-                "TX2": {
-                    "Power": tx2_power,
-                    "Status": "ON" if tx2_power > 0 else "OFF"
-                }
-            },
-            "prediction": {
-                "predicted_power": (rx_power + tx1_power + tx2_power) / 3,
-                "timestamp": payload.timestamp,
-                "anomaly": False
-            },
-            "timestamp": payload.timestamp
-        }
-        
+        loss = _ingest_realtime(payload.meter_id, payload.timestamp, record)
         return {
             "status": "success",
             "message": "Data received",
-            "data_point": record.get("time", "N/A")
+            "data_point": record.get("time", "N/A"),
+            "loss": loss,
         }
     
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# ═══════════════════════════════════════════════════════════════════════
+# Energy Loss Detection (RX vs TX1 + TX2)
+# ═══════════════════════════════════════════════════════════════════════
+
+@app.get("/api/loss/events")
+async def get_loss_events(meter_id: str = None, limit: int = 100):
+    """Most recent loss events (started / escalated / cleared), newest first."""
+    return {"events": losses.recent_events(meter_id, max(0, min(limit, loss_detector.MAX_EVENTS)))}
+
+@app.get("/api/loss/stats")
+async def get_loss_stats():
+    return losses.stats()
+
+@app.get("/api/loss/batch")
+async def get_loss_batch(request: Request):
+    """
+    Scores the whole TX1/TX2/RX dataset in one vectorized pass: status
+    counts, deviation statistics and every out-of-tolerance run.
+    """
+    async def build():
+        return await run_cpu(_batch_losses)
+    return await cached_json(request, ("loss_batch",), tx_rx_store.signature(), build)
+
+def _batch_losses():
+    try:
+        frame = tx_rx_store.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"{os.path.basename(TX_RX_CSV)} not found.")
+    started = time.perf_counter()
+    result = loss_detector.batch(frame)
+    AGGREGATION_SECONDS.labels("loss_batch", tx_rx_store.name).observe(time.perf_counter() - started)
+    return result
+
+@app.get("/api/loss/{meter_id}")
+async def get_meter_loss(meter_id: str):
+    """Windowed deviation statistics and current loss status of one meter."""
+    state = losses.state(meter_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Meter {meter_id!r} has no scored readings.")
+    return state
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Anomaly Detection (per-meter EWMA / hour-of-day baselines)
+# ═══════════════════════════════════════════════════════════════════════
+
+# Datasets scored by /api/anomaly/batch: name -> (store, scored column)
+ANOMALY_DATASETS = {
+    "professional": (professional_store, "energy_kwh"),
+    "tx_rx": (tx_rx_store, "RX_kWh"),
+}
+
+@app.get("/api/anomaly/stats")
+async def get_anomaly_stats():
+    """Meters tracked, detector state size and mean per-update latency."""
+    return anomalies.stats()
+
+@app.get("/api/anomaly/batch")
+async def get_anomaly_batch(request: Request, dataset: str = "professional", top: int = 20):
+    """
+    Scores a whole 3-month dataset in one vectorized pass, with the same
+    numbers the streaming detector gives reading by reading.
+    """
+    if dataset not in ANOMALY_DATASETS:
+        raise HTTPException(status_code=400, detail=f"dataset must be one of {list(ANOMALY_DATASETS)}.")
+    store, column = ANOMALY_DATASETS[dataset]
+    top = max(0, min(top, 1000))
+
+    async def build():
+        return {"dataset": dataset, **await run_cpu(_score_dataset, store, column, top)}
+    return await cached_json(request, ("anomaly_batch", dataset, top), store.signature(), build)
+
+def _score_dataset(store, column, top):
+    try:
+        frame = store.get()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"{os.path.basename(store.path)} not found.")
+    started = time.perf_counter()
+    result = anomaly_detector.score_frame(frame, column, top=top)
+    AGGREGATION_SECONDS.labels("anomaly_batch", store.name).observe(time.perf_counter() - started)
+    return result
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# Server-Side Replay (offline mode without the Node runner)
+# ═══════════════════════════════════════════════════════════════════════
+
+OFFLINE_CSV_NAME = "24hr_per_second_offline_mode_with_equipment.csv"
+
+# Replays push rows through the same path as /api/realtime/data
+replays = ReplayManager(_ingest_realtime)
+
+class ReplayRequest(BaseModel):
+    file: str = OFFLINE_CSV_NAME
+    meter_id: str = DEFAULT_METER_ID
+    speed: float = 1.0
+    start: int | str = 0
+
+class ReplayUpdate(BaseModel):
+    speed: float | None = None
+    seek: int | str | None = None
+    paused: bool | None = None
+
+def _replay_path(name):
+    """Resolves a dataset name (CSV or columnar directory) in DATA_DIR, then BASE_DIR."""
+    if os.path.basename(name) != name or name in ("", ".", ".."):
+        raise HTTPException(status_code=400, detail="file must be a dataset name, not a path")
+    for directory in (DATA_DIR, BASE_DIR):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    raise HTTPException(status_code=404, detail=f"Dataset {name} not found.")
+
+def _get_replay(replay_id):
+    replay = replays.get(replay_id)
+    if replay is None:
+        raise HTTPException(status_code=404, detail=f"Replay {replay_id} not found.")
+    return replay
+
+@app.post("/api/replays")
+async def start_replay(request: ReplayRequest):
+    """
+    Replays a per-second dataset into the live sensor state at 1x–1000x,
+    starting at a row index or an HH:MM:SS time.
+    """
+    path = _replay_path(request.file)
+    try:
+        # Opening a dataset may build its columnar cache
+        await run_cpu(replays.prepare, path)
+        replay = replays.start(path, request.meter_id, request.speed, request.start)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return replay.to_dict()
+
+@app.get("/api/replays")
+async def list_replays():
+    return {"replays": [replay.to_dict() for replay in replays.list()]}
+
+@app.get("/api/replays/{replay_id}")
+async def get_replay(replay_id: str):
+    return _get_replay(replay_id).to_dict()
+
+@app.patch("/api/replays/{replay_id}")
+async def update_replay(replay_id: str, update: ReplayUpdate):
+    """Changes speed, seeks (row index or HH:MM:SS) and/or pauses or resumes a replay."""
+    replay = _get_replay(replay_id)
+    try:
+        if update.speed is not None:
+            replay.set_speed(update.speed)
+        if update.seek is not None:
+            replay.seek(update.seek)
+        if update.paused is True:
+            replay.pause()
+        elif update.paused is False:
+            replay.resume()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return replay.to_dict()
+
+@app.delete("/api/replays/{replay_id}")
+async def stop_replay(replay_id: str):
+    replay = _get_replay(replay_id)
+    replays.remove(replay_id)
+    return replay.to_dict()
+
+
+# ═══════════════════════════════════════════════════════════════════════
+# METRICS — Prometheus text format at /metrics
+# ═══════════════════════════════════════════════════════════════════════
+
+# Request, inference and aggregation timings are recorded where they happen;
+# queue depths and cache counters are read from their owners at scrape time
+metrics_registry.callback(
+    "powerbyte_ingest_queue_depth", "Readings queued for the time-series writer.", "gauge",
+    lambda: readings_store.pending)
+metrics_registry.callback(
+    "powerbyte_ingest_written_total", "Readings written to the time-series store.", "counter",
+    lambda: readings_store.written)
+metrics_registry.callback(
+    "powerbyte_ingest_dropped_total", "Readings dropped because the writer queue was full.", "counter",
+    lambda: readings_store.dropped)
+metrics_registry.callback(
+    "powerbyte_cpu_pool_in_flight", "Jobs running or waiting on the CPU pool.", "gauge",
+    lambda: cpu.in_flight)
+metrics_registry.callback(
+    "powerbyte_cpu_pool_queue_depth", "Jobs waiting for a CPU pool worker.", "gauge",
+    lambda: cpu.queue_depth)
+metrics_registry.callback(
+    "powerbyte_cpu_pool_rejected_total", "Jobs rejected with 429 because the CPU pool was saturated.", "counter",
+    lambda: cpu.rejected)
+metrics_registry.callback(
+    "powerbyte_microbatch_pending", "Readings waiting for the next micro-batch (absent when disabled).", "gauge",
+    lambda: batcher.stats()["pending"] if batcher is not None else None)
+metrics_registry.callback(
+    "powerbyte_stream_subscribers", "Open /api/stream connections.", "gauge",
+    lambda: live_hub.stats()["subscribers"])
+metrics_registry.callback(
+    "powerbyte_response_cache_requests_total", "Historical response cache lookups by result.", "counter",
+    lambda: [(("hit",), historical_cache.hits), (("miss",), historical_cache.misses)], ("result",))
+metrics_registry.callback(
+    "powerbyte_response_cache_hit_ratio", "Share of historical response cache lookups that hit.", "gauge",
+    lambda: historical_cache.hits / max(historical_cache.hits + historical_cache.misses, 1))
+# Per-meter in-memory state, each map capped by POWERBYTE_MAX_METERS
+_METER_MAPS = {"registry": meter_registry, "features": feature_store, "losses": losses, "anomalies": anomalies}
+metrics_registry.callback(
+    "powerbyte_meters_tracked", "Meters held in memory, per map.", "gauge",
+    lambda: [((name,), len(owner)) for name, owner in _METER_MAPS.items()], ("map",))
+metrics_registry.callback(
+    "powerbyte_meters_evicted_total", "Least recently used meters dropped to stay within the cap, per map.", "counter",
+    lambda: [((name,), owner.evicted) for name, owner in _METER_MAPS.items()], ("map",))
+metrics_registry.callback(
+    "powerbyte_json_backend", "1 for the JSON encoder serving responses (orjson, or the slower stdlib json).",
+    "gauge", lambda: [((fast_json.BACKEND,), 1)], ("backend",))
+metrics_registry.callback(
+    "powerbyte_ready", "1 once warm-up finished and the model can serve.", "gauge",
+    lambda: int(warmup.ready))
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request, inference, dataset and queue metrics in the Prometheus text format."""
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
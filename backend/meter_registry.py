@@ -0,0 +1,110 @@
+"""
+Keyed registry of the latest sensor state and prediction per meter / site.
+
+Records are immutable once published: a write builds a new MeterState and
+swaps it into the dict, so readers never take a lock and never see a
+half-updated record. Writers to the same meter are serialized by one of a
+fixed set of striped locks, which keeps lock memory independent of the
+number of meters. An optional listener is called with every published
+record (main.py uses it to push live updates to dashboards). At most
+POWERBYTE_MAX_METERS meters are kept; the least recently updated one is
+dropped first (see meter_table.py).
+"""
+
+import threading
+import time
+
+from feature_store import DEFAULT_METER_ID
+from meter_table import MeterTable
+
+LOCK_STRIPES = 64
+
+
+class MeterState:
+    """Latest zones / prediction / timestamp reported by one meter."""
+
+    __slots__ = ("meter_id", "zones", "prediction", "timestamp", "updated_at")
+
+    def __init__(self, meter_id, zones, prediction, timestamp, updated_at):
+        self.meter_id = meter_id
+        self.zones = zones
+        self.prediction = prediction
+        self.timestamp = timestamp
+        self.updated_at = updated_at
+
+    def to_dict(self):
+        """Same shape the single-site /api/data response always had."""
+        return {
+            "zones": self.zones,
+            "prediction": self.prediction,
+            "timestamp": self.timestamp,
+        }
+
+
+class MeterRegistry:
+    """Thread-safe map of meter id -> MeterState."""
+
+    def __init__(self, listener=None, max_meters=None):
+        """
+        Args:
+            listener (callable, optional): listener(state) after each update.
+            max_meters (int, optional): Meter cap; POWERBYTE_MAX_METERS if omitted.
+        """
+        self._meters = MeterTable(max_meters)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.listener = listener
+
+    def __len__(self):
+        return len(self._meters)
+
+    def __contains__(self, meter_id):
+        return meter_id in self._meters
+
+    @property
+    def evicted(self):
+        return self._meters.evicted
+
+    def update(self, meter_id, **fields):
+        """
+        Publishes a new state for a meter, keeping fields that are not passed.
+
+        Args:
+            meter_id (str): Meter / site identifier.
+            **fields: Any of zones, prediction, timestamp.
+
+        Returns:
+            MeterState: The published record.
+        """
+        with self._locks[hash(meter_id) % LOCK_STRIPES]:
+            old = self._meters.get(meter_id)
+            state = MeterState(
+                meter_id,
+                fields.get("zones", old.zones if old else {}),
+                fields.get("prediction", old.prediction if old else {}),
+                fields.get("timestamp", old.timestamp if old else None),
+                time.time(),
+            )
+            self._meters.set(meter_id, state)
+        if self.listener is not None:
+            self.listener(state)
+        return state
+
+    def get(self, meter_id):
+        """Returns the meter's MeterState, or None if it never reported."""
+        return self._meters.get(meter_id)
+
+    def get_many(self, meter_ids):
+        """Returns {meter_id: state dict or None}, touching only the requested ids."""
+        meters = self._meters
+        result = {}
+        for meter_id in meter_ids:
+            state = meters.get(meter_id)
+            result[meter_id] = state.to_dict() if state is not None else None
+        return result
+
+    def snapshot(self, meter_id=DEFAULT_METER_ID):
+        """State dict for one meter, with empty defaults if it never reported."""
+        state = self._meters.get(meter_id)
+        if state is None:
+            return {"zones": {}, "prediction": {}, "timestamp": None}
+        return state.to_dict()
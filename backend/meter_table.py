@@ -0,0 +1,109 @@
+"""
+Bounded map of meter id -> per-meter state, shared by the meter registry,
+the feature store and the loss and anomaly detectors.
+
+Meter ids come from clients, so no per-meter map may grow without limit.
+A MeterTable is split into stripes by hash of the meter id, each an LRU
+with its own lock and an even share of max_meters. Adding a meter to a full
+stripe evicts that stripe's least recently written meter, so eviction is
+LRU per stripe rather than globally. Reads are plain dict lookups that
+neither lock nor reorder; a write locks only its meter's stripe, so writers
+to different meters rarely contend.
+
+Sizing is configurable through an environment variable:
+    POWERBYTE_MAX_METERS  meters kept per map (default 10000, 0 = unbounded)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_METERS = 10_000
+STRIPES = 64
+
+
+def max_meters_from_env():
+    """The per-map meter cap from POWERBYTE_MAX_METERS."""
+    value = os.environ.get("POWERBYTE_MAX_METERS")
+    return int(value) if value else DEFAULT_MAX_METERS
+
+
+class _Stripe:
+    """One LRU shard: meters oldest-written first, plus its lock."""
+
+    __slots__ = ("entries", "lock", "evicted")
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.evicted = 0
+
+
+class MeterTable:
+    """Striped LRU map of meter id -> state, capped at about max_meters entries."""
+
+    def __init__(self, max_meters=None, stripes=STRIPES):
+        """
+        Args:
+            max_meters (int, optional): Meters kept; from the environment if
+                omitted, unbounded if 0.
+            stripes (int): Shards; fewer when max_meters is smaller, so each
+                keeps at least one meter and the total stays within the cap.
+        """
+        self.max_meters = max_meters_from_env() if max_meters is None else max_meters
+        if self.max_meters > 0:
+            stripes = min(stripes, self.max_meters)
+            self._per_stripe = self.max_meters // stripes
+        else:
+            self._per_stripe = 0
+        self._stripes = [_Stripe() for _ in range(stripes)]
+
+    def _stripe(self, meter_id):
+        return self._stripes[hash(meter_id) % len(self._stripes)]
+
+    def __len__(self):
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+    def __contains__(self, meter_id):
+        return meter_id in self._stripe(meter_id).entries
+
+    @property
+    def evicted(self):
+        return sum(stripe.evicted for stripe in self._stripes)
+
+    def get(self, meter_id):
+        """The meter's state, or None; does not count as a use."""
+        return self._stripe(meter_id).entries.get(meter_id)
+
+    def values(self):
+        """Snapshot list of every meter's state."""
+        values = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                values.extend(stripe.entries.values())
+        return values
+
+    def get_or_create(self, meter_id, factory):
+        """The meter's state, created with factory() on first use; marks the meter as used."""
+        stripe = self._stripe(meter_id)
+        with stripe.lock:
+            state = stripe.entries.get(meter_id)
+            if state is None:
+                state = stripe.entries[meter_id] = factory()
+                self._evict(stripe)
+            else:
+                stripe.entries.move_to_end(meter_id)
+            return state
+
+    def set(self, meter_id, state):
+        """Stores `state` for the meter, replacing any older one; marks the meter as used."""
+        stripe = self._stripe(meter_id)
+        with stripe.lock:
+            stripe.entries[meter_id] = state
+            stripe.entries.move_to_end(meter_id)
+            self._evict(stripe)
+
+    def _evict(self, stripe):
+        while 0 < self._per_stripe < len(stripe.entries):
+            stripe.entries.popitem(last=False)
+            stripe.evicted += 1
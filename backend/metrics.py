@@ -0,0 +1,352 @@
+"""
+In-process metrics in the Prometheus text exposition format, with no
+client library and no external service.
+
+Counters and histograms keep one value list per writing thread. A thread
+only ever writes its own list, so recording is a plain in-place add, with
+no lock and no contended cache line. A scrape sums the lists of every
+thread. Recording costs about a microsecond. Only the first use of a metric
+on a new thread, and the first use of a new label set, take a lock.
+
+Values that components already track (queue depths, cache hits) are not
+duplicated. A CallbackMetric reads them from the component at scrape time.
+
+    REGISTRY.counter(name, help, labelnames)    .labels(*values).inc(amount)
+    REGISTRY.histogram(name, help, labelnames)  .labels(*values).observe(seconds)
+    REGISTRY.callback(name, help, kind, fn)     fn() -> value or [(labels, value)]
+    REGISTRY.render()                           text for GET /metrics
+
+MetricsMiddleware records per-route request counts, errors and latency for
+an ASGI app.
+"""
+
+import asyncio
+import bisect
+import math
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# nginx's code for a request the client gave up on before the response started
+CLIENT_CLOSED = 499
+# Seconds; from fast in-memory paths up to slow dataset rebuilds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ThreadCells:
+    """Fixed-size value lists, one per writing thread, summed on read."""
+
+    __slots__ = ("size", "_local", "_cells", "_lock")
+
+    def __init__(self, size):
+        self.size = size
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+
+    def cell(self):
+        """This thread's list; created (under the lock) on the thread's first write."""
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0] * self.size
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def totals(self):
+        with self._lock:
+            cells = list(self._cells)
+        totals = [0] * self.size
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class CounterChild:
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+
+    def inc(self, amount=1):
+        self._cells.cell()[0] += amount
+
+    @property
+    def value(self):
+        return self._cells.totals()[0]
+
+
+class HistogramChild:
+    __slots__ = ("bounds", "_cells")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        # One count per bucket, one for +Inf, then the running sum
+        self._cells = _ThreadCells(len(bounds) + 2)
+
+    def observe(self, value):
+        cell = self._cells.cell()
+        cell[bisect.bisect_left(self.bounds, value)] += 1
+        cell[-1] += value
+
+    def snapshot(self):
+        """(cumulative bucket counts incl. +Inf, count, sum)."""
+        totals = self._cells.totals()
+        cumulative, running = [], 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(int(value))
+
+
+class _Family:
+    """A named metric with one child per label-value tuple."""
+
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """The child for these label values (in labelnames order), created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount=1):
+        """Increments the unlabelled counter."""
+        self.labels().inc(amount)
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self._children.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}")
+        return lines
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.bounds)
+
+    def observe(self, value):
+        """Records into the unlabelled histogram."""
+        self.labels().observe(value)
+
+    def render(self):
+        lines = self._header()
+        for values, child in list(self._children.items()):
+            cumulative, count, total = child.snapshot()
+            for bound, running in zip(self.bounds + (math.inf,), cumulative):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, ('le', _number(float(bound))))} {running}")
+            labels = _labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_number(float(total))}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """A gauge or counter read from its owner at scrape time."""
+
+    def __init__(self, name, help, kind, fn, labelnames=()):
+        """
+        Args:
+            kind (str): "gauge" or "counter".
+            fn (callable): Returns a number, or (label values, number) pairs
+                when `labelnames` is given.
+        """
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            samples = self.fn()
+        except Exception as e:
+            # One broken source must not fail the whole scrape
+            return [f"# {self.name} unavailable: {_escape(e)}"]
+        if not self.labelnames:
+            samples = [((), samples)]
+        for values, value in samples:
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.labelnames, values)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    """Metrics by name, rendered together in registration order."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        Adds `metric`, or returns the one already registered under its name
+        if that has the same type and labels (e.g. when an app rebuilds its
+        middleware stack).
+
+        Raises:
+            ValueError: If the name is taken by a different metric.
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is None:
+                self._metrics[metric.name] = metric
+                return metric
+        if type(existing) is type(metric) and existing.labelnames == metric.labelnames:
+            return existing
+        raise ValueError(f"Metric {metric.name} is already registered with another type or labels")
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, kind, fn, labelnames=()):
+        return self.register(CallbackMetric(name, help, kind, fn, labelnames))
+
+    def render(self):
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry; modules register their metrics at import
+REGISTRY = Registry()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording, per route template and method, request
+    counts by status, 5xx / unhandled-exception counts, and latency up to the
+    response start (so long-lived streams report time to first byte).
+
+    A request that was cancelled or whose client disconnected before the
+    response started is counted as status 499, not as an error, and adds
+    nothing to the latency histogram.
+    """
+
+    def __init__(self, app, registry=REGISTRY):
+        self.app = app
+        self.requests = registry.counter(
+            "powerbyte_http_requests_total", "HTTP requests by route, method and status.",
+            ("route", "method", "status"))
+        self.errors = registry.counter(
+            "powerbyte_http_request_errors_total", "HTTP requests answered 5xx or failed with an exception.",
+            ("route", "method"))
+        self.latency = registry.histogram(
+            "powerbyte_http_request_duration_seconds", "Time from request to response start.",
+            ("route", "method"))
+        # (route, method, status) -> the children above, so a request costs one lookup
+        self._children = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = None
+        disconnected = False
+
+        async def receive_wrapper():
+            nonlocal disconnected
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected = True
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                self._record(scope, status, time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except BaseException as e:
+            if status is None:
+                if disconnected or isinstance(e, asyncio.CancelledError):
+                    self._record(scope, CLIENT_CLOSED, None)
+                else:
+                    self._record(scope, 500, time.perf_counter() - started)
+            raise
+        if status is None and disconnected:
+            self._record(scope, CLIENT_CLOSED, None)
+
+    def _record(self, scope, status, elapsed):
+        # The route template (e.g. /api/data/{meter_id}) keeps label values bounded
+        route = scope.get("route")
+        key = (getattr(route, "path", None) or "unmatched", scope["method"], status)
+        children = self._children.get(key)
+        if children is None:
+            path, method = key[0], key[1]
+            children = self._children.setdefault(key, (
+                self.requests.labels(path, method, str(status)),
+                self.errors.labels(path, method) if status >= 500 else None,
+                self.latency.labels(path, method),
+            ))
+        requests, errors, latency = children
+        requests.inc()
+        if errors is not None:
+            errors.inc()
+        if elapsed is not None:
+            latency.observe(elapsed)
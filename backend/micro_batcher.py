@@ -0,0 +1,147 @@
+"""
+Micro-batching scheduler that coalesces concurrent /api/predict calls.
+
+Callers submit one reading and await a future. Pending readings are flushed
+as one vectorized PowerBytePredictor.predict_many call as soon as
+max_batch_size readings are waiting, or max_wait_ms after the first one
+arrived, whichever comes first. Every caller then gets its own result. If
+the batch call fails, its readings are retried one at a time, so only the
+callers whose reading fails on its own get the error.
+
+Configured through environment variables:
+    POWERBYTE_MICROBATCH          "1" to enable batching of /api/predict
+    POWERBYTE_BATCH_MAX_SIZE      readings per model call (default 64)
+    POWERBYTE_BATCH_MAX_WAIT_MS   longest a reading waits for company (default 2)
+"""
+
+import asyncio
+import os
+
+
+class MicroBatcher:
+    """Collects readings on one event loop and predicts them in batches."""
+
+    def __init__(self, predict_many, runner, max_batch_size=64, max_wait_ms=2.0):
+        """
+        Args:
+            predict_many (callable): list of readings -> list of results.
+            runner (coroutine function): runner(fn, *args) runs fn off the event loop.
+            max_batch_size (int): Flush as soon as this many readings are pending.
+            max_wait_ms (float): Flush at the latest this long after the first pending reading.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_many = predict_many
+        self.runner = runner
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending = []
+        self._timer = None
+        # Running batches; the loop only keeps weak references to tasks
+        self._tasks = set()
+        # Batch-size histogram with power-of-two upper bounds: {1: n, 2: n, 4: n, ...}
+        self.histogram = {}
+        bound = 1
+        while bound < max_batch_size:
+            self.histogram[bound] = 0
+            bound *= 2
+        self.histogram[max_batch_size] = 0
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, reading):
+        """Queues one reading and returns its prediction once its batch has run."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((reading, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._record(len(batch))
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        try:
+            results = await self.runner(self._predict_isolated, [reading for reading, _ in batch])
+        except asyncio.CancelledError:
+            # e.g. loop shutdown; the callers must not wait forever
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _predict_isolated(self, readings):
+        """
+        predict_many over the whole batch or, if that fails, over each
+        reading alone, so one bad reading does not fail the others. A reading
+        that still fails gets its exception as its result.
+        """
+        try:
+            return self.predict_many(readings)
+        except Exception:
+            if len(readings) == 1:
+                raise
+        results = []
+        for reading in readings:
+            try:
+                results.append(self.predict_many([reading])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _record(self, size):
+        self.batches += 1
+        self.items += size
+        for bound in self.histogram:
+            if size <= bound:
+                self.histogram[bound] += 1
+                break
+
+    def stats(self):
+        """Knobs, totals and the batch-size histogram."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending": len(self._pending),
+            "running": len(self._tasks),
+            "batch_size_histogram": {f"le_{bound}": count for bound, count in self.histogram.items()},
+        }
+
+
+def from_env(predict_many, runner):
+    """Returns a MicroBatcher configured from the environment, or None if disabled."""
+    if os.environ.get("POWERBYTE_MICROBATCH", "0") != "1":
+        return None
+    return MicroBatcher(
+        predict_many,
+        runner,
+        max_batch_size=int(os.environ.get("POWERBYTE_BATCH_MAX_SIZE", "64")),
+        max_wait_ms=float(os.environ.get("POWERBYTE_BATCH_MAX_WAIT_MS", "2")),
+    )
@@ -1,56 +1,259 @@
-import xgboost as xgb
 import pandas as pd
 import numpy as np
 import datetime
 import os
+import threading
+import time
+
+from anomaly_detector import AnomalyDetector, hour_of_day
+from feature_store import DEFAULT_METER_ID, FeatureStore
+import model_registry
+from metrics import REGISTRY
+from model_registry import ModelLoadError, ModelRegistry
+
+# Column order the XGBoost model was trained with
+FEATURE_COLUMNS = [
+    'Global_intensity', 'Voltage', 'Global_reactive_power',
+    'hour', 'dayofweek', 'month',
+    'lag_1h', 'lag_24h', 'lag_7d', 'rolling_mean_4h',
+]
+
+HISTORICAL_FEATURES = ['lag_1h', 'lag_24h', 'lag_7d', 'rolling_mean_4h']
+
+# "standard" predicts through a one-row DataFrame and the sklearn wrapper;
+# "fast" calls Booster.inplace_predict on a reused NumPy row buffer.
+INFERENCE_MODES = ("standard", "fast")
+
+INFERENCE_SECONDS = REGISTRY.histogram(
+    "powerbyte_inference_seconds",
+    "Inference time by stage (features: feature assembly, predict: model call, shadow, anomaly) "
+    "and path (single: one reading, batch: predict_many).",
+    ("stage", "path"),
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+# Bound once: these are recorded on every prediction
+_SINGLE = {stage: INFERENCE_SECONDS.labels(stage, "single") for stage in ("features", "predict", "shadow", "anomaly")}
+_BATCH = {stage: INFERENCE_SECONDS.labels(stage, "batch") for stage in ("features", "predict", "shadow", "anomaly")}
 
 class PowerBytePredictor:
-    def __init__(self, model_path="powerbyte_xgboost.json"):
-        self.model = None
-        self.model_path = model_path
-        self.load_model()
+    def __init__(self, model_path=None, inference_mode="standard", feature_store=None,
+                 anomaly_detector=None, registry=None):
+        """
+        Args:
+            model_path (str, optional): Model file for a private registry;
+                ignored when `registry` is given.
+            registry (ModelRegistry, optional): Source of the active, shadow
+                and canary models. Models load lazily, on first use.
+        """
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference mode {inference_mode!r}, expected one of {INFERENCE_MODES}")
+        if registry is None:
+            model_path = model_path or model_registry.DEFAULT_MODEL_FILE
+            registry = ModelRegistry(os.path.dirname(model_path), FEATURE_COLUMNS, os.path.basename(model_path))
+        self.registry = registry
+        self.inference_mode = inference_mode
+        # Source of lag_1h / lag_24h / lag_7d / rolling_mean_4h per meter
+        self.feature_store = feature_store if feature_store is not None else FeatureStore()
+        # Per-meter EWMA / hour-of-day baselines behind anomaly_score and status
+        self.anomaly_detector = anomaly_detector if anomaly_detector is not None else AnomalyDetector()
+        # Per-thread (1, n_features) float32 buffers for the fast path
+        self._buffers = threading.local()
+
+    @property
+    def model(self):
+        """The active XGBRegressor (loaded on first access), or None if it cannot be loaded."""
+        loaded = self.registry.active()
+        return loaded.model if loaded is not None else None
+
+    @property
+    def feature_order(self):
+        loaded = self.registry.active()
+        return loaded.feature_order if loaded is not None else list(FEATURE_COLUMNS)
 
     def load_model(self):
-        """Loads the XGBoost model from the file."""
+        """(Re)loads the active model from its file now rather than on first use."""
         try:
-            if not os.path.exists(self.model_path):
-                print(f"Error: Model file not found at {self.model_path}")
-                return
-
-            self.model = xgb.XGBRegressor()
-            self.model.load_model(self.model_path)
+            self.registry.reload()
             print("Model loaded successfully.")
+            return True
+        except ModelLoadError as e:
+            print(f"Error: {e}")
+            return False
+
+    def _get_historical_features(self, live_data):
+        """
+        Looks up the lag and rolling-mean features for the reading's meter, as
+        of the reading's hour. The reading itself is only recorded once its
+        prediction succeeded (see main.py).
+
+        A meter without history falls back to the reading's own active power.
+        """
+        meter_id = live_data.get('meter_id', DEFAULT_METER_ID)
+        self.feature_store.advance(meter_id, live_data.get('timestamp'))
+        fallback = live_data.get('voltage', 0.0) * live_data.get('intensity', 0.0) / 1000.0
+        return self.feature_store.features(meter_id, fallback)
+
+    def _score_anomaly(self, live_data, hour):
+        """
+        Scores the reading's active power against its meter's baseline (and
+        updates it). The hour-of-day baseline is the one of the reading's own
+        'timestamp' when it has one, else `hour`.
+        """
+        if live_data.get('timestamp') is not None:
+            hour = hour_of_day(live_data['timestamp'])
+        power_kw = live_data.get('voltage', 0.0) * live_data.get('intensity', 0.0) / 1000.0
+        return self.anomaly_detector.observe(live_data.get('meter_id', DEFAULT_METER_ID), power_kw, hour)
+
+    def build_feature_matrix(self, readings, now=None, feature_order=None):
+        """
+        Assembles a C-contiguous float32 feature matrix in the model's column order.
+
+        Args:
+            readings (list[dict]): Each with 'voltage', 'intensity', 'reactive_power'
+                and optionally 'meter_id'.
+            now (datetime.datetime, optional): Time used for the calendar features.
+            feature_order (list, optional): Column order; the active model's by default.
+
+        Returns:
+            np.ndarray: Shape (len(readings), len(feature_order)).
+        """
+        now = now or datetime.datetime.now()
+        feature_order = feature_order or self.feature_order
+        n = len(readings)
+        index = {name: i for i, name in enumerate(feature_order)}
+        matrix = np.empty((n, len(feature_order)), dtype=np.float32)
+
+        matrix[:, index['Global_intensity']] = [r.get('intensity', 0.0) for r in readings]
+        matrix[:, index['Voltage']] = [r.get('voltage', 0.0) for r in readings]
+        matrix[:, index['Global_reactive_power']] = [r.get('reactive_power', 0.0) for r in readings]
+        matrix[:, index['hour']] = now.hour
+        matrix[:, index['dayofweek']] = now.weekday()
+        matrix[:, index['month']] = now.month
+
+        historical = [self._get_historical_features(r) for r in readings]
+        for name in HISTORICAL_FEATURES:
+            matrix[:, index[name]] = [h[name] for h in historical]
+        return matrix
+
+    def predict_many(self, readings):
+        """
+        Predicts N live readings with a single model call per serving model.
+
+        Args:
+            readings (list[dict]): Each with 'voltage', 'intensity', 'reactive_power'
+                and optionally 'meter_id' and 'timestamp'.
+
+        Returns:
+            list[dict]: One { "predicted_power", "anomaly_score", "status", "model_version" } per reading.
+        """
+        if not readings:
+            return []
+        # Canary meters are served by another version; group readings by model
+        groups = {}
+        for i, reading in enumerate(readings):
+            loaded = self.registry.for_meter(reading.get('meter_id', DEFAULT_METER_ID))
+            if loaded is None:
+                raise RuntimeError("Model not loaded")
+            groups.setdefault(loaded, []).append(i)
+
+        now = datetime.datetime.now()
+        predictions = np.empty(len(readings), dtype=np.float64)
+        versions = [None] * len(readings)
+        for loaded, indices in groups.items():
+            started = time.perf_counter()
+            matrix = self.build_feature_matrix([readings[i] for i in indices], now, loaded.feature_order)
+            assembled = time.perf_counter()
+            predictions[indices] = loaded.model.predict(matrix)
+            _BATCH["features"].observe(assembled - started)
+            _BATCH["predict"].observe(time.perf_counter() - assembled)
+            for i in indices:
+                versions[i] = loaded.version
+
+        shadow = self.registry.shadow()
+        if shadow is not None:
+            started = time.perf_counter()
+            self._shadow_score(shadow, lambda: shadow.model.predict(
+                self.build_feature_matrix(readings, now, shadow.feature_order)), predictions)
+            _BATCH["shadow"].observe(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        results = []
+        for reading, prediction, version in zip(readings, predictions.tolist(), versions):
+            anomaly = self._score_anomaly(reading, now.hour)
+            results.append({
+                "predicted_power": float(prediction),
+                "anomaly_score": anomaly["anomaly_score"],
+                "status": anomaly["status"],
+                "model_version": version,
+            })
+        _BATCH["anomaly"].observe(time.perf_counter() - started)
+        return results
+
+    def _shadow_score(self, shadow, predict, served):
+        """Runs the shadow model and records how far it is from what was served."""
+        stats = self.registry.shadow_stats
+        if stats is None:
+            return
+        try:
+            for active, candidate in zip(np.atleast_1d(served).tolist(), np.atleast_1d(predict()).tolist()):
+                stats.record(active, candidate)
         except Exception as e:
-            print(f"Error loading model: {e}")
-            self.model = None
+            stats.errors += 1
+            print(f"Error in shadow model {shadow.version}: {e}")
+
+    def _fast_predict_row(self, input_data, loaded):
+        """
+        Predicts one row straight from the model's Booster, skipping pandas.
+
+        Fills this thread's preallocated float32 buffer in the model's column
+        order; the float32 cast matches what DMatrix does for the DataFrame
+        path, so results are bit-identical.
+        """
+        rows = getattr(self._buffers, "rows", None)
+        if rows is None:
+            rows = self._buffers.rows = {}
+        order = loaded.feature_order
+        row = rows.get(len(order))
+        if row is None:
+            row = rows[len(order)] = np.empty((1, len(order)), dtype=np.float32)
+        for i, name in enumerate(order):
+            row[0, i] = input_data[name][0]
+        return loaded.booster.inplace_predict(row)[0]
 
-    def _get_mock_historical_features(self):
+    def predict_frame(self, features):
         """
-        Mocks fetching historical data for lag features.
-        In a real scenario, this would query a database.
+        Predicts a whole feature table with a single model call.
+
+        Args:
+            features (pd.DataFrame): One row per sample, containing FEATURE_COLUMNS.
+
+        Returns:
+            np.ndarray: Predicted active power (kW), one value per row.
         """
-        # Generating plausible random values based on typical sensor ranges
-        return {
-            "lag_1h": np.random.uniform(0.5, 2.5),
-            "lag_24h": np.random.uniform(0.5, 2.5),
-            "lag_7d": np.random.uniform(0.5, 2.5),
-            "rolling_mean_4h": np.random.uniform(0.5, 2.5)
-        }
+        model = self.model
+        if not model:
+            raise RuntimeError("Model not loaded")
+        return model.predict(features[FEATURE_COLUMNS])
 
     def preprocess_and_predict(self, live_data):
         """
         Preprocesses live data and returns a prediction.
         
         Args:
-            live_data (dict): Dictionary containing 'voltage', 'intensity', 'reactive_power'.
+            live_data (dict): Dictionary containing 'voltage', 'intensity', 'reactive_power'
+                and optionally 'meter_id' and 'timestamp'.
             
         Returns:
-            dict: { "predicted_power": float, "anomaly_score": float, "status": str }
+            dict: { "predicted_power": float, "anomaly_score": float, "status": str,
+                "model_version": str }
         """
-        if not self.model:
+        # One model for the whole call, even if a new version is swapped in meanwhile
+        loaded = self.registry.for_meter(live_data.get('meter_id', DEFAULT_METER_ID))
+        if loaded is None:
             return {"error": "Model not loaded"}
 
         try:
+            started = time.perf_counter()
             # 1. Extract Live Features
             global_intensity = live_data.get('intensity', 0.0)
             voltage = live_data.get('voltage', 0.0)
@@ -62,8 +265,8 @@ class PowerBytePredictor:
             dayofweek = now.weekday()  # 0=Monday, 6=Sunday
             month = now.month
             
-            # 3. Get (Mock) Historical Features
-            historical_features = self._get_mock_historical_features()
+            # 3. Get Historical Features from the per-meter feature store
+            historical_features = self._get_historical_features(live_data)
             
             # 4. Construct DataFrame with EXACT columns expected by the model
             input_data = {
@@ -79,25 +282,34 @@ class PowerBytePredictor:
                 'rolling_mean_4h': [historical_features['rolling_mean_4h']]
             }
             
-            df = pd.DataFrame(input_data)
-            
             # 5. Predict
-            prediction = self.model.predict(df)[0]
+            if self.inference_mode == "fast":
+                assembled = time.perf_counter()
+                prediction = self._fast_predict_row(input_data, loaded)
+            else:
+                df = pd.DataFrame(input_data)
+                assembled = time.perf_counter()
+                prediction = loaded.model.predict(df)[0]
+            predicted = time.perf_counter()
+            _SINGLE["features"].observe(assembled - started)
+            _SINGLE["predict"].observe(predicted - assembled)
+
+            shadow = self.registry.shadow()
+            if shadow is not None:
+                self._shadow_score(shadow, lambda: self._fast_predict_row(input_data, shadow), prediction)
+                _SINGLE["shadow"].observe(time.perf_counter() - predicted)
             
-            # 6. Basic Anomaly Logic (Threshold-based for demo)
-            # If prediction is significantly higher than input intensity (simplified logic)
-            # You might want a more sophisticated anomaly detection here.
-            anomaly_score = abs(prediction - global_intensity) / (global_intensity + 0.1)
-            status = "Normal"
-            if anomaly_score > 0.5: # Arbitrary threshold for demo
-                status = "Warning"
-            if anomaly_score > 1.0:
-                status = "Critical"
+            # 6. Anomaly score: the reading's z-score against the meter's own
+            # EWMA / hour-of-day baseline (see anomaly_detector.py)
+            started = time.perf_counter()
+            anomaly = self._score_anomaly(live_data, hour)
+            _SINGLE["anomaly"].observe(time.perf_counter() - started)
 
             return {
                 "predicted_power": float(prediction),
-                "anomaly_score": float(anomaly_score),
-                "status": status,
+                "anomaly_score": anomaly["anomaly_score"],
+                "status": anomaly["status"],
+                "model_version": loaded.version,
                 "input_features": input_data # useful for debugging
             }
 
@@ -105,5 +317,8 @@ class PowerBytePredictor:
             print(f"Error during prediction: {e}")
             return {"error": str(e)}
 
-# Singleton instance for easy import
-predictor = PowerBytePredictor()
+# Singleton instance for easy import; its model loads on first use
+predictor = PowerBytePredictor(
+    inference_mode=os.environ.get("POWERBYTE_INFERENCE_MODE", "standard"),
+    registry=model_registry.from_env(FEATURE_COLUMNS),
+)
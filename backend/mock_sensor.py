@@ -1,131 +1,273 @@
-import time
+#!/usr/bin/env python3
+"""
+Mock PowerByte sensors posting to /api/predict.
+
+Simulates any number of independent meters, each with its own voltage
+random walk and device readings, over one pooled keep-alive HTTP client on
+an asyncio loop. Sends are open-loop: every meter fires on its own fixed
+schedule whether or not earlier requests have returned, so a slow server
+shows up as latency instead of silently lowering the request rate. Latency
+is measured from each request's scheduled send time.
+
+Usage (with the API running: uvicorn main:app --port 8000):
+    python mock_sensor.py                                  # one meter every 2 s, like before
+    python mock_sensor.py --meters 5000 --rate 2000 --duration 60
+"""
+
+import argparse
+import asyncio
+import datetime
 import random
-import requests
 import sys
-import datetime
+import time
+
+import httpx
+import numpy as np
+
+from equipment import devices_on_line
 
 # Configuration
 API_URL = "http://localhost:8000/api/predict"
-SEND_INTERVAL = 2  # Seconds
+SEND_INTERVAL = 2  # Seconds between readings of one meter
 
 # Device definitions matching Account page exactly
-# TX1 devices
-TX1_DEVICES = {
-    "Heater": 2000,
-    "Bulb 100W": 100,
-    "Bulb 60W": 60,
-}
-
-# TX2 devices
-TX2_DEVICES = {
-    "Motor DC 220V": 1500,
-    "Motor AC Induction 2HP": 1492,
-    "RD_PC Power Consumption": 220,
-}
+TX1_DEVICES = devices_on_line("TX1")
+TX2_DEVICES = devices_on_line("TX2")
 
 ALL_DEVICES = {**TX1_DEVICES, **TX2_DEVICES}
-base_voltage = 230.0
 
-def generate_device_data():
-    """Generates realistic sensor data for all devices."""
-    global base_voltage
+
+class SimulatedMeter:
+    """One meter's state: an id, its own random stream and voltage walk."""
+
+    __slots__ = ("meter_id", "voltage", "rng")
+
+    def __init__(self, meter_id, seed=None):
+        self.meter_id = meter_id
+        self.voltage = 230.0
+        self.rng = random.Random(seed)
+
+
+_default_meter = SimulatedMeter("default")
+
+
+def generate_device_data(meter=None):
+    """Generates realistic sensor data for all devices of one meter."""
+    meter = meter or _default_meter
+    rng = meter.rng
 
     # Voltage drift (Brownian Motion around 230V)
-    drift = random.uniform(-0.5, 0.5)
-    base_voltage += drift
-    if base_voltage > 240: base_voltage -= 1.0
-    if base_voltage < 220: base_voltage += 1.0
-
-    tx1_devices = {}
-    tx2_devices = {}
-    tx1_current = 0
-    tx2_current = 0
-
-    for device_name, rated_power in TX1_DEVICES.items():
-        # Fluctuate power realistically (+/- 2%)
-        power = rated_power * random.uniform(0.98, 1.02)
-        current = power / base_voltage
-        tx1_current += current
-
-        tx1_devices[device_name] = {
-            "Internal_Voltage": round(base_voltage, 1),
-            "Current": round(current, 2),
-            "ActivePower": round(power, 2),
-            "Status": "ON",
-            "Temperature": round(random.uniform(30, 40), 1)
-        }
+    meter.voltage += rng.uniform(-0.5, 0.5)
+    if meter.voltage > 240: meter.voltage -= 1.0
+    if meter.voltage < 220: meter.voltage += 1.0
+    base_voltage = meter.voltage
+
+    zones = {}
+    total_current = 0
+    for zone, devices in (("TX1", TX1_DEVICES), ("TX2", TX2_DEVICES)):
+        zone_devices = {}
+        zone_current = 0
+        for device_name, rated_power in devices.items():
+            # Fluctuate power realistically (+/- 2%)
+            power = rated_power * rng.uniform(0.98, 1.02)
+            current = power / base_voltage
+            zone_current += current
 
-    for device_name, rated_power in TX2_DEVICES.items():
-        power = rated_power * random.uniform(0.98, 1.02)
-        current = power / base_voltage
-        tx2_current += current
-
-        tx2_devices[device_name] = {
-            "Internal_Voltage": round(base_voltage, 1),
-            "Current": round(current, 2),
-            "ActivePower": round(power, 2),
-            "Status": "ON",
-            "Temperature": round(random.uniform(30, 40), 1)
+            zone_devices[device_name] = {
+                "Internal_Voltage": round(base_voltage, 1),
+                "Current": round(current, 2),
+                "ActivePower": round(power, 2),
+                "Status": "ON",
+                "Temperature": round(rng.uniform(30, 40), 1)
+            }
+        zones[zone] = {
+            "Voltage": round(base_voltage, 1),
+            "Total_Current": round(zone_current, 2),
+            "Devices": zone_devices
         }
+        total_current += zone_current
+
+    return {**zones, "total_current": total_current}
 
-    total_current = tx1_current + tx2_current
 
+def build_payload(meter):
+    """One /api/predict payload for a meter."""
+    result = generate_device_data(meter)
+    global_intensity = result["total_current"]
+    global_reactive = meter.rng.uniform(0.1, 0.5) * global_intensity
     return {
-        "TX1": {
-            "Voltage": round(base_voltage, 1),
-            "Total_Current": round(tx1_current, 2),
-            "Devices": tx1_devices
-        },
-        "TX2": {
-            "Voltage": round(base_voltage, 1),
-            "Total_Current": round(tx2_current, 2),
-            "Devices": tx2_devices
-        },
-        "total_current": total_current
+        "meter_id": meter.meter_id,
+        "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Global_intensity": round(global_intensity, 2),
+        "Global_reactive_power": round(global_reactive, 2),
+        "zones": {
+            "TX1": result["TX1"],
+            "TX2": result["TX2"],
+        }
     }
 
-def main():
-    print(f"--- PowerByte Mock Sensor Started ---")
-    print(f"Target API: {API_URL}")
-    print(f"Devices: {list(ALL_DEVICES.keys())}")
-    print("Press Ctrl+C to stop.\n")
 
+class LoadStats:
+    """Counters and latency samples shared by all meters."""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.sent = 0
+        self.in_flight = 0
+
+    def record(self, status, latency=None):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if latency is not None:
+            self.latencies.append(latency)
+
+
+async def _send(client, slots, url, meter, scheduled, stats, verbose):
+    stats.in_flight += 1
     try:
-        while True:
-            result = generate_device_data()
-
-            global_intensity = result["total_current"]
-            global_reactive = random.uniform(0.1, 0.5) * global_intensity
-
-            payload = {
-                "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Global_intensity": round(global_intensity, 2),
-                "Global_reactive_power": round(global_reactive, 2),
-                "zones": {
-                    "TX1": result["TX1"],
-                    "TX2": result["TX2"],
-                }
-            }
+        payload = build_payload(meter)
+        # Queue here rather than inside httpx, whose pool gets slow with thousands of waiters
+        async with slots:
+            response = await client.post(url, json=payload)
+        stats.record(response.status_code, time.perf_counter() - scheduled)
+        if verbose:
+            if response.status_code == 200:
+                res = response.json()
+                print(f"[SENT] {meter.meter_id} Total I: {payload['Global_intensity']}A | "
+                      f"Pred: {res.get('predicted_power', 0):.2f}W")
+            else:
+                print(f"[ERROR] {response.status_code}: {response.text}")
+    except httpx.ConnectError:
+        stats.record("conn_error")
+        if verbose:
+            print(f"[CONN ERROR] Server not reachable at {url}")
+    except httpx.HTTPError as e:
+        stats.record("error")
+        if verbose:
+            print(f"[ERROR] {e!r}")
+    finally:
+        stats.in_flight -= 1
+
+
+async def _meter_loop(client, slots, url, meter, interval, phase, deadline, stats, tasks, max_in_flight, verbose):
+    """Fires a request for `meter` every `interval` seconds until `deadline`."""
+    scheduled = time.perf_counter() + phase
+    while scheduled < deadline:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            # The server has fallen this far behind; count the send as skipped
+            # rather than queueing without bound in this process
+            stats.record("skipped")
+        else:
+            task = asyncio.create_task(_send(client, slots, url, meter, scheduled, stats, verbose))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            stats.sent += 1
+        scheduled += interval
+
+
+async def _progress(stats, started, every):
+    last_sent, last_time = 0, started
+    while True:
+        await asyncio.sleep(every)
+        now = time.perf_counter()
+        print(f"  t={now - started:6.1f}s  {(stats.sent - last_sent) / (now - last_time):8.0f} req/s sent  "
+              f"{stats.in_flight:6d} in flight")
+        last_sent, last_time = stats.sent, now
+
 
-            try:
-                response = requests.post(API_URL, json=payload)
+async def run(url=API_URL, meters=1, interval=SEND_INTERVAL, duration=None, connections=100, seed=None,
+              max_in_flight=10_000, verbose=False, report_every=5.0):
+    """
+    Runs `meters` simulated meters against `url`.
 
-                if response.status_code == 200:
-                    res = response.json()
-                    print(f"[SENT] Total I: {payload['Global_intensity']}A | Pred: {res.get('predicted_power', 0):.2f}W")
-                else:
-                    print(f"[ERROR] {response.status_code}: {response.text}")
+    Args:
+        interval (float): Seconds between two readings of the same meter.
+        duration (float, optional): Seconds to run; None runs until cancelled.
+        connections (int): Size of the keep-alive connection pool.
+        seed (int, optional): Makes every meter's readings reproducible.
+        max_in_flight (int): Sends beyond this many unanswered requests are skipped.
 
-            except requests.exceptions.ConnectionError:
-                print(f"[CONN ERROR] Server not reachable at {API_URL}")
-            except Exception as e:
-                print(f"[ERROR] {e}")
+    Returns:
+        (LoadStats, float): Results and elapsed seconds.
+    """
+    fleet = [SimulatedMeter(f"meter_{i + 1:05d}" if meters > 1 else "default",
+                            None if seed is None else seed + i)
+             for i in range(meters)]
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    stats = LoadStats()
+    tasks = set()
+    slots = asyncio.Semaphore(connections)
 
-            time.sleep(SEND_INTERVAL)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        deadline = started + duration if duration else float("inf")
+        progress = asyncio.create_task(_progress(stats, started, report_every)) if not verbose else None
+        try:
+            # Spread first sends over one interval so meters do not fire in lockstep
+            await asyncio.gather(*(
+                _meter_loop(client, slots, url, meter, interval, i * interval / meters, deadline, stats, tasks,
+                            max_in_flight, verbose)
+                for i, meter in enumerate(fleet)
+            ))
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            if progress is not None:
+                progress.cancel()
+        elapsed = time.perf_counter() - started
+    return stats, elapsed
 
+
+def report(stats, elapsed, target_rate):
+    skipped = stats.statuses.get("skipped", 0)
+    completed = sum(stats.statuses.values()) - skipped
+    ok = stats.statuses.get(200, 0)
+    ms = np.array(stats.latencies) * 1000 if stats.latencies else np.zeros(1)
+    print(f"\n── Results ──")
+    print(f"  Target rate:   {target_rate:.1f} req/s")
+    print(f"  Achieved:      {completed / elapsed:.0f} req/s ({ok / elapsed:.0f} ok/s), "
+          f"{completed} requests in {elapsed:.1f}s")
+    print(f"  Skipped:       {skipped} (server too far behind)")
+    print(f"  Status codes:  {dict(sorted(stats.statuses.items(), key=str))}")
+    print(f"  Latency ms:    p50 {np.percentile(ms, 50):.1f} | p90 {np.percentile(ms, 90):.1f} | "
+          f"p99 {np.percentile(ms, 99):.1f} | max {ms.max():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate PowerByte meters posting to /api/predict")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--meters", type=int, default=1, help="Independent simulated meters")
+    parser.add_argument("--interval", type=float, default=SEND_INTERVAL,
+                        help="Seconds between readings of one meter")
+    parser.add_argument("--rate", type=float, help="Target total req/s; overrides --interval")
+    parser.add_argument("--duration", type=float, help="Seconds to run (default: until Ctrl+C)")
+    parser.add_argument("--connections", type=int, default=100, help="Keep-alive connection pool size")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible readings")
+    parser.add_argument("--max-in-flight", type=int, default=10_000,
+                        help="Skip sends while this many requests are unanswered")
+    args = parser.parse_args()
+
+    interval = args.meters / args.rate if args.rate else args.interval
+    target_rate = args.meters / interval
+    verbose = args.meters == 1
+
+    print(f"--- PowerByte Mock Sensor Started ---")
+    print(f"Target API: {args.url}")
+    print(f"Devices: {list(ALL_DEVICES.keys())}")
+    print(f"Meters: {args.meters}, each every {interval:.3f}s ({target_rate:.1f} req/s total)")
+    print("Press Ctrl+C to stop.\n")
+
+    try:
+        stats, elapsed = asyncio.run(run(args.url, args.meters, interval, args.duration, args.connections,
+                                         args.seed, args.max_in_flight, verbose))
+        report(stats, elapsed, target_rate)
     except KeyboardInterrupt:
         print("\nStopped.")
         sys.exit(0)
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,391 @@
+"""
+Registry of XGBoost model versions for the predictor.
+
+Models are loaded lazily, on first use, and warmed up with one prediction
+before they can serve. Every version is an immutable LoadedModel. Switching
+the active version, or reloading a changed model file, builds the new
+LoadedModel completely and then swaps one reference. A request that already
+picked up the old model finishes with it, so nothing in flight is dropped
+or sees a half-loaded model.
+
+Besides the active version the registry can hold:
+    a shadow  scored next to the active model on every reading; only the
+              differences are recorded, callers always get the active result
+    a canary  serves a fixed share of meters (stable per meter id) for A/B tests
+    standbys  loaded and warm, ready to be activated instantly
+
+Model files are resolved inside one model directory:
+    POWERBYTE_MODEL_DIR    directory holding model files (default: this directory)
+    POWERBYTE_MODEL_FILE   initial active model (default: powerbyte_xgboost.json)
+    POWERBYTE_MODEL_WATCH  seconds between checks of the active file for changes
+                           (default 0: no watcher; reload through the API instead)
+"""
+
+import os
+import threading
+import time
+import zlib
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_MODEL_FILE = "powerbyte_xgboost.json"
+DEFAULT_VERSION = "default"
+
+
+class ModelLoadError(Exception):
+    """Raised when a model file is missing or cannot be loaded."""
+
+
+def _signature(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class LoadedModel:
+    """One loaded, warmed-up model version. Never mutated after construction."""
+
+    __slots__ = ("version", "path", "revision", "model", "booster", "feature_order",
+                 "signature", "loaded_at", "load_ms")
+
+    def __init__(self, version, path, default_feature_order, revision=1):
+        """
+        Raises:
+            ModelLoadError: If the file is missing or is not a loadable model.
+        """
+        started = time.perf_counter()
+        self.signature = _signature(path)
+        if self.signature is None:
+            raise ModelLoadError(f"Model file not found at {path}")
+        try:
+            # Imported here: xgboost (with scikit-learn and SciPy) takes seconds
+            # to import, which should not delay server start-up
+            import xgboost as xgb
+            model = xgb.XGBRegressor()
+            model.load_model(path)
+            booster = model.get_booster()
+            # Batched inference fills a raw matrix, so follow the model's own order
+            feature_order = list(booster.feature_names or default_feature_order)
+            # The first prediction initializes XGBoost's internals; pay for it here
+            booster.inplace_predict(np.zeros((1, len(feature_order)), dtype=np.float32))
+        except Exception as e:
+            raise ModelLoadError(f"Error loading model {path}: {e}") from e
+        self.version = version
+        self.path = path
+        self.revision = revision
+        self.model = model
+        self.booster = booster
+        self.feature_order = feature_order
+        self.loaded_at = time.time()
+        self.load_ms = (time.perf_counter() - started) * 1000
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "file": os.path.basename(self.path),
+            "revision": self.revision,
+            "features": len(self.feature_order),
+            "loaded_at": self.loaded_at,
+            "load_ms": round(self.load_ms, 1),
+        }
+
+
+class ShadowStats:
+    """Running comparison of shadow vs active predictions."""
+
+    def __init__(self, version):
+        self.version = version
+        self.count = 0
+        self.abs_diff_sum = 0.0
+        self.max_abs_diff = 0.0
+        self.errors = 0
+
+    def record(self, active, shadow):
+        diff = abs(float(shadow) - float(active))
+        self.count += 1
+        self.abs_diff_sum += diff
+        if diff > self.max_abs_diff:
+            self.max_abs_diff = diff
+
+    def to_dict(self):
+        return {
+            "version": self.version,
+            "scored": self.count,
+            "mean_abs_diff": round(self.abs_diff_sum / self.count, 6) if self.count else None,
+            "max_abs_diff": round(self.max_abs_diff, 6),
+            "errors": self.errors,
+        }
+
+
+class ModelRegistry:
+    """Model versions by name, with one active version plus optional shadow and canary."""
+
+    def __init__(self, model_dir=BASE_DIR, default_feature_order=(), active_file=DEFAULT_MODEL_FILE):
+        """
+        Args:
+            model_dir (str): Directory model files are resolved in.
+            default_feature_order (sequence): Column order for models that do
+                not store feature names.
+            active_file (str): File of the initial active version (loaded lazily).
+        """
+        self.model_dir = model_dir
+        self.default_feature_order = list(default_feature_order)
+        self._paths = {DEFAULT_VERSION: os.path.join(model_dir, active_file)}
+        self._loaded = {}
+        # Guards the dicts only; models are built outside it, one at a time
+        # per version under that version's entry in _load_locks
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._failures = {}
+        self.active_version = DEFAULT_VERSION
+        self.shadow_version = None
+        self.shadow_stats = None
+        self.canary = None  # (version, fraction of meters)
+        self.swaps = 0
+        self._watcher = None
+
+    def resolve(self, name):
+        """
+        Path of a model file name inside the model directory.
+
+        Raises:
+            ValueError: If `name` is a path rather than a file name.
+        """
+        if os.path.basename(name) != name or name in ("", ".", ".."):
+            raise ValueError("file must be a model file name, not a path")
+        return os.path.join(self.model_dir, name)
+
+    # ── Loading ─────────────────────────────────────────────────────────
+
+    def register(self, version, file):
+        """
+        Registers (without loading) a version backed by a file in the model directory.
+
+        Raises:
+            ValueError: On a path instead of a file name, or a version that is
+                already registered.
+        """
+        path = self.resolve(file)
+        with self._lock:
+            if version in self._paths:
+                raise ValueError(f"Model version {version!r} is already registered")
+            self._paths[version] = path
+
+    def load(self, version):
+        """
+        Returns the LoadedModel for `version`, loading and warming it on first use.
+
+        Loading takes seconds (it imports xgboost), so call this from a worker
+        thread, never from the event loop.
+
+        Raises:
+            KeyError: If the version is not registered.
+            ModelLoadError: If its file cannot be loaded.
+        """
+        loaded = self._loaded.get(version)
+        if loaded is not None:
+            return loaded
+        path = self._paths[version]
+        with self._lock:
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+        # Concurrent first uses of one version wait for a single load
+        with load_lock:
+            loaded = self._loaded.get(version)
+            if loaded is None:
+                loaded = LoadedModel(version, path, self.default_feature_order)
+                with self._lock:
+                    self._loaded[version] = loaded
+        return loaded
+
+    def active(self):
+        """
+        The active LoadedModel, or None if it cannot be loaded. A failed load
+        is only retried once the model file changes, so a missing model costs
+        one stat per call rather than one load attempt.
+        """
+        version = self.active_version
+        loaded = self._loaded.get(version)
+        if loaded is not None:
+            return loaded
+        signature = _signature(self._paths[version])
+        if self._failures.get(version, (False,))[0] == signature:
+            return None
+        try:
+            return self.load(version)
+        except ModelLoadError as e:
+            self._failures[version] = (signature, str(e))
+            print(f"Error: {e}")
+            return None
+
+    def loaded_active(self):
+        """The active LoadedModel if it is already loaded, else None; never loads (safe on the event loop)."""
+        return self._loaded.get(self.active_version)
+
+    def last_error(self, version=None):
+        failure = self._failures.get(version or self.active_version)
+        return failure[1] if failure else None
+
+    def for_meter(self, meter_id):
+        """The model that serves `meter_id`: the canary for its share of meters, else the active one."""
+        canary = self.canary
+        if canary is not None and zlib.crc32(str(meter_id).encode()) % 10_000 < canary[1] * 10_000:
+            loaded = self._loaded.get(canary[0])
+            if loaded is not None:
+                return loaded
+        return self.active()
+
+    def shadow(self):
+        """The warm shadow LoadedModel, or None."""
+        version = self.shadow_version
+        return self._loaded.get(version) if version is not None else None
+
+    # ── Roles ───────────────────────────────────────────────────────────
+
+    def activate(self, version):
+        """
+        Loads and warms `version` if needed, then makes it the active model.
+
+        Raises:
+            KeyError, ModelLoadError: As for load(); the active model is unchanged.
+        """
+        self.load(version)
+        self.active_version = version
+        self.swaps += 1
+        if self.canary is not None and self.canary[0] == version:
+            self.canary = None
+        if self.shadow_version == version:
+            self.set_shadow(None)
+
+    def set_shadow(self, version):
+        """Starts shadow-scoring `version` (loaded first), or stops with None."""
+        if version is not None:
+            self.load(version)
+        self.shadow_version = version
+        self.shadow_stats = ShadowStats(version) if version is not None else None
+
+    def set_canary(self, version, fraction):
+        """
+        Serves `fraction` (0–1) of meters from `version`, or stops with version None.
+
+        Raises:
+            ValueError: If fraction is outside 0–1.
+        """
+        if version is None:
+            self.canary = None
+            return
+        if not 0 <= fraction <= 1:
+            raise ValueError("fraction must be between 0 and 1")
+        self.load(version)
+        self.canary = (version, float(fraction))
+
+    def unload(self, version):
+        """
+        Forgets a version that is neither active, shadow nor canary.
+
+        Raises:
+            KeyError: If it is not registered.
+            ValueError: If it is still in use, or is the default version.
+        """
+        if version not in self._paths:
+            raise KeyError(version)
+        if version in (self.active_version, self.shadow_version, DEFAULT_VERSION) or \
+                (self.canary is not None and self.canary[0] == version):
+            raise ValueError(f"Model version {version!r} is in use")
+        with self._lock:
+            self._loaded.pop(version, None)
+            self._paths.pop(version, None)
+            self._failures.pop(version, None)
+            self._load_locks.pop(version, None)
+
+    # ── Reloading changed files ─────────────────────────────────────────
+
+    def reload(self, version=None):
+        """
+        Reloads a version from its file (e.g. after it was overwritten) and
+        swaps the new revision in.
+
+        Raises:
+            KeyError, ModelLoadError: The previous revision stays in place.
+        """
+        version = version or self.active_version
+        path = self._paths[version]
+        previous = self._loaded.get(version)
+        revision = previous.revision + 1 if previous is not None else 1
+        loaded = LoadedModel(version, path, self.default_feature_order, revision)
+        with self._lock:
+            self._loaded[version] = loaded
+            self._failures.pop(version, None)
+        self.swaps += 1
+        return loaded
+
+    def check_for_updates(self):
+        """
+        Reloads every loaded version whose file changed on disk, and retries
+        an active version that failed to load. Returns the versions (re)loaded.
+        """
+        reloaded = []
+        if self.loaded_active() is None and self.active() is not None:
+            reloaded.append(self.active_version)
+        for version, loaded in list(self._loaded.items()):
+            signature = _signature(loaded.path)
+            if signature is not None and signature != loaded.signature:
+                try:
+                    self.reload(version)
+                    reloaded.append(version)
+                except ModelLoadError as e:
+                    # Often a file caught mid-write; the next check tries again
+                    print(f"Error reloading model {version}: {e}")
+        return reloaded
+
+    def watch(self, interval):
+        """Starts a daemon thread that calls check_for_updates() every `interval` seconds."""
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                for version in self.check_for_updates():
+                    print(f"Model {version} reloaded from {os.path.basename(self._paths[version])}")
+
+        self._watcher = threading.Thread(target=loop, name="powerbyte-model-watch", daemon=True)
+        self._watcher.start()
+
+    def describe(self):
+        return {
+            "active": self.active_version,
+            "shadow": self.shadow_stats.to_dict() if self.shadow_stats is not None else None,
+            "canary": {"version": self.canary[0], "fraction": self.canary[1]} if self.canary else None,
+            "swaps": self.swaps,
+            "versions": [
+                {
+                    "version": version,
+                    "file": os.path.basename(path),
+                    "loaded": self._loaded[version].to_dict() if version in self._loaded else None,
+                    "error": self.last_error(version),
+                }
+                for version, path in list(self._paths.items())
+            ],
+        }
+
+
+def default_model_path():
+    """The active model file from_env() starts with: POWERBYTE_MODEL_FILE in POWERBYTE_MODEL_DIR."""
+    return os.path.join(
+        os.environ.get("POWERBYTE_MODEL_DIR", BASE_DIR),
+        os.environ.get("POWERBYTE_MODEL_FILE", DEFAULT_MODEL_FILE),
+    )
+
+
+def from_env(default_feature_order):
+    """Builds a ModelRegistry from POWERBYTE_MODEL_DIR / _FILE and starts the POWERBYTE_MODEL_WATCH watcher."""
+    registry = ModelRegistry(
+        os.environ.get("POWERBYTE_MODEL_DIR", BASE_DIR),
+        default_feature_order,
+        os.environ.get("POWERBYTE_MODEL_FILE", DEFAULT_MODEL_FILE),
+    )
+    registry.watch(float(os.environ.get("POWERBYTE_MODEL_WATCH", "0")))
+    return registry
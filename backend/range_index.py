@@ -0,0 +1,243 @@
+"""
+Arbitrary time-range aggregates over a timestamped dataset.
+
+A RangeIndex keeps a dataset's timestamps sorted next to per-metric prefix
+sums and sparse tables. For any [start, end) range, two binary searches
+find the rows, and then:
+
+    sum   prefix[j] - prefix[i]                        O(1)
+    mean  sum / (non-NaN rows in the range)            O(1)
+    max   max(table[k][i], table[k][j - 2**k])         O(1), k = log2(j - i)
+
+So one bucket costs O(log n), whatever its width. Buckets on a 15min /
+hour / day / week / month grid are answered together with vectorized
+searches. Sparse tables take n * log2(n) floats per metric. That is
+nothing for the hourly datasets, but rules out indexing long per-second
+files this way.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import AGGREGATION_SECONDS
+
+# resolution name -> fixed bucket width (None: calendar months)
+RESOLUTIONS = {
+    "15min": pd.Timedelta(minutes=15),
+    "hour": pd.Timedelta(hours=1),
+    "day": pd.Timedelta(days=1),
+    "week": pd.Timedelta(days=7),
+    "month": None,
+}
+AGGREGATES = ("sum", "mean", "max")
+# Most buckets one query may return
+MAX_BUCKETS = 20_000
+
+
+def parse_time(value):
+    """
+    A naive pd.Timestamp from an ISO date / datetime string (None passes through).
+
+    Raises:
+        ValueError: If the value is not a timestamp or carries a timezone.
+    """
+    if value is None:
+        return None
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Cannot parse timestamp {value!r}") from None
+    if ts is pd.NaT:
+        raise ValueError(f"Cannot parse timestamp {value!r}")
+    if ts.tzinfo is not None:
+        raise ValueError("Timestamps are local time and must not carry a timezone")
+    return ts
+
+
+def bucket_edges(start, end, resolution):
+    """
+    Bucket boundaries covering [start, end), aligned to the resolution
+    (weeks start on Monday, months on the 1st). The first and last buckets
+    may extend past the range; only rows inside it are aggregated.
+
+    Raises:
+        ValueError: On an unknown resolution or more than MAX_BUCKETS buckets.
+    """
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {list(RESOLUTIONS)}")
+    width = RESOLUTIONS[resolution]
+    if resolution == "month":
+        first = start.normalize().replace(day=1)
+        estimate = (end - first).days // 28 + 1
+        freq = "MS"
+    else:
+        first = start.normalize() - pd.Timedelta(days=start.weekday()) if resolution == "week" else start.floor(width)
+        estimate = (end - first) // width + 1
+        freq = width
+    if estimate > MAX_BUCKETS:
+        raise ValueError(f"At most {MAX_BUCKETS} buckets per query; use a coarser resolution or shorter range")
+
+    offset = pd.tseries.frequencies.to_offset(freq)
+    edges = pd.date_range(first, end, freq=offset)
+    if edges[-1] < end:
+        edges = edges.append(pd.DatetimeIndex([edges[-1] + offset]))
+    return edges.to_numpy(dtype="datetime64[ns]")
+
+
+def _sparse_table(values):
+    """Level k holds max(values[i:i + 2**k]) for every i where that fits."""
+    levels = [values]
+    k = 1
+    while (1 << k) <= len(values):
+        previous, half = levels[-1], 1 << (k - 1)
+        levels.append(np.maximum(previous[:-half], previous[half:]))
+        k += 1
+    return levels
+
+
+class RangeIndex:
+    """Sorted timestamps plus prefix sums and sparse max tables for a set of metrics."""
+
+    def __init__(self, frame, metrics, time_column="timestamp"):
+        """
+        Args:
+            frame (pd.DataFrame): Rows with a datetime column and numeric metrics.
+            metrics (iterable): Columns to index; NaN values are skipped.
+        """
+        timestamps = frame[time_column].to_numpy(dtype="datetime64[ns]")
+        order = None if np.all(timestamps[1:] >= timestamps[:-1]) else np.argsort(timestamps, kind="stable")
+        self.timestamps = timestamps if order is None else timestamps[order]
+        self.metrics = tuple(metrics)
+        self._prefix, self._counts, self._max = {}, {}, {}
+        for metric in self.metrics:
+            values = frame[metric].to_numpy(dtype=np.float64)
+            if order is not None:
+                values = values[order]
+            present = ~np.isnan(values)
+            self._prefix[metric] = np.concatenate(([0.0], np.cumsum(np.where(present, values, 0.0))))
+            self._counts[metric] = np.concatenate(([0], np.cumsum(present)))
+            self._max[metric] = _sparse_table(np.where(present, values, -np.inf))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def first(self):
+        return pd.Timestamp(self.timestamps[0]) if len(self) else None
+
+    @property
+    def last(self):
+        return pd.Timestamp(self.timestamps[-1]) if len(self) else None
+
+    def _range_max(self, metric, lo, hi):
+        """Max over rows [lo, hi) for arrays of bounds; NaN where a range is empty or all-NaN."""
+        out = np.full(len(lo), np.nan)
+        size = hi - lo
+        nonempty = size > 0
+        levels = np.zeros(len(lo), dtype=np.int64)
+        levels[nonempty] = np.floor(np.log2(size[nonempty])).astype(np.int64)
+        table = self._max[metric]
+        for k in np.unique(levels[nonempty]):
+            rows = nonempty & (levels == k)
+            out[rows] = np.maximum(table[k][lo[rows]], table[k][hi[rows] - (1 << k)])
+        out[np.isneginf(out)] = np.nan
+        return out
+
+    def aggregate(self, start=None, end=None, resolution="day", metrics=None, aggregates=AGGREGATES):
+        """
+        Per-bucket aggregates of `metrics` over [start, end).
+
+        Args:
+            start, end (pd.Timestamp, optional): Range bounds; default to the
+                whole dataset.
+            resolution (str): One of RESOLUTIONS.
+            metrics (iterable, optional): Indexed metrics; all by default.
+            aggregates (iterable): Any of AGGREGATES.
+
+        Returns:
+            dict: {"start", "end", "resolution", "buckets", "rows",
+                "metrics": {metric: {aggregate: array}}}, one entry per bucket.
+
+        Raises:
+            ValueError: On unknown metrics, aggregates or resolution, an empty
+                range, or too many buckets.
+        """
+        metrics = self.metrics if metrics is None else tuple(metrics)
+        unknown = [m for m in metrics if m not in self._prefix]
+        if unknown:
+            raise ValueError(f"Unknown metrics {unknown}; expected some of {list(self.metrics)}")
+        unknown = [a for a in aggregates if a not in AGGREGATES]
+        if unknown:
+            raise ValueError(f"Unknown aggregates {unknown}; expected some of {list(AGGREGATES)}")
+        if not len(self):
+            raise ValueError("The dataset is empty")
+        start = self.first if start is None else start
+        end = self.last + pd.Timedelta(seconds=1) if end is None else end
+        if end <= start:
+            raise ValueError("end must be after start")
+
+        edges = bucket_edges(start, end, resolution)
+        # Row bounds per bucket, clipped to the requested range
+        clipped = np.clip(edges, np.datetime64(start, "ns"), np.datetime64(end, "ns"))
+        bounds = np.searchsorted(self.timestamps, clipped, side="left")
+        lo, hi = bounds[:-1], bounds[1:]
+
+        result = {}
+        for metric in metrics:
+            counts = self._counts[metric][hi] - self._counts[metric][lo]
+            sums = self._prefix[metric][hi] - self._prefix[metric][lo]
+            values = {}
+            if "sum" in aggregates:
+                values["sum"] = sums.round(4)
+            if "mean" in aggregates:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    values["mean"] = np.where(counts > 0, sums / counts, np.nan).round(4)
+            if "max" in aggregates:
+                values["max"] = self._range_max(metric, lo, hi).round(4)
+            result[metric] = values
+
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "resolution": resolution,
+            "buckets": np.datetime_as_string(edges[:-1], unit="s").tolist(),
+            "rows": hi - lo,
+            "metrics": result,
+        }
+
+
+class RangeIndexEngine:
+    """Rebuilds a RangeIndex whenever the underlying DatasetStore version changes."""
+
+    def __init__(self, store, metrics):
+        self.store = store
+        self.metrics = tuple(metrics)
+        self._lock = threading.Lock()
+        self._index = None
+        self._version = None
+
+    def peek(self):
+        """Returns the RangeIndex if it is current, or None if a (re)build is due."""
+        if self.store.is_current() and self.store.version == self._version:
+            return self._index
+        return None
+
+    def get(self):
+        """
+        Returns the RangeIndex for the current dataset version.
+
+        Raises:
+            FileNotFoundError: If the dataset file does not exist.
+        """
+        df, version = self.store.snapshot()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    started = time.perf_counter()
+                    self._index = RangeIndex(df, self.metrics)
+                    self._version = version
+                    AGGREGATION_SECONDS.labels("range_index", self.store.name).observe(time.perf_counter() - started)
+        return self._index
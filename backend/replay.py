@@ -0,0 +1,308 @@
+"""
+Server-side replay of per-second CSVs (or columnar caches) into the
+in-process sensor state.
+
+A ReplaySource opens a dataset through the columnar cache, memory-mapped,
+and hands out rows lazily in small chunks from any position. A Replay is an
+asyncio task that paces those rows at 1x–1000x real time and pushes each one
+straight into a callback (the same code path /api/realtime/data uses), with
+no HTTP round trip. Replays can be paused, re-speeded and seeked while
+running; a ReplayManager runs any number of them side by side.
+
+Rows carry virtual timestamps: the dataset's own `timestamp` column when it
+has one, otherwise today's date joined with its `time` (HH:MM:SS) column.
+"""
+
+import asyncio
+import datetime
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+
+MIN_SPEED = 1.0
+MAX_SPEED = 1000.0
+# Rows converted to dicts at a time; the rest of the file stays on disk
+CHUNK_ROWS = 1024
+# Longest the pacing loop sleeps, so pause / seek / stop apply promptly
+MAX_TICK = 0.1
+
+
+def _seconds_of_day(labels):
+    """'HH:MM:SS' strings -> seconds since midnight."""
+    parts = pd.Series(labels, copy=False).astype(str).str.split(":", expand=True).astype(np.int64)
+    return (parts[0] * 3600 + parts[1] * 60 + parts[2]).to_numpy()
+
+
+class ReplaySource:
+    """A per-second dataset opened for lazy, seekable row access."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): A CSV file, or a columnar directory as written by
+                dataset_pipeline / columnar_cache.
+
+        Raises:
+            FileNotFoundError: If the dataset does not exist.
+        """
+        self.path = path
+        if os.path.isdir(path):
+            self.frame = columnar_cache.load_dir(path)
+        elif os.path.exists(path):
+            self.frame = columnar_cache.read_table(path)
+        else:
+            raise FileNotFoundError(path)
+        self._offsets = None
+        self._seconds = None
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _time_offsets(self):
+        """Seconds since the first row, per row; used to seek by time."""
+        if self._offsets is None:
+            if "timestamp" in self.frame:
+                stamps = self.frame["timestamp"].to_numpy(dtype="datetime64[ns]")
+                self._offsets = (stamps - stamps[0]) / np.timedelta64(1, "s")
+            elif "time" in self.frame:
+                if self._seconds is None:
+                    self._seconds = _seconds_of_day(self.frame["time"])
+                seconds = self._seconds
+                # A multi-day file restarts at 00:00:00 every day
+                self._offsets = seconds + np.concatenate([[0], np.cumsum(np.diff(seconds) < 0)]) * 86400
+                self._offsets = self._offsets - self._offsets[0]
+            else:
+                self._offsets = np.arange(len(self.frame), dtype=float)
+        return self._offsets
+
+    def position_of(self, target):
+        """
+        Row index for a seek target.
+
+        Args:
+            target (int | str): A row index, an 'HH:MM:SS' time of day, or an
+                ISO timestamp (for datasets with a timestamp column).
+
+        Raises:
+            ValueError: If the target cannot be parsed.
+        """
+        if isinstance(target, (int, np.integer)):
+            return int(min(max(target, 0), len(self)))
+        target = str(target)
+        try:
+            if "timestamp" in self.frame:
+                stamps = self.frame["timestamp"].to_numpy(dtype="datetime64[ns]")
+                return int(np.searchsorted(stamps, np.datetime64(pd.Timestamp(target)), side="left"))
+            wanted = _seconds_of_day([target])[0] if "time" in self.frame else None
+        except (KeyError, ValueError):
+            raise ValueError(f"Cannot seek to {target!r}") from None
+        if wanted is not None:
+            if self._seconds is None:
+                self._seconds = _seconds_of_day(self.frame["time"])
+            seconds = self._seconds
+            return int(np.argmax(seconds >= wanted)) if (seconds >= wanted).any() else len(self)
+        raise ValueError(f"{self.path} has no time column to seek by")
+
+    def seconds_per_row(self):
+        """Median spacing of the rows in seconds (1 for per-second data)."""
+        offsets = self._time_offsets()
+        if len(offsets) < 2:
+            return 1.0
+        step = float(np.median(np.diff(offsets[: min(len(offsets), 10_000)])))
+        return step if step > 0 else 1.0
+
+    def rows(self, start=0):
+        """Yields (index, record dict) from row `start` onwards, converting a chunk at a time."""
+        for offset in range(start, len(self.frame), CHUNK_ROWS):
+            records = self.frame.iloc[offset:offset + CHUNK_ROWS].to_dict("records")
+            yield from zip(itertools.count(offset), records)
+
+
+class Replay:
+    """One running replay of a ReplaySource into a push callback."""
+
+    def __init__(self, replay_id, source, push, meter_id, speed=1.0, start=0):
+        """
+        Args:
+            push (callable): push(meter_id, timestamp, record), called once per row.
+            meter_id (str): Meter the rows are recorded under.
+            speed (float): Replay speed multiplier (1x–1000x).
+            start (int | str): Initial position, as for ReplaySource.position_of().
+        """
+        self.replay_id = replay_id
+        self.source = source
+        self.push = push
+        self.meter_id = meter_id
+        self.speed = self._check_speed(speed)
+        self.position = source.position_of(start)
+        self.state = "running"
+        self.rows_sent = 0
+        self.error = None
+        self.created_at = time.time()
+        self._step = source.seconds_per_row()
+        self._origin = datetime.date.today().isoformat()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @staticmethod
+    def _check_speed(speed):
+        speed = float(speed)
+        if not MIN_SPEED <= speed <= MAX_SPEED:
+            raise ValueError(f"speed must be between {MIN_SPEED:g} and {MAX_SPEED:g}")
+        return speed
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    # ── Controls (event loop thread only) ───────────────────────────────
+
+    def set_speed(self, speed):
+        self.speed = self._check_speed(speed)
+        self._wake.set()
+
+    def seek(self, target):
+        self.position = self.source.position_of(target)
+        if self.state == "finished":
+            self.state = "running"
+            self.start()
+        self._wake.set()
+
+    def pause(self):
+        if self.state == "running":
+            self.state = "paused"
+        self._wake.set()
+
+    def resume(self):
+        if self.state == "paused":
+            self.state = "running"
+        self._wake.set()
+
+    def stop(self):
+        self.state = "stopped"
+        self._wake.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    # ── Pacing loop ─────────────────────────────────────────────────────
+
+    def _timestamp(self, record):
+        if "timestamp" in record:
+            return pd.Timestamp(record["timestamp"]).isoformat()
+        if "time" in record:
+            return f"{self._origin}T{record['time']}"
+        return datetime.datetime.now().isoformat()
+
+    async def _run(self):
+        rows = None
+        try:
+            while self.state != "stopped":
+                if self.state == "paused":
+                    self._wake.clear()
+                    await self._wake.wait()
+                    rows = None  # Re-anchor the clock after the pause
+                    continue
+
+                if rows is None:
+                    rows = self.source.rows(self.position)
+                    anchor_time, anchor_pos, speed = time.perf_counter(), self.position, self.speed
+
+                # Rows that are due by now at the current speed (maybe none yet)
+                due = anchor_pos + int((time.perf_counter() - anchor_time) * speed / self._step) + 1
+                while self.position < due:
+                    row = next(rows, None)
+                    if row is None:
+                        break
+                    index, record = row
+                    self.push(self.meter_id, self._timestamp(record), record)
+                    self.rows_sent += 1
+                    self.position = index + 1
+                if self.position >= len(self.source):
+                    self.state = "finished"
+                    return
+
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=min(MAX_TICK, self._step / speed))
+                    rows = None  # Speed, seek or state changed: re-anchor
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            print(f"Error in replay {self.replay_id}: {e}")
+
+    def to_dict(self):
+        return {
+            "id": self.replay_id,
+            "file": os.path.basename(self.source.path),
+            "meter_id": self.meter_id,
+            "state": self.state,
+            "speed": self.speed,
+            "position": self.position,
+            "total_rows": len(self.source),
+            "progress_pct": round(self.position / max(len(self.source), 1) * 100, 2),
+            "rows_sent": self.rows_sent,
+            "error": self.error,
+        }
+
+
+class ReplayManager:
+    """Starts, tracks and controls concurrent replays."""
+
+    def __init__(self, push, max_replays=32):
+        self.push = push
+        self.max_replays = max_replays
+        self._replays = {}
+        self._sources = {}
+        self._ids = itertools.count(1)
+
+    def _source(self, path):
+        # Replays of the same file version share one memory-mapped frame
+        key = (path, os.stat(path).st_mtime_ns)
+        source = self._sources.get(key)
+        if source is None:
+            source = self._sources[key] = ReplaySource(path)
+        return source
+
+    def prepare(self, path):
+        """Opens (and if needed caches) a dataset ahead of start(); safe off the event loop."""
+        self._source(path).seconds_per_row()
+        return path
+
+    def start(self, path, meter_id, speed=1.0, start=0):
+        """
+        Starts a replay on the running event loop.
+
+        Raises:
+            FileNotFoundError: If the dataset does not exist.
+            ValueError: On a bad speed or start, or when max_replays are active.
+        """
+        active = sum(1 for r in self._replays.values() if r.state in ("running", "paused"))
+        if active >= self.max_replays:
+            raise ValueError(f"At most {self.max_replays} replays can run at once")
+        replay_id = f"replay-{next(self._ids)}"
+        replay = Replay(replay_id, self._source(path), self.push, meter_id, speed, start).start()
+        self._replays[replay_id] = replay
+        return replay
+
+    def get(self, replay_id):
+        return self._replays.get(replay_id)
+
+    def list(self):
+        return list(self._replays.values())
+
+    def remove(self, replay_id):
+        """Stops a replay and forgets it. Returns False if it was unknown."""
+        replay = self._replays.pop(replay_id, None)
+        if replay is None:
+            return False
+        replay.stop()
+        return True
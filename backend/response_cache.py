@@ -0,0 +1,97 @@
+"""
+ETag revalidation and an in-process cache of serialized JSON responses.
+
+The historical endpoints answer with the same bytes until their dataset
+changes. Every response gets an ETag derived from the request's endpoint,
+its query parameters and a cheap dataset version token (file stat
+signature, row counter, ...). A request whose If-None-Match carries that
+ETag is answered with 304 straight away, without building any payload. Any
+other request is served from a ResponseCache of serialized bodies. A body is
+only rebuilt when the version token moves on.
+
+Sizing is configurable through an environment variable:
+    POWERBYTE_RESPONSE_CACHE  cached responses kept (default 512, 0 disables)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Clients may store responses but must revalidate them, so a new dataset
+# version is seen on the next request while unchanged ones cost a 304
+CACHE_CONTROL = "no-cache"
+
+DEFAULT_MAX_ENTRIES = 512
+
+
+def make_etag(key, version):
+    """Strong ETag (quoted) for one response of `key` at dataset `version`."""
+    digest = hashlib.sha1(repr((key, version)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value names `etag` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """LRU map of request key -> (version, serialized body), one version per key."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        """The cached body for `key` if it was built at `version`, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, body):
+        """Stores `body`, replacing whatever older version `key` had."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": sum(len(body) for _, body in list(self._entries.values())),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def from_env():
+    """Builds a ResponseCache sized from POWERBYTE_RESPONSE_CACHE."""
+    value = os.environ.get("POWERBYTE_RESPONSE_CACHE")
+    return ResponseCache(int(value) if value else DEFAULT_MAX_ENTRIES)
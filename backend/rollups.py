@@ -0,0 +1,201 @@
+"""
+Precomputed daily / ISO-week / monthly rollups of the professional dataset.
+
+The RollupEngine materializes every aggregate once per dataset version (see
+DatasetStore.version) and keeps ready-to-serve lists, so the historical
+endpoints only slice lists and read prefix sums instead of running groupby.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_store import AGGREGATION_SECONDS
+
+
+# Hours above this energy draw count as "active" in the daily rollup
+ACTIVE_KWH_THRESHOLD = 0.2
+
+
+def _prefix(values):
+    """Cumulative sums with a leading zero, so sum(a[i:j]) == p[j] - p[i]."""
+    return np.concatenate(([0.0], np.cumsum(values, dtype=np.float64)))
+
+
+def _nullable(series):
+    """List of floats with NaN replaced by None (JSON null)."""
+    return [None if v != v else v for v in series.tolist()]
+
+
+def _records(frame):
+    """Row dicts with NaN replaced by None (JSON null)."""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+class Rollups:
+    """Immutable set of aggregate tables built from one dataset version."""
+
+    def __init__(self, df):
+        # Boolean helper columns replace the per-group Python lambdas
+        hourly = pd.DataFrame({
+            "date": df["date"],
+            "energy_kwh": df["energy_kwh"],
+            "cost_rs": df["cost_rs"],
+            "carbon_kg": df["carbon_kg"],
+            "active": (df["energy_kwh"] > ACTIVE_KWH_THRESHOLD).astype(np.int64),
+            "not_low": (df["status"] != "low_usage").astype(np.int64),
+            "predicted_kwh": df["predicted_kwh"],
+        })
+
+        daily = hourly.groupby("date", sort=True, observed=True).agg(
+            actual_kwh=("energy_kwh", "sum"),
+            cost_inr=("cost_rs", "sum"),
+            carbon_kg=("carbon_kg", "sum"),
+            peak_kwh=("energy_kwh", "max"),
+            hours_active=("active", "sum"),
+            status_counts=("not_low", "sum"),
+        ).reset_index()
+
+        # Backfilled model predictions (see backfill.py); a day with no
+        # predicted hours stays NaN and is served as null
+        daily["predicted_kwh"] = (
+            hourly.groupby("date", sort=True, observed=True)["predicted_kwh"].sum(min_count=1).round(2).to_numpy()
+        )
+        self.daily = daily
+
+        dates = pd.to_datetime(daily["date"])
+        iso = dates.dt.isocalendar()
+        week_keys = iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)
+        self.iso_weekly = daily.groupby(week_keys.values, sort=True).agg(
+            start_date=("date", "first"),
+            actual_kwh=("actual_kwh", "sum"),
+            cost_inr=("cost_inr", "sum"),
+            carbon_kg=("carbon_kg", "sum"),
+            days=("date", "size"),
+        ).rename_axis("week").reset_index()
+
+        self.monthly = hourly.groupby(hourly["date"].str.slice(0, 7), sort=True, observed=True).agg(
+            total_kwh=("energy_kwh", "sum"),
+            total_cost=("cost_rs", "sum"),
+            total_carbon=("carbon_kg", "sum"),
+        ).rename_axis("month").reset_index()
+        self.monthly["total_predicted_kwh"] = (
+            hourly.groupby(hourly["date"].str.slice(0, 7), sort=True, observed=True)["predicted_kwh"]
+            .sum(min_count=1).to_numpy()
+        )
+
+        # Ready-to-serve pieces for the daily endpoint, as row dicts and as
+        # one array per field (sliced, not copied, by daily_payload)
+        self.daily_records = _records(daily)
+        self.daily_columns = {
+            column: daily[column].astype(str).tolist() if column == "date" else daily[column].to_numpy()
+            for column in daily.columns
+        }
+        self._actual = daily["actual_kwh"].to_numpy(dtype=np.float64)
+        predicted = daily["predicted_kwh"].to_numpy(dtype=np.float64)
+        self._predicted_days = _prefix(~np.isnan(predicted))
+        self._prefix = {
+            "actual_kwh": _prefix(self._actual),
+            "predicted_kwh": _prefix(np.nan_to_num(predicted)),
+            "cost_inr": _prefix(daily["cost_inr"].to_numpy(dtype=np.float64)),
+            "carbon_kg": _prefix(daily["carbon_kg"].to_numpy(dtype=np.float64)),
+        }
+
+        self.weekly_payload = self._build_weekly_payload()
+        self.iso_weekly_payload = self._build_iso_weekly_payload()
+        self.monthly_payload = self._build_monthly_payload()
+
+    def _build_weekly_payload(self):
+        last = self.daily.tail(7)
+        return {
+            "labels": last["date"].tolist(),
+            "actual_kwh": last["actual_kwh"].round(2).tolist(),
+            "predicted_kwh": _nullable(last["predicted_kwh"].round(2)),
+            "cost_inr": last["cost_inr"].round(2).tolist(),
+            "carbon_kg": last["carbon_kg"].round(2).tolist(),
+        }
+
+    def _build_iso_weekly_payload(self):
+        weeks = self.iso_weekly
+        return {
+            "labels": weeks["week"].tolist(),
+            "start_dates": weeks["start_date"].tolist(),
+            "days": weeks["days"].astype(int).tolist(),
+            "actual_kwh": weeks["actual_kwh"].round(2).tolist(),
+            "cost_inr": weeks["cost_inr"].round(2).tolist(),
+            "carbon_kg": weeks["carbon_kg"].round(2).tolist(),
+        }
+
+    def _build_monthly_payload(self):
+        monthly = self.monthly
+        return {
+            "months": monthly["month"].tolist(),
+            "actual_kwh": monthly["total_kwh"].round(2).tolist(),
+            "predicted_kwh": _nullable(monthly["total_predicted_kwh"].round(2)),
+            "cost_inr": monthly["total_cost"].round(2).tolist(),
+            "carbon_kg": monthly["total_carbon"].round(2).tolist(),
+        }
+
+    def daily_payload(self, days, columnar=False):
+        """
+        Summary and rows for the last `days` days, without touching pandas.
+
+        With ``columnar`` the rows come as {field: [values]} instead of a list
+        of row dicts; the numeric fields are NumPy array views, for fast_json.
+        """
+        n = len(self.daily_records)
+        count = min(max(days, 0), n)
+        start = n - count
+
+        def window_sum(column):
+            p = self._prefix[column]
+            return float(p[n] - p[start])
+
+        has_predictions = self._predicted_days[n] - self._predicted_days[start] > 0
+        actual_window = self._actual[start:]
+        return {
+            "days": count,
+            "total_kwh": round(window_sum("actual_kwh"), 2),
+            "total_predicted_kwh": round(window_sum("predicted_kwh"), 2) if has_predictions else None,
+            "total_cost": round(window_sum("cost_inr"), 2),
+            "total_carbon_kg": round(window_sum("carbon_kg"), 2),
+            "avg_daily_kwh": round(window_sum("actual_kwh") / count, 2) if count else 0.0,
+            "peak_daily_kwh": round(float(actual_window.max()), 2) if count else 0.0,
+            "data": ({column: values[start:] for column, values in self.daily_columns.items()}
+                     if columnar else self.daily_records[start:]),
+        }
+
+
+class RollupEngine:
+    """Rebuilds the Rollups whenever the underlying DatasetStore version changes."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._rollups = None
+        self._version = None
+
+    def peek(self):
+        """Returns the Rollups if they are current, or None if a (re)build is due."""
+        if self.store.is_current() and self.store.version == self._version:
+            return self._rollups
+        return None
+
+    def get(self):
+        """
+        Returns the Rollups for the current dataset version.
+
+        Raises:
+            FileNotFoundError: If the dataset file does not exist.
+        """
+        df, version = self.store.snapshot()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    started = time.perf_counter()
+                    self._rollups = Rollups(df)
+                    self._version = version
+                    AGGREGATION_SECONDS.labels("rollups", self.store.name).observe(time.perf_counter() - started)
+        return self._rollups
@@ -0,0 +1,45 @@
+"""
+Feature assembly of the prediction backfill (backfill.py).
+
+Run from the backend directory:
+    python -m pytest -q test_backfill.py
+"""
+
+import os
+
+import pandas as pd
+
+import backfill
+import model_registry
+
+
+def _hourly(stamps, values):
+    return pd.DataFrame({"timestamp": stamps, "energy_kwh": values})
+
+
+def test_lags_follow_time_across_gaps():
+    # 00:00-02:00, then nothing until 05:00
+    df = _hourly(["2024-03-01 00:00", "2024-03-01 01:00", "2024-03-01 02:00", "2024-03-01 05:00"],
+                 [1.0, 2.0, 3.0, 9.0])
+    features = backfill.build_features(df)
+    assert features["lag_1h"].tolist() == [1.0, 1.0, 2.0, 9.0]
+    # 05:00's window (01:00-04:00) only holds 01:00 and 02:00
+    assert features["rolling_mean_4h"].iloc[3] == 2.5
+
+
+def test_gap_free_data_matches_row_shifts():
+    stamps = pd.date_range("2024-03-01", periods=30, freq="h")
+    values = [float(i) for i in range(30)]
+    features = backfill.build_features(_hourly(stamps, values))
+    power = pd.Series(values)
+    assert features["lag_1h"].tolist() == power.shift(1).fillna(power).tolist()
+    assert features["lag_24h"].tolist() == power.shift(24).fillna(power).tolist()
+
+
+def test_default_model_follows_the_registry(monkeypatch, tmp_path):
+    monkeypatch.setenv("POWERBYTE_MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv("POWERBYTE_MODEL_FILE", "v2.json")
+    assert model_registry.default_model_path() == str(tmp_path / "v2.json")
+    monkeypatch.delenv("POWERBYTE_MODEL_DIR")
+    monkeypatch.delenv("POWERBYTE_MODEL_FILE")
+    assert model_registry.default_model_path() == os.path.join(model_registry.BASE_DIR, "powerbyte_xgboost.json")
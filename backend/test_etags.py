@@ -0,0 +1,57 @@
+"""
+ETag revalidation (304) and the serialized response cache of the
+historical endpoints (response_cache.py).
+
+Run from the backend directory:
+    python -m pytest -q test_etags.py
+"""
+
+import os
+import tempfile
+
+# The app opens its reading store at import; point it at a throwaway database
+os.environ["POWERBYTE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="powerbyte-test-"), "readings.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import response_cache  # noqa: E402
+from response_cache import ResponseCache, etag_matches, make_etag  # noqa: E402
+
+client = TestClient(main.app)
+
+RANGE_URL = "/api/historical/range?start=2025-12-01&end=2025-12-08&resolution=day"
+
+
+def test_matching_etag_gets_bodiless_304():
+    first = client.get(RANGE_URL)
+    assert first.status_code == 200, first.text
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == response_cache.CACHE_CONTROL
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        revalidated = client.get(RANGE_URL, headers={"If-None-Match": header})
+        assert revalidated.status_code == 304, header
+        assert revalidated.content == b""
+        assert revalidated.headers["etag"] == etag
+
+    assert client.get(RANGE_URL, headers={"If-None-Match": '"stale"'}).content == first.content
+
+
+def test_etag_depends_on_query_and_version():
+    other = client.get(RANGE_URL.replace("resolution=day", "resolution=week"))
+    assert other.headers["etag"] != client.get(RANGE_URL).headers["etag"]
+    assert make_etag("key", 1) != make_etag("key", 2)
+    assert not etag_matches(None, make_etag("key", 1))
+
+
+def test_cache_serves_only_the_built_version():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", 1, b"a1")
+    assert cache.get("a", 1) == b"a1"
+    assert cache.get("a", 2) is None
+    cache.put("b", 1, b"b1")
+    cache.get("a", 1)
+    cache.put("c", 1, b"c1")  # evicts b, the least recently used
+    assert cache.get("b", 1) is None and cache.get("a", 1) == b"a1"
+    assert ResponseCache(max_entries=0).get("a", 1) is None
@@ -0,0 +1,53 @@
+"""
+Argument and scenario validation of the dataset generators.
+
+Run from the backend directory:
+    python -m pytest -q test_generators.py
+"""
+
+import json
+import os
+
+import pytest
+
+import generate_24hr_equipment_data
+import generate_fleet
+import generate_historical_data
+
+
+def _scenario(tmp_path, **fields):
+    path = os.path.join(tmp_path, "scenario.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"name": "test", "sites": 1, "days": 1, **fields}, f)
+    return path
+
+
+def test_fleet_rejects_columnar_format(tmp_path):
+    # A site must be servable with POWERBYTE_DATA_DIR, which resolves CSV names
+    with pytest.raises(ValueError, match="csv"):
+        generate_fleet.load_scenario(_scenario(tmp_path, format="columnar"))
+
+
+def test_fleet_site_has_the_files_the_api_reads(tmp_path):
+    scenario = generate_fleet.load_scenario(_scenario(tmp_path))
+    generate_fleet.generate_fleet(scenario, str(tmp_path))
+    site = os.path.join(tmp_path, "test", "site=site_0001")
+    for filename in generate_fleet.DATASETS.values():
+        assert os.path.isfile(os.path.join(site, filename))
+
+
+@pytest.mark.parametrize("argv", [
+    ["--resolution", "0"], ["--resolution", "-5"], ["--days", "0"], ["--days", "-1"],
+    ["--days", "0.00001", "--resolution", "60"],
+])
+def test_24hr_generator_rejects_empty_or_invalid_ranges(argv, capsys):
+    with pytest.raises(SystemExit) as exit:
+        generate_24hr_equipment_data.parse_args(argv)
+    assert exit.value.code == 2
+    assert "--" in capsys.readouterr().err
+
+
+def test_historical_generator_rejects_non_positive_options():
+    for argv in (["--resolution", "0"], ["--meters", "0"], ["--chunk-rows", "-1"]):
+        with pytest.raises(SystemExit):
+            generate_historical_data.parse_args(argv)
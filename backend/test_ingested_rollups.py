@@ -0,0 +1,93 @@
+"""
+Regression checks for the historical endpoints over stored readings
+(?source=ingested).
+
+Run from the backend directory:
+    python -m pytest -q test_ingested_rollups.py
+"""
+
+import os
+import tempfile
+import time
+
+# The app opens its reading store at import; point it at a throwaway database
+os.environ["POWERBYTE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="powerbyte-test-"), "readings.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+client = TestClient(main.app)
+
+
+def _wait_written(count, timeout=10):
+    deadline = time.monotonic() + timeout
+    while main.readings_store.written < count and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert main.readings_store.written >= count
+
+
+def test_ingested_rollups_without_predictions():
+    # /api/realtime/data stores readings with no predicted_kw at all
+    meter = "realtime-only"
+    before = main.readings_store.written
+    for minute in range(0, 120, 10):
+        response = client.post("/api/realtime/data", json={
+            "meter_id": meter,
+            "timestamp": f"2024-03-01T{minute // 60:02d}:{minute % 60:02d}:00",
+            "data": {"RX_kWh": 2.5, "TX1_kWh": 1.2, "TX2_kWh": 1.3},
+        })
+        assert response.status_code == 200
+    _wait_written(before + 12)
+
+    daily = client.get(f"/api/historical/daily?source=ingested&meter_id={meter}")
+    assert daily.status_code == 200, daily.text
+    monthly = client.get(f"/api/historical/monthly?source=ingested&meter_id={meter}")
+    assert monthly.status_code == 200, monthly.text
+
+
+def _post_reading(meter, minute):
+    response = client.post("/api/realtime/data", json={
+        "meter_id": meter,
+        "timestamp": f"2024-03-02T{minute // 60:02d}:{minute % 60:02d}:00",
+        "data": {"RX_kWh": 2.5, "TX1_kWh": 1.2, "TX2_kWh": 1.3},
+    })
+    assert response.status_code == 200
+
+
+def test_etag_survives_other_meters_writes():
+    before = main.readings_store.written
+    _post_reading("etag-a", 0)
+    _post_reading("etag-b", 0)
+    _wait_written(before + 2)
+
+    url = "/api/historical/daily?source=ingested&meter_id=etag-a"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    _post_reading("etag-b", 10)
+    _wait_written(before + 3)
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    _post_reading("etag-a", 10)
+    _wait_written(before + 4)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_ingested_rollups_evict_least_recently_used(monkeypatch):
+    monkeypatch.setattr(main, "MAX_INGESTED_ROLLUPS", 2)
+    before = main.readings_store.written
+    for meter in ("lru-a", "lru-b", "lru-c"):
+        _post_reading(meter, 0)
+    _wait_written(before + 3)
+
+    a = main.load_ingested_rollups("lru-a")
+    main.load_ingested_rollups("lru-b")
+    assert main.load_ingested_rollups("lru-a") is a
+    main.load_ingested_rollups("lru-c")
+    # lru-b was used least recently, so it went; lru-a is still cached
+    assert main.load_ingested_rollups("lru-a") is a
+    assert list(main._ingested_rollups)[-2:] == ["lru-c", "lru-a"]
+    assert "lru-b" not in main._ingested_rollups
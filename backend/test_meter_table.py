@@ -0,0 +1,49 @@
+"""
+Cap, eviction order and thread safety of the per-meter state table
+(meter_table.py).
+
+Run from the backend directory:
+    python -m pytest -q test_meter_table.py
+"""
+
+import threading
+
+from meter_table import MeterTable
+
+
+def test_evicts_least_recently_written_meter():
+    table = MeterTable(max_meters=2, stripes=1)
+    table.set("a", 1)
+    table.set("b", 2)
+    table.get_or_create("a", dict)  # a is now the most recently used
+    table.set("c", 3)
+    assert "b" not in table and table.get("a") == 1 and table.get("c") == 3
+    assert table.evicted == 1
+
+
+def test_striped_table_stays_within_cap():
+    table = MeterTable(max_meters=100)
+    for i in range(1000):
+        table.get_or_create(f"meter-{i}", dict)
+    assert len(table) <= 100
+    assert len(table) + table.evicted == 1000
+    assert len(MeterTable(max_meters=0)) == 0  # 0 means unbounded
+
+
+def test_concurrent_writers_get_one_state_per_meter():
+    table = MeterTable(max_meters=0)
+    seen = [[] for _ in range(8)]
+
+    def writer(out):
+        for i in range(2000):
+            out.append(table.get_or_create(f"meter-{i % 50}", list))
+
+    threads = [threading.Thread(target=writer, args=(out,)) for out in seen]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(table) == 50
+    for out in seen:
+        for i, state in enumerate(out):
+            assert state is table.get(f"meter-{i % 50}")
@@ -0,0 +1,51 @@
+"""
+Error isolation in the /api/predict micro-batcher (micro_batcher.py).
+
+Run from the backend directory:
+    python -m pytest -q test_micro_batcher.py
+"""
+
+import asyncio
+
+from micro_batcher import MicroBatcher
+
+
+def _predict_many(readings):
+    # Fails the whole call like a bad value does while the feature matrix is filled
+    return [float(r["reactive_power"]) * 2 for r in readings]
+
+
+async def _inline(fn, *args):
+    return fn(*args)
+
+
+def test_poisoned_reading_fails_only_its_caller():
+    async def run():
+        batcher = MicroBatcher(_predict_many, _inline, max_batch_size=3, max_wait_ms=50)
+        results = await asyncio.gather(
+            batcher.submit({"reactive_power": 1.0}),
+            batcher.submit({"reactive_power": "abc"}),
+            batcher.submit({"reactive_power": 2.5}),
+            return_exceptions=True,
+        )
+        return batcher, results
+
+    batcher, (good, bad, other) = asyncio.run(run())
+    assert batcher.batches == 1
+    assert (good, other) == (2.0, 5.0)
+    assert isinstance(bad, ValueError)
+
+
+def test_runner_failure_fails_the_batch():
+    async def rejecting(fn, *args):
+        raise RuntimeError("pool saturated")
+
+    async def run():
+        batcher = MicroBatcher(_predict_many, rejecting, max_batch_size=2, max_wait_ms=50)
+        return await asyncio.gather(
+            batcher.submit({"reactive_power": 1.0}),
+            batcher.submit({"reactive_power": 2.0}),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
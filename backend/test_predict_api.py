@@ -0,0 +1,58 @@
+"""
+Input validation and admission order of the prediction endpoints.
+
+Run from the backend directory:
+    python -m pytest -q test_predict_api.py
+"""
+
+import os
+import tempfile
+
+# The app opens its reading store at import; point it at a throwaway database
+os.environ["POWERBYTE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="powerbyte-test-"), "readings.db")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+client = TestClient(main.app)
+
+
+def _reading(meter, **fields):
+    return {
+        "meter_id": meter,
+        "timestamp": "2024-03-01T10:00:00",
+        "zones": {"TX1": {"Voltage": 230.0}},
+        "Global_intensity": 4.0,
+        "Global_reactive_power": 0.1,
+        **fields,
+    }
+
+
+def test_non_numeric_reading_is_422():
+    for fields in ({"Global_reactive_power": "abc"}, {"Global_intensity": None},
+                   {"zones": {"TX1": {"Voltage": "NaN"}}}, {"zones": {"TX1": 5}}):
+        response = client.post("/api/predict", json=_reading("bad-input", **fields))
+        assert response.status_code == 422, (fields, response.text)
+
+
+def test_rejected_readings_leave_features_alone(monkeypatch):
+    # 429 / 503 answers (and their retries) must not feed the feature store
+    meter = "retried"
+    main.feature_store.observe(meter, "2024-03-01T09:00:00", 1.0)
+
+    async def saturated(fn, *args):
+        raise main.cpu_pool.PoolSaturated()
+
+    monkeypatch.setattr(main.cpu, "run", saturated)
+    for _ in range(3):
+        assert client.post("/api/predict", json=_reading(meter)).status_code == 429
+    # Warm-up never ran for this client, so the batch endpoint answers 503
+    for _ in range(3):
+        response = client.post("/api/predict/batch", json={"readings": [_reading(meter)]})
+        assert response.status_code == 503
+
+    # Counted 10:00 readings (0.92 kW) would be lag_1h at 11:00; without them
+    # the 09:00 value is carried forward
+    main.feature_store.observe(meter, "2024-03-01T11:00:00", 1.0)
+    assert main.feature_store.features(meter, None)["lag_1h"] == 1.0
@@ -0,0 +1,65 @@
+"""
+RangeIndex aggregates (range_index.py) against a brute-force pandas
+computation.
+
+Run from the backend directory:
+    python -m pytest -q test_range_index.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from range_index import RangeIndex, bucket_edges, parse_time
+
+
+def _frame(rows=24 * 40, seed=3):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-29", periods=rows, freq="h"),
+        "energy_kwh": rng.uniform(0, 3, rows),
+    })
+    frame.loc[rng.random(rows) < 0.1, "energy_kwh"] = np.nan
+    # Unsorted input must give the same answers
+    return frame.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def _expected(frame, start, end, edges):
+    rows = frame[(frame["timestamp"] >= start) & (frame["timestamp"] < end)]
+    bucket = pd.cut(rows["timestamp"], pd.DatetimeIndex(edges), right=False)
+    grouped = rows.groupby(bucket, observed=False)["energy_kwh"]
+    return grouped.sum(min_count=0), grouped.mean(), grouped.max()
+
+
+@pytest.mark.parametrize("resolution", ["15min", "hour", "day", "week", "month"])
+def test_aggregates_match_brute_force(resolution):
+    frame = _frame()
+    index = RangeIndex(frame, ["energy_kwh"])
+    for start, end in (("2024-02-01 05:30", "2024-02-20 17:00"), ("2024-01-29", "2024-03-09 23:00")):
+        start, end = parse_time(start), parse_time(end)
+        result = index.aggregate(start, end, resolution)
+        edges = bucket_edges(start, end, resolution)
+        sums, means, maxes = _expected(frame, start, end, edges)
+        values = result["metrics"]["energy_kwh"]
+        np.testing.assert_allclose(values["sum"], sums.round(4).to_numpy(), atol=1e-4)
+        np.testing.assert_allclose(values["mean"], means.round(4).to_numpy(), atol=1e-4)
+        np.testing.assert_allclose(values["max"], maxes.round(4).to_numpy(), atol=1e-4)
+        assert len(result["buckets"]) == len(edges) - 1
+
+
+def test_weeks_start_on_monday_and_months_on_the_first():
+    start, end = parse_time("2024-02-07 10:00"), parse_time("2024-03-05")
+    assert pd.Timestamp(bucket_edges(start, end, "week")[0]).day_name() == "Monday"
+    assert pd.Timestamp(bucket_edges(start, end, "month")[0]) == pd.Timestamp("2024-02-01")
+
+
+def test_rejects_bad_queries():
+    index = RangeIndex(_frame(), ["energy_kwh"])
+    start, end = parse_time("2024-02-01"), parse_time("2024-02-02")
+    for kwargs in ({"resolution": "year"}, {"metrics": ["nope"]}, {"aggregates": ["median"]}):
+        with pytest.raises(ValueError):
+            index.aggregate(start, end, **kwargs)
+    with pytest.raises(ValueError):
+        index.aggregate(end, start)
+    with pytest.raises(ValueError):
+        parse_time("2024-02-01T00:00:00+05:30")
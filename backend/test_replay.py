@@ -0,0 +1,46 @@
+"""
+Pacing checks for server-side replays (replay.py).
+
+Run from the backend directory:
+    python -m pytest -q test_replay.py
+"""
+
+import asyncio
+import os
+import tempfile
+
+import replay
+
+
+def _per_second_csv(rows=600):
+    path = os.path.join(tempfile.mkdtemp(prefix="powerbyte-test-"), "per_second.csv")
+    with open(path, "w") as f:
+        f.write("time,RX_kWh\n")
+        for second in range(rows):
+            f.write(f"{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d},0.07\n")
+    return path
+
+
+def _rows_sent(speed, seconds, monkeypatch):
+    # A short tick wakes the loop often; a wake-up with nothing due must send nothing
+    monkeypatch.setattr(replay, "MAX_TICK", 0.01)
+    source = replay.ReplaySource(_per_second_csv())
+    pushed = []
+
+    async def run():
+        r = replay.Replay("test", source, lambda *row: pushed.append(row), "meter", speed=speed).start()
+        await asyncio.sleep(seconds)
+        r.stop()
+        return r
+
+    r = asyncio.run(run())
+    assert r.rows_sent == len(pushed)
+    return len(pushed)
+
+
+def test_replay_sends_rows_at_speed(monkeypatch):
+    # Per-second data: elapsed * speed / step rows, plus the first one at t=0
+    for speed, seconds in ((2.0, 1.0), (10.0, 1.0)):
+        expected = seconds * speed + 1
+        sent = _rows_sent(speed, seconds, monkeypatch)
+        assert abs(sent - expected) <= max(2, 0.2 * expected), (speed, sent, expected)
@@ -0,0 +1,275 @@
+"""
+Append-only, persistent time-series storage for ingested readings.
+
+Readings go into a bounded in-memory queue (append() never blocks a request
+handler) and a background writer thread drains it into SQLite in WAL mode,
+one transaction per batch. Rows are indexed by time and by (meter, time),
+so range queries and hourly rollups read only the requested span.
+
+The database path comes from POWERBYTE_DB_PATH (default: next to this file).
+"""
+
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+from meter_table import MeterTable
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DB_PATH = os.path.join(BASE_DIR, "powerbyte_readings.db")
+
+# Row layout, in insert order
+COLUMNS = (
+    "meter_id", "ts", "power_kw", "voltage", "intensity", "reactive_power",
+    "rx_kw", "tx1_kw", "tx2_kw", "predicted_kw",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    meter_id       TEXT    NOT NULL,
+    ts             REAL    NOT NULL,  -- Unix epoch seconds
+    power_kw       REAL,
+    voltage        REAL,
+    intensity      REAL,
+    reactive_power REAL,
+    rx_kw          REAL,
+    tx1_kw         REAL,
+    tx2_kw         REAL,
+    predicted_kw   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings (ts);
+CREATE INDEX IF NOT EXISTS idx_readings_meter_ts ON readings (meter_id, ts);
+"""
+
+# Hours below this energy are "low_usage", matching the professional dataset
+LOW_USAGE_KWH = 1.0
+ELECTRICITY_RATE_INR = 7.0  # ₹ per kWh (average Indian household tariff)
+
+
+def _hour_offset():
+    """
+    Seconds to add to an epoch so whole hours fall on local clock hours
+    (1800 in IST, +5:30). Only the sub-hour part of the UTC offset matters,
+    so DST changes of whole hours do not move the bucket edges.
+    """
+    offset = datetime.datetime.now().astimezone().utcoffset()
+    return int(offset.total_seconds()) % 3600
+
+
+def _local_times(epoch_seconds):
+    """
+    Epoch seconds -> naive local datetimes, like the CSV datasets use. Each
+    value gets the offset in force at its own time, so readings from before
+    a DST change are not shifted by today's offset.
+    """
+    return pd.to_datetime(epoch_seconds, unit="s", utc=True).dt.tz_convert(tzlocal()).dt.tz_localize(None)
+
+
+def to_epoch(timestamp):
+    """Epoch seconds for a datetime, ISO string, epoch number or None (now); anything unparseable means now."""
+    if timestamp is None or isinstance(timestamp, bool):
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        try:
+            # Rejects NaN and epochs outside the datetime range
+            return datetime.datetime.fromtimestamp(timestamp).timestamp()
+        except (ValueError, OverflowError, OSError):
+            return time.time()
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.datetime.fromisoformat(timestamp)
+        except ValueError:
+            return time.time()
+    if not isinstance(timestamp, datetime.datetime):
+        return time.time()
+    return timestamp.timestamp()
+
+
+class TimeSeriesStore:
+    """SQLite-backed reading log with a buffered background writer."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=5000, flush_interval=0.5, max_pending=200_000):
+        """
+        Args:
+            path (str): SQLite database file.
+            batch_size (int): Most rows written per transaction.
+            flush_interval (float): Longest a row waits in memory, in seconds.
+            max_pending (int): Queue bound; appends beyond it are dropped and counted.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._local = threading.local()
+        self.written = 0
+        self.dropped = 0
+        # meter_id -> `written` after the meter's latest write (see meter_version)
+        self._meter_versions = MeterTable()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="powerbyte-tsdb-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self):
+        """Per-thread read connection; WAL lets readers run alongside the writer."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    # ── Writes ──────────────────────────────────────────────────────────
+
+    def append(self, meter_id, timestamp=None, **values):
+        """
+        Queues one reading for persistence without blocking.
+
+        Args:
+            meter_id (str): Meter / site identifier.
+            timestamp (datetime.datetime | str | None): Reading time.
+            **values: Any of power_kw, voltage, intensity, reactive_power,
+                rx_kw, tx1_kw, tx2_kw, predicted_kw.
+
+        Returns:
+            bool: False if the queue was full and the reading was dropped.
+        """
+        row = (meter_id, to_epoch(timestamp)) + tuple(values.get(name) for name in COLUMNS[2:])
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def _drain(self, first):
+        rows = [first]
+        while len(rows) < self.batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write_loop(self):
+        conn = self._connect()
+        insert = f"INSERT INTO readings ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            rows = self._drain(first)
+            try:
+                with conn:
+                    conn.executemany(insert, rows)
+                self.written += len(rows)
+                for meter_id in {row[0] for row in rows}:
+                    self._meter_versions.set(meter_id, self.written)
+            except sqlite3.Error as e:
+                print(f"Error writing {len(rows)} readings: {e}")
+                self.dropped += len(rows)
+        conn.close()
+
+    def meter_version(self, meter_id):
+        """
+        A token that changes whenever rows for `meter_id` are written and
+        stays put while only other meters write: the total row count as of
+        the meter's latest write. Never moves backwards, also for a meter
+        whose entry was evicted (that falls back to the current total).
+        """
+        version = self._meter_versions.get(meter_id)
+        return self.written if version is None else version
+
+    def close(self):
+        """Flushes everything still queued and stops the writer."""
+        self._stop.set()
+        self._writer.join()
+
+    # ── Reads ───────────────────────────────────────────────────────────
+
+    def range_query(self, start=None, end=None, meter_id=None, limit=None):
+        """
+        Readings with start <= ts < end, oldest first.
+
+        Returns:
+            pd.DataFrame: COLUMNS, with ts as naive local datetimes.
+        """
+        clauses, params = [], []
+        if meter_id is not None:
+            clauses.append("meter_id = ?")
+            params.append(meter_id)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(to_epoch(end))
+        sql = f"SELECT {', '.join(COLUMNS)} FROM readings"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        df = pd.read_sql_query(sql, self._reader(), params=params)
+        df["ts"] = _local_times(df["ts"])
+        return df
+
+    def hourly_frame(self, meter_id, co2_factor, start=None, end=None):
+        """
+        Hourly energy for one meter in the professional dataset's layout
+        (timestamp, date, energy_kwh, cost_rs, carbon_kg, status, predicted_kwh).
+        `co2_factor` is the grid emission factor in kg CO₂ per kWh.
+
+        Each hour's energy is the mean power of its readings, so the result
+        does not depend on how often the meter reports. Hours are local clock
+        hours, like the dataset's timestamps.
+        """
+        offset = _hour_offset()
+        clauses, params = ["meter_id = ?"], [offset, meter_id]
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(to_epoch(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(to_epoch(end))
+        sql = (
+            "SELECT CAST((ts + ?) / 3600 AS INTEGER) AS hour, AVG(power_kw) AS energy_kwh, "
+            "AVG(predicted_kw) AS predicted_kwh FROM readings "
+            f"WHERE {' AND '.join(clauses)} GROUP BY hour ORDER BY hour"
+        )
+        hourly = pd.read_sql_query(sql, self._reader(), params=params)
+
+        stamps = _local_times(hourly["hour"] * 3600 - offset)
+        # An hour whose readings are all NULL comes back as None; make it NaN
+        energy = pd.to_numeric(hourly["energy_kwh"], errors="coerce").fillna(0.0)
+        predicted = pd.to_numeric(hourly["predicted_kwh"], errors="coerce")
+        return pd.DataFrame({
+            "timestamp": stamps.dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "date": stamps.dt.strftime("%Y-%m-%d"),
+            "energy_kwh": energy.round(3),
+            "cost_rs": (energy * ELECTRICITY_RATE_INR).round(2),
+            "carbon_kg": (energy * co2_factor).round(4),
+            "status": np.where(energy < LOW_USAGE_KWH, "low_usage", "normal"),
+            "predicted_kwh": predicted,
+        })
@@ -0,0 +1,107 @@
+"""
+Start-up warm-up that runs after the server is already accepting requests.
+
+Importing the app only builds cheap objects; anything that reads files or
+loads a model (seeding lag features, loading XGBoost, building rollups) is
+registered as a warm-up step instead. The lifespan handler runs the steps on
+a background thread, so a new worker answers liveness checks immediately and
+reports ready once warm-up is over:
+
+    /healthz  the process is up and serving (liveness)
+    /readyz   warm-up finished and every readiness check passes; 503 until then
+
+A step that fails is only recorded with its error, since everything it warms
+is also built lazily on first use. What readiness needs is expressed as
+checks, re-evaluated on every probe, so a worker whose model could not be
+loaded at start becomes ready once it can.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class WarmUpStep:
+    __slots__ = ("name", "fn", "status", "ms", "error")
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+        self.status = "pending"
+        self.ms = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "status": self.status,
+            "ms": None if self.ms is None else round(self.ms, 1),
+            "error": self.error,
+        }
+
+
+class WarmUp:
+    """Ordered start-up steps, run once in the background."""
+
+    def __init__(self):
+        self.steps = []
+        self.checks = {}
+        self.created_at = time.perf_counter()
+        self.finished_at = None
+        self._done = threading.Event()
+        self._task = None
+
+    def step(self, name, fn):
+        """Registers `fn` (no arguments) to run during warm-up, in registration order."""
+        self.steps.append(WarmUpStep(name, fn))
+
+    def check(self, name, fn):
+        """Registers a readiness condition: `fn()` must return true for /readyz to pass."""
+        self.checks[name] = fn
+
+    def failing_checks(self):
+        """Names of the checks that fail; all of them until warm-up is done, without running them."""
+        if not self.done:
+            return list(self.checks)
+        return [name for name, fn in self.checks.items() if not fn()]
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def ready(self):
+        """True once warm-up finished and every check passes."""
+        return self.done and not self.failing_checks()
+
+    def run(self):
+        """Runs every step in order, recording timings and errors; never raises."""
+        for step in self.steps:
+            step.status = "running"
+            started = time.perf_counter()
+            try:
+                step.fn()
+                step.status = "ok"
+            except Exception as e:
+                step.status, step.error = "failed", str(e)
+                print(f"Warm-up step {step.name} failed: {e}")
+            step.ms = (time.perf_counter() - started) * 1000
+        self.finished_at = time.perf_counter()
+        self._done.set()
+
+    def start(self):
+        """Starts run() on a worker thread from the event loop (idempotent)."""
+        if self._task is None:
+            self._task = asyncio.create_task(asyncio.to_thread(self.run))
+        return self._task
+
+    def to_dict(self):
+        failing = self.failing_checks()
+        return {
+            "ready": self.done and not failing,
+            "failing_checks": failing,
+            "done": self.done,
+            "uptime_s": round(time.perf_counter() - self.created_at, 3),
+            "warmup_ms": None if self.finished_at is None else round((self.finished_at - self.created_at) * 1000, 1),
+            "steps": [s.to_dict() for s in self.steps],
+        }
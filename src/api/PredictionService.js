@@ -42,6 +42,31 @@ export const getSensorData = async () => {
     }
 };
 
+/**
+ * Subscribes to live sensor state over Server-Sent Events (/api/stream).
+ * The first message is the full state; later ones carry only the zones and
+ * prediction that changed, in the same shape as getSensorData().
+ * @param {Function} onData - Called with { zones?, prediction?, timestamp }
+ * @param {Function} onError - Called once if the stream fails; it is then closed
+ * @param {string} meterId - Meter to watch
+ * @returns {Function} - Closes the stream
+ */
+export const subscribeSensorData = (onData, onError, meterId = 'default') => {
+    const source = new EventSource(`${API_URL}/stream?meters=${encodeURIComponent(meterId)}`);
+
+    source.addEventListener('snapshot', (event) => {
+        const state = JSON.parse(event.data).meters[meterId];
+        if (state) onData(state);
+    });
+    source.addEventListener('delta', (event) => onData(JSON.parse(event.data)));
+    source.onerror = (error) => {
+        source.close();
+        if (onError) onError(error);
+    };
+
+    return () => source.close();
+};
+
 export const getModelInfo = async () => {
     try {
         const response = await fetch(`${API_URL}/model-info`);
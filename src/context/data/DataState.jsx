@@ -3,7 +3,7 @@ import { auth } from '../../firebase';
 import { onAuthStateChanged } from 'firebase/auth';
 import { toast } from 'react-toastify';
 import { usePageVisibility } from '../utils/UserVisible';
-import { getSensorData, getModelInfo } from '../../api/PredictionService';
+import { getSensorData, getModelInfo, subscribeSensorData } from '../../api/PredictionService';
 import { useNotification } from '../NotificationContext';
 
 const DataContext = createContext();
@@ -348,9 +348,10 @@ const DataState = (props) => {
     loadCSVData();
   }, []);
 
-  // Main polling loop — fetch data from backend every 2 seconds
+  // Live data — pushed by the backend stream, polling every 2 seconds as a fallback
   useEffect(() => {
     let intervalId;
+    let closeStream;
 
     if (isVisible) {
       // Fetch model info once on mount
@@ -358,15 +359,26 @@ const DataState = (props) => {
         getModelInfo().then(info => setFeatureImportance(info.feature_importance)).catch(console.error);
       }
 
-      // Poll backend for live sensor data
-      intervalId = setInterval(() => {
-        getSensorData()
-          .then(processBackendData)
-          .catch(err => console.error("Polling error:", err));
-      }, 2000);
+      const startPolling = () => {
+        intervalId = setInterval(() => {
+          getSensorData()
+            .then(processBackendData)
+            .catch(err => console.error("Polling error:", err));
+        }, 2000);
+      };
+
+      if (typeof EventSource !== 'undefined') {
+        closeStream = subscribeSensorData(processBackendData, (err) => {
+          console.error("Live stream error, falling back to polling:", err);
+          startPolling();
+        });
+      } else {
+        startPolling();
+      }
     }
 
     return () => {
+      if (closeStream) closeStream();
       if (intervalId) clearInterval(intervalId);
     };
     // eslint-disable-next-line